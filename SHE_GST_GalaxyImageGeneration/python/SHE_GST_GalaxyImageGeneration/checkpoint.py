@@ -0,0 +1,207 @@
+""" @file checkpoint.py
+
+    Created 17 Oct 2026
+
+    A manifest recording which detectors of an image group have been fully written, so that an interrupted run can
+    be resumed from the first detector which wasn't.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import json
+import os
+import shutil
+
+from SHE_PPT.logging import getLogger
+from astropy import table
+
+
+logger = getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointManifest(object):
+    """
+        @brief Records the detectors of an image group which have been fully written.
+
+        @details The manifest is keyed by the model hash, seed, and SHE_GST version of the image group, and lists the
+            index and full ID of each completed detector. Along with it, it stores the name, size, and number of HDUs
+            of each image file after the last completed detector was written, so that the same files can be reopened
+            and any partially-written extensions truncated away, and a copy of each completed detector's tables in a
+            directory next to the manifest. The manifest is rewritten atomically after each detector, so it never
+            refers to data which isn't on disk.
+    """
+
+    def __init__(self, filename, model_hash, seed, version, workdir="."):
+        self.workdir = workdir
+        self.qualified_filename = os.path.join(workdir, filename)
+        self.table_dir = os.path.splitext(self.qualified_filename)[0]
+        self.model_hash = model_hash
+        self.seed = seed
+        self.version = version
+        self.detectors = []
+        self.writer_states = []
+
+    @property
+    def completed_image_indices(self):
+        return set([detector["index"] for detector in self.detectors])
+
+    @property
+    def completed_image_IDs(self):
+        return set([detector["image_ID"] for detector in self.detectors])
+
+    def load(self):
+        """
+            @brief Loads an existing manifest, if it's for the same model, seed, and version as this one.
+
+            @returns loaded
+                <bool> True if a matching manifest was loaded, False otherwise
+        """
+
+        if not os.path.exists(self.qualified_filename):
+            return False
+
+        try:
+            with open(self.qualified_filename, 'r') as fi:
+                manifest = json.load(fi)
+        except ValueError:
+            logger.warning("Checkpoint manifest " + self.qualified_filename + " is unreadable; starting afresh.")
+            return False
+
+        if (manifest.get("checkpoint_version") != CHECKPOINT_VERSION or
+                manifest.get("model_hash") != self.model_hash or
+                manifest.get("seed") != self.seed or
+                manifest.get("version") != self.version):
+            logger.warning("Checkpoint manifest " + self.qualified_filename + " is for a different model; " +
+                           "starting afresh.")
+            return False
+
+        # Check that all the data the manifest refers to is still there
+        for filename, size, _ in manifest["writer_states"]:
+            qualified_filename = os.path.join(self.workdir, filename)
+            if not os.path.exists(qualified_filename) or os.path.getsize(qualified_filename) < size:
+                logger.warning("File " + qualified_filename + " is missing or shorter than recorded in checkpoint " +
+                               "manifest; starting afresh.")
+                return False
+        for detector in manifest["detectors"]:
+            for key in ("detections_table", "details_table"):
+                if detector[key] is not None and not os.path.exists(os.path.join(self.table_dir, detector[key])):
+                    logger.warning("Table " + detector[key] + " recorded in checkpoint manifest is missing; " +
+                                   "starting afresh.")
+                    return False
+
+        self.detectors = manifest["detectors"]
+        self.writer_states = [tuple(state) for state in manifest["writer_states"]]
+
+        logger.info("Resuming from checkpoint with " + str(len(self.detectors)) + " detectors already written.")
+
+        return True
+
+    def record_detector(self, image_index, image_ID, detections_table, details_table, writers):
+        """
+            @brief Records that a detector has been fully written.
+
+            @param image_index
+                <int> Index of the detector within the image group
+            @param image_ID
+                <int> Full ID of the detector's Image object
+            @param detections_table
+                <astropy.table.Table> The detector's detections table, or None if not output
+            @param details_table
+                <astropy.table.Table> The detector's details table, or None if not output
+            @param writers
+                <list<MultiExtensionFitsWriter>> The writers for the image files, in the order they should be
+                reopened in
+        """
+
+        os.makedirs(self.table_dir, exist_ok=True)
+
+        detector = {"index": image_index,
+                    "image_ID": image_ID, }
+
+        for key, tab in (("detections_table", detections_table),
+                         ("details_table", details_table)):
+            if tab is None:
+                detector[key] = None
+                continue
+            table_filename = key + "-" + str(image_ID) + ".fits"
+            tab.write(os.path.join(self.table_dir, table_filename), format='fits', overwrite=True)
+            detector[key] = table_filename
+
+        self.writer_states = [(os.path.relpath(writer.filename, self.workdir), writer.size, writer.num_hdus)
+                              for writer in writers]
+
+        self.detectors.append(detector)
+
+        self._write()
+
+        return
+
+    def read_tables(self):
+        """
+            @brief Reads the tables of each completed detector, in the order they were recorded.
+
+            @returns detections_tables
+                <list<astropy.table.Table>>
+            @returns details_tables
+                <list<astropy.table.Table>>
+        """
+
+        detections_tables = []
+        details_tables = []
+
+        for detector in self.detectors:
+            for key, tables in (("detections_table", detections_tables),
+                                ("details_table", details_tables)):
+                if detector[key] is None:
+                    tables.append(None)
+                else:
+                    tables.append(table.Table.read(os.path.join(self.table_dir, detector[key]), format='fits'))
+
+        return detections_tables, details_tables
+
+    def clear(self):
+        """ Removes the manifest and its stored tables from disk, and forgets all completed detectors.
+        """
+
+        self.detectors = []
+        self.writer_states = []
+
+        if os.path.exists(self.qualified_filename):
+            os.remove(self.qualified_filename)
+        if os.path.isdir(self.table_dir):
+            shutil.rmtree(self.table_dir)
+
+        return
+
+    def _write(self):
+        """ Writes the manifest through a temporary file, so that an interruption can't leave it half-written.
+        """
+
+        manifest = {"checkpoint_version": CHECKPOINT_VERSION,
+                    "model_hash": self.model_hash,
+                    "seed": self.seed,
+                    "version": self.version,
+                    "detectors": self.detectors,
+                    "writer_states": self.writer_states, }
+
+        temp_filename = self.qualified_filename + ".tmp"
+        with open(temp_filename, 'w') as fo:
+            json.dump(manifest, fo)
+        os.replace(temp_filename, self.qualified_filename)
+
+        return
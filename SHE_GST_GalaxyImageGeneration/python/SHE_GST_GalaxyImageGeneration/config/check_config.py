@@ -5,7 +5,7 @@
     @TODO: File docstring
 """
 
-__updated__ = "2018-07-03"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -47,14 +47,25 @@ def get_full_options(options, image):
     full_options = deepcopy(options)
 
     # Delete options which don't affect images
-    del (full_options['details_only'],
+    del (full_options['cache_dir'],
+         full_options['details_only'],
          full_options['details_output_format'],
          full_options['dithering_scheme'],
+         full_options['galaxy_blocks'],
+         full_options['num_parallel_detectors'],
          full_options['num_parallel_threads'],
+         full_options['num_parallel_tiles'],
+         full_options['pipeline_queue_depth'],
+         full_options['psf_cache_dir'],
+         full_options['psf_cache_max_size_mb'],
+         full_options['render_oversampled_dithers'],
+         full_options['render_tile_size'],
+         full_options['resume'],
          full_options['workdir'],
          full_options['output_file_name_base'],
          full_options['psf_file_name_base'],
          full_options['seed'],  # stored separately
+         full_options['snapshot_dir'],
          )
 
     # Add allowed survey settings, with both level and setting possibilities
@@ -67,6 +78,15 @@ def get_full_options(options, image):
         param_settings = image.get_param(allowed_survey_setting).get_params()
         full_options[allowed_survey_setting + "_setting"] = param_settings.name() + " " + param_settings.get_parameters_string()
 
+    # If the survey has more than one image group, each needs its own model hash so their output files don't collide.
+    # We check how many it will have rather than how many children it has, since image groups may be created one at a
+    # time
+    survey = image
+    while survey.get_parent() is not None:
+        survey = survey.get_parent()
+    if round(survey.get_param_value("num_image_groups")) > 1:
+        full_options["image_group_ID"] = image.get_ID_seq()[1]
+
     return full_options
 
     logger.debug("# Exiting get_full_options method.")
@@ -6,7 +6,7 @@
     values for the Generate_GalSim_Images project.
 """
 
-__updated__ = "2019-07-04"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -36,6 +36,7 @@ def str2bool(v):
 
 allowed_options = {'aocs_time_series_products': ('mock_aocs_time_series_products.json', str),
                    'astrometry_products': ('mock_astrometry_products.json', str),
+                   'cache_dir': (None, str),
                    'chromatic_psf': (True, str2bool),
                    'compress_images': (0, int),
                    'data_dir': (mv.default_data_dir, str),
@@ -46,7 +47,9 @@ allowed_options = {'aocs_time_series_products': ('mock_aocs_time_series_products
                    'detections_tables': ('mock_detections_tables.json', str),
                    'dithering_scheme': ('none', str),
                    'euclid_psf': (True, str2bool),
+                   'fidelity_tiers': ('none', str),
                    'galaxies_per_group': (2, int),
+                   'galaxy_blocks': (False, str2bool),
                    'image_datatype': (mv.default_image_datatype, str),
                    'logdir': (".", str),
                    'magnitude_limit': (mv.default_magnitude_limit, float),
@@ -57,26 +60,37 @@ allowed_options = {'aocs_time_series_products': ('mock_aocs_time_series_products
                    'model_psf_x_offset': (mv.default_pixel_scale / mv.default_psf_scale_factor, float),
                    'model_psf_y_offset': (mv.default_pixel_scale / mv.default_psf_scale_factor, float),
                    'noise_seed': (0, int),
+                   'num_parallel_detectors': (1, int),
                    'num_parallel_threads': (1, int),
+                   'num_parallel_tiles': (1, int),
                    'num_target_galaxies': (0, int),
                    'output_file_name_base': ('simulated_image', str),
                    'output_psf_file_name': (None, str),
                    'output_unsubtracted_background': (None, float),
+                   'pipeline_queue_depth': (0, int),
+                   'psf_cache_dir': (None, str),
+                   'psf_cache_max_size_mb': (1024., float),
                    'psf_file_name_base': ('simulated_image_psfs', str),
                    'psf_images_and_tables': ('sim_psf_images_and_tables.json', str),
+                   'psf_output_layout': ('extensions', str),
                    'psf_stamp_size': (256, int),
                    'psf_scale_factor': (mv.default_psf_scale_factor, int),
                    'render_background_galaxies': (True, str2bool),
+                   'render_oversampled_dithers': (False, str2bool),
+                   'render_tile_size': (1024, int),
+                   'resume': (False, str2bool),
                    'seed': (mv.default_random_seed, int),
                    'segmentation_images': ('mock_segmentation_images.json', str),
                    'shape_noise_cancellation': (False, str2bool),
                    'single_psf': (False, str2bool),
+                   'snapshot_dir': (None, str),
                    'stable_rng': (False, str2bool),
                    'stacked_data_image': ("StackedDataImage.xml", str),
                    'stacked_segmentation_image': ("StackedSegmentationImage.xml", str),
                    'stamp_size': (256, int),
                    'stamp_size_factor': (4.5, float),
                    'suppress_noise': (False, str2bool),
+                   'vectorised_stable_noise': (False, str2bool),
                    'gain': (3.3, float),
                    'read_noise': (5.4, float),
                    'workdir': (".", str)}
@@ -85,7 +99,8 @@ allowed_option_values = {'compress_images': (0, 1, 2),
                          'details_output_format': ('none', 'fits', 'ascii', 'both'),
                          'dithering_scheme': ('none', '2x2'),
                          'image_type': ('32f', '64f'),
-                         'mode': ('field', 'stamps', 'cutouts')}
+                         'mode': ('field', 'stamps', 'cutouts'),
+                         'psf_output_layout': ('extensions', 'cube')}
 
 allowed_fixed_params = ('num_images',
                         'num_clusters',
@@ -5,7 +5,7 @@
     @TODO: File docstring
 """
 
-__updated__ = "2020-11-12"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -23,7 +23,7 @@ __updated__ = "2020-11-12"
 import os
 
 from SHE_PPT import products
-from SHE_PPT.file_io import read_xml_product, find_file
+from SHE_PPT.file_io import read_xml_product
 from SHE_PPT.logging import getLogger
 
 from SHE_GST_GalaxyImageGeneration import magic_values as mv
@@ -32,6 +32,7 @@ from SHE_GST_GalaxyImageGeneration.config.config_default import (allowed_options
                                                                  allowed_survey_settings,
                                                                  generation_levels,
                                                                  load_default_configurations)
+from SHE_GST_GalaxyImageGeneration.utility.file_resolver import resolve_file
 import SHE_GST_PhysicalModel
 
 
@@ -45,7 +46,7 @@ def get_cfg_args(config_filename, workdir="."):
     cfg_args = {}
 
     # Find the file first
-    qualified_config_filename = find_file(config_filename, path=workdir)
+    qualified_config_filename = resolve_file(config_filename, path=workdir)
 
     # The config file can be either an xml product which points to a file, or the file itself.
     # We'll first check if it's a valid xml product
@@ -53,7 +54,7 @@ def get_cfg_args(config_filename, workdir="."):
     try:
         config_prod = read_xml_product(qualified_config_filename)
         # It's a product, so get the file it points to in the workdir
-        qualified_config_filename = find_file(config_prod.get_filename(), path=workdir)
+        qualified_config_filename = resolve_file(config_prod.get_filename(), path=workdir)
     except Exception as e:
         # Catch exceptions and try anyway
         pass
@@ -0,0 +1,142 @@
+""" @file fidelity_tiers.py
+
+    Created 18 Oct 2026
+
+    Tiers of rendering fidelity, so that galaxies well below the magnitude limit can be drawn less precisely than
+    those which will be measured.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import numpy as np
+
+
+# Name of the column the tier of each galaxy is recorded in, in the details table
+RENDER_TIER_COLNAME = "SHE_GST_RENDER_TIER"
+
+# Methods a tier can draw galaxies with
+allowed_tier_methods = ('auto', 'fft', 'real_space', 'phot')
+
+
+class FidelityTier(object):
+    """
+        @brief Settings used to draw galaxies in a range of magnitudes.
+
+        @details A tier applies to galaxies whose magnitude minus the magnitude limit is at most max_relative_mag,
+            and which aren't in a brighter tier. method replaces 'auto' for components which get their pixel response
+            when drawn; components convolved with a pixel explicitly are always drawn without one.
+    """
+
+    def __init__(self, max_relative_mag, gsparams, stamp_size_factor = None, method = 'auto'):
+        self.max_relative_mag = max_relative_mag
+        self.gsparams = gsparams
+        self.stamp_size_factor = stamp_size_factor
+        self.method = method
+
+
+def _get_standard_tiers(default_gsparams):
+    """ Gets the built-in tiers: full precision for target galaxies, relaxed precision for background galaxies
+        within two magnitudes of the limit, and further relaxed precision and smaller stamps for those fainter still.
+    """
+
+    return [FidelityTier(0., default_gsparams),
+            FidelityTier(2., default_gsparams.withParams(folding_threshold = 1e-2,
+                                                         maxk_threshold = 3e-3,
+                                                         kvalue_accuracy = 1e-4)),
+            FidelityTier(np.inf, default_gsparams.withParams(folding_threshold = 2e-2,
+                                                             maxk_threshold = 1e-2,
+                                                             kvalue_accuracy = 1e-3),
+                         stamp_size_factor = 3.0), ]
+
+
+def get_fidelity_tiers(tiers_spec, default_gsparams):
+    """
+        @brief Gets the rendering fidelity tiers described by a configuration string.
+
+        @details The string is either 'none', to draw every galaxy with the default settings, 'standard' for the
+            built-in tiers, or a semicolon-separated list of tiers, from brightest to faintest. Each tier is given as
+            max_relative_mag,folding_threshold,kvalue_accuracy,stamp_size_factor,method where max_relative_mag is the
+            faintest magnitude in the tier relative to the magnitude limit, and any of the other values can be left
+            empty to use the default. The last tier must have max_relative_mag 'inf'. For example:
+
+            0,,,,; 2,1e-2,1e-4,,; inf,2e-2,1e-3,3.0,phot
+
+        @param tiers_spec
+            <str> The configuration string
+        @param default_gsparams
+            <galsim.GSParams> The GSParams used for anything a tier doesn't specify
+
+        @returns tiers
+            <list<FidelityTier>> The tiers in order of increasing magnitude, or None if tiers aren't used
+    """
+
+    if tiers_spec is None or tiers_spec.strip().lower() in ('none', ''):
+        return None
+    if tiers_spec.strip().lower() == 'standard':
+        return _get_standard_tiers(default_gsparams)
+
+    tiers = []
+    for tier_spec in tiers_spec.split(';'):
+
+        values = [value.strip() for value in tier_spec.split(',')]
+        if len(values) != 5:
+            raise ValueError("Fidelity tier '" + tier_spec + "' should have 5 comma-separated values.")
+        max_relative_mag, folding_threshold, kvalue_accuracy, stamp_size_factor, method = values
+
+        gsparams = default_gsparams
+        if folding_threshold != "":
+            gsparams = gsparams.withParams(folding_threshold = float(folding_threshold))
+        if kvalue_accuracy != "":
+            gsparams = gsparams.withParams(kvalue_accuracy = float(kvalue_accuracy))
+
+        if method == "":
+            method = 'auto'
+        elif method not in allowed_tier_methods:
+            raise ValueError("Invalid method '" + method + "' for fidelity tier. Allowed methods are: " +
+                             str(allowed_tier_methods) + ".")
+
+        tiers.append(FidelityTier(float(max_relative_mag),
+                                  gsparams,
+                                  stamp_size_factor = float(stamp_size_factor) if stamp_size_factor != "" else None,
+                                  method = method))
+
+    max_relative_mags = [tier.max_relative_mag for tier in tiers]
+    if max_relative_mags != sorted(max_relative_mags):
+        raise ValueError("Fidelity tiers must be in order of increasing magnitude.")
+    if max_relative_mags[-1] != np.inf:
+        raise ValueError("The last fidelity tier must extend to magnitude 'inf'.")
+
+    return tiers
+
+
+def get_fidelity_tier_indices(apparent_mag_vis, magnitude_limit, tiers):
+    """
+        @brief Gets the index of the tier each galaxy is drawn in.
+
+        @param apparent_mag_vis
+            <np.ndarray> The magnitude of each galaxy
+        @param magnitude_limit
+            <float> The magnitude limit for target galaxies
+        @param tiers
+            <list<FidelityTier>> The tiers, as returned by get_fidelity_tiers
+
+        @returns tier_indices
+            <np.ndarray<int>> Index of the tier each galaxy is in
+    """
+
+    return np.searchsorted([tier.max_relative_mag for tier in tiers],
+                           np.asarray(apparent_mag_vis) - magnitude_limit,
+                           side = 'left')
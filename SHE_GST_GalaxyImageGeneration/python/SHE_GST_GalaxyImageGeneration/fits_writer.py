@@ -0,0 +1,154 @@
+""" @file fits_writer.py
+
+    Created 17 Oct 2026
+
+    A writer for multi-extension FITS files which keeps the file open, pre-allocates space for each batch of
+    extensions, and writes their data through a memory map.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from SHE_PPT.logging import getLogger
+from astropy.io import fits
+
+import numpy as np
+
+
+logger = getLogger(__name__)
+
+FITS_BLOCK_SIZE = 2880
+
+
+def _get_padded_size(size):
+    """ Gets the size of a header or data section once padded to a whole number of FITS blocks.
+    """
+    return ((size + FITS_BLOCK_SIZE - 1) // FITS_BLOCK_SIZE) * FITS_BLOCK_SIZE
+
+
+def get_fits_header(gs_image):
+    """ Gets an astropy header for a galsim image, using the one wrapped by its FitsHeader if possible to avoid
+        rebuilding it.
+    """
+
+    if not hasattr(gs_image, "header"):
+        return fits.Header()
+    if isinstance(getattr(gs_image.header, "header", None), fits.Header):
+        return gs_image.header.header
+    return fits.header.Header(list(gs_image.header.items()))
+
+
+class MultiExtensionFitsWriter(object):
+    """
+        @brief Writes image extensions to a FITS file, keeping it open between writes.
+
+        @details Extensions are written in batches (e.g. all the planes for one detector). For each batch, the
+            complete layout of headers and data sections is computed first, the file is extended once to its new
+            size, the headers are written in place, and the data is copied into a single memory map of the new
+            region. As with appending to a new file through astropy, the first extension written becomes the
+            primary HDU.
+
+            To continue a file written by an earlier writer, pass the size and number of HDUs it had after the last
+            batch which should be kept; anything written after that is truncated away.
+    """
+
+    def __init__(self, filename, size=0, num_hdus=0):
+        self.filename = filename
+        if size > 0:
+            self._fo = open(filename, 'rb+')
+            self._fo.truncate(size)
+        else:
+            self._fo = open(filename, 'wb+')
+        self._size = size
+        self.num_hdus = num_hdus
+
+    @property
+    def size(self):
+        """ The size in bytes of the file, including all complete batches written so far.
+        """
+        return self._size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write_images(self, gs_images):
+        """
+            @brief Writes a batch of galsim images as new extensions, using their headers.
+
+            @param gs_images
+                <list<galsim.Image>> The images to write, in order
+        """
+
+        self.write_arrays([(gs_image.array, get_fits_header(gs_image)) for gs_image in gs_images])
+
+    def write_arrays(self, arrays_and_headers):
+        """
+            @brief Writes a batch of arrays as new image extensions.
+
+            @param arrays_and_headers
+                <list<(np.ndarray, astropy.io.fits.Header)>> The data and header for each extension, in order
+        """
+
+        # Work out the layout for this batch
+        layout = []
+        offset = self._size
+        for array, header in arrays_and_headers:
+
+            if self.num_hdus + len(layout) == 0:
+                hdu = fits.PrimaryHDU(data=array, header=header)
+            else:
+                hdu = fits.ImageHDU(data=array, header=header)
+
+            header_bytes = hdu.header.tostring().encode("ascii")
+            data_offset = offset + len(header_bytes)
+            data_dtype = np.dtype(array.dtype).newbyteorder('>')
+
+            layout.append((offset, header_bytes, data_offset, data_dtype, array))
+            offset = data_offset + _get_padded_size(array.size * data_dtype.itemsize)
+
+        if len(layout) == 0:
+            return
+
+        # Allocate the space for the whole batch at once, which fills it with zeros
+        batch_start = self._size
+        self._fo.truncate(offset)
+        self._size = offset
+
+        for header_offset, header_bytes, _, _, _ in layout:
+            self._fo.seek(header_offset)
+            self._fo.write(header_bytes)
+        self._fo.flush()
+
+        # Copy the data into a memory map of the new region
+        batch_map = np.memmap(self._fo, dtype=np.uint8, mode='r+', offset=batch_start, shape=(offset - batch_start,))
+        for _, _, data_offset, data_dtype, array in layout:
+            start = data_offset - batch_start
+            stop = start + array.size * data_dtype.itemsize
+            batch_map[start:stop].view(data_dtype).reshape(array.shape)[...] = array
+        batch_map.flush()
+        del batch_map
+
+        self.num_hdus += len(layout)
+
+        return
+
+    def close(self):
+        """ Closes the file.
+        """
+        if not self._fo.closed:
+            self._fo.close()
@@ -5,7 +5,7 @@
     @TODO: File docstring
 """
 
-__updated__ = "2021-08-17"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -39,7 +39,54 @@ allowed_ns = np.array((1.8, 2.0, 2.56, 2.71, 3.0, 3.5, 4.0))
 
 
 def is_target_galaxy(galaxy, options):
-    return galaxy.get_param_value('apparent_mag_vis') <= options['magnitude_limit']
+    return is_target_magnitude(galaxy.get_param_value('apparent_mag_vis'), options)
+
+
+def is_target_magnitude(apparent_mag_vis, options):
+    return apparent_mag_vis <= options['magnitude_limit']
+
+
+def get_galaxy_param_arrays(phl, param_names):
+    """
+        @brief Gets the values of a set of parameters for every galaxy descended from a physical model object, through
+            a single call into the physical model rather than one per galaxy and parameter.
+
+        @param phl
+            <SHE_GST_PhysicalModel.ParamHierarchyLevel> The object whose galaxy descendants to get values for
+        @param param_names
+            <list<str>> Names of the desired parameters
+
+        @returns galaxy_rows
+            <dict<int, int>> The index of each galaxy in the arrays, keyed by its full ID
+        @returns param_arrays
+            <dict<str, np.ndarray>> An array of the values of each parameter, keyed by its name
+    """
+
+    galaxy_IDs = phl.get_galaxy_descendant_full_IDs()
+
+    values = np.empty((len(galaxy_IDs), len(param_names)), dtype=np.float64)
+    phl.fill_galaxy_descendant_param_values(list(param_names), values)
+
+    galaxy_rows = dict(zip(galaxy_IDs, range(len(galaxy_IDs))))
+    param_arrays = dict([(param_name, values[:, i]) for i, param_name in enumerate(param_names)])
+
+    return galaxy_rows, param_arrays
+
+
+def get_galaxy_descendants(phl):
+    """
+        @brief Gets every galaxy descended from a physical model object, including those stored in GalaxyBlocks, in
+            the order of the rows of the arrays from get_galaxy_param_arrays.
+
+        @param phl
+            <SHE_GST_PhysicalModel.ParamHierarchyLevel> The object whose galaxy descendants to get
+
+        @returns galaxies
+            <list> The Galaxy objects, followed by a CompactGalaxy handle to each galaxy stored in a block. Both
+            have get_local_ID, get_full_ID, and get_ID_seq methods
+    """
+
+    return list(phl.get_galaxy_descendants()) + list(phl.get_compact_galaxy_descendants())
 
 
 def rotate(x, y, theta_deg):
@@ -149,3 +196,54 @@ def get_disk_galaxy_profile(half_light_radius,
                                     beta=beta_deg_shear * galsim.degrees)
 
     return final_prof
+
+
+def get_target_galaxy_components(bulge_gal_profile,
+                                 disk_gal_profile,
+                                 bulge_psf_profile,
+                                 disk_psf_profile,
+                                 pixel_scale,
+                                 draw_method='auto',
+                                 gsparams=galsim.GSParams()):
+    """
+        @brief Convolves the bulge and disk of a target galaxy with their PSFs and pixel responses, giving the
+            components to draw onto an image with unit pixels.
+
+        @details The bulge gets its pixel response when drawn, and the disk from a pixel of size pixel_scale which
+            it's convolved with here. When both share a PSF and the bulge would be drawn by FFT, each is convolved
+            with its pixel response and they're summed before being convolved with the PSF, so there's only one
+            convolution to draw. The result is the same as drawing them separately, to within the accuracy of the
+            FFT. For other draw methods, the components are drawn separately.
+
+        @param bulge_gal_profile
+            <galsim.GSObject> Bulge profile in image co-ordinates
+        @param disk_gal_profile
+            <galsim.GSObject> Disk profile in image co-ordinates
+        @param bulge_psf_profile
+            <galsim.GSObject> PSF of the bulge
+        @param disk_psf_profile
+            <galsim.GSObject> PSF of the disk, which is compared with bulge_psf_profile by identity
+        @param pixel_scale
+            <float> Size of the pixel the disk is convolved with
+        @param draw_method
+            <str> The method the bulge would be drawn with if drawn separately
+        @param gsparams
+            <galsim.GSParams> GSParams for the convolutions
+
+        @returns components
+            <list<(galsim.GSObject, str)>> Each profile to draw, and the method to draw it with
+    """
+
+    if (disk_psf_profile is bulge_psf_profile) and (draw_method in ('auto', 'fft')):
+
+        bulge_and_disk_profile = galsim.Add([galsim.Convolve([bulge_gal_profile, galsim.Pixel(scale=1.0)]),
+                                             galsim.Convolve([disk_gal_profile, galsim.Pixel(scale=pixel_scale)])])
+
+        return [(galsim.Convolve([bulge_and_disk_profile, bulge_psf_profile], gsparams=gsparams), 'no_pixel')]
+
+    final_bulge = galsim.Convolve([bulge_gal_profile, bulge_psf_profile],
+                                  gsparams=gsparams)
+    final_disk = galsim.Convolve([disk_gal_profile, disk_psf_profile, galsim.Pixel(scale=pixel_scale)],
+                                 gsparams=gsparams)
+
+    return [(final_bulge, draw_method), (final_disk, 'no_pixel')]
@@ -7,7 +7,7 @@
     generating images.
 """
 
-__updated__ = "2021-08-17"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -24,13 +24,13 @@ __updated__ = "2021-08-17"
 
 
 import os
-from multiprocessing import Pool, cpu_count
+from collections import deque
+from multiprocessing import current_process, get_context
 
 import galsim
 import h5py
 import numpy as np
 from astropy import table
-from astropy.io import fits
 from astropy.io.fits import table_to_hdu
 
 import SHE_GST
@@ -48,17 +48,31 @@ from SHE_PPT.table_formats.she_simulated_catalog import tf as datf
 from . import magic_values as mv
 from .combine_dithers import (combine_image_dithers,
                               combine_segmentation_dithers, )
+from .checkpoint import CheckpointManifest
 from .config.check_config import get_full_options
 from .cutouts import make_cutout_image
 from .dither_schemes import get_dither_scheme
+from .fidelity_tiers import RENDER_TIER_COLNAME, get_fidelity_tier_indices, get_fidelity_tiers
+from .fits_writer import MultiExtensionFitsWriter
 from .galaxy import (get_bulge_galaxy_profile,
                      get_disk_galaxy_profile,
-                     is_target_galaxy, )
+                     get_galaxy_descendants, get_galaxy_param_arrays, get_target_galaxy_components,
+                     is_target_magnitude, )
 from .magnitude_conversions import get_I
 from .noise import add_stable_noise, get_var_ADU_per_pixel
-from .psf import (add_psf_to_archive, get_psf_profile, single_psf_filename, sort_psfs_from_archive)
+from .output_cache import OutputCache, get_product_options
+from .psf import (add_psf_archive_entries, add_psf_to_archive, allowed_ns, allowed_zs, get_psf_archive_entries,
+                  get_psf_profile, prune_psf_archive, single_psf_filename, sort_psfs_from_archive, )
+from .psf_cache import set_psf_cache
 from .segmentation_map import make_segmentation_map
 from .signal_to_noise import get_signal_to_noise_estimate
+from .snapshot import get_snapshot_filename, load_snapshot, save_snapshot
+from .stamp_sizes import FFT_SIZE_COLNAME, STAMP_SIZE_COLNAME, StampSizePlanner
+from .tiled_rendering import Stamp, draw_stamps
+from .utility.processes import consume_in_thread, get_num_processes
+from .utility.random import (RNG_STREAM_NOISE, RNG_STREAM_PHOTONS, RNG_STREAM_STAMP_PLACEMENT, get_rng,
+                             get_stream_seed, )
+from .utility.table_builder import TableBuilder
 from .wcs import get_wcs_from_image_phl
 
 model_hash_maxlen = 17  # Maximum possible length within filenames
@@ -69,62 +83,255 @@ default_gsparams = galsim.GSParams(folding_threshold = 5e-3,
                                    stepk_minimum_hlr = 5,
                                    )
 
+# Parameters of each galaxy used while printing it, which are retrieved for all galaxies at once
+galaxy_param_names = ('apparent_mag_vis',
+                      'exp_time',
+                      'sersic_index',
+                      'redshift',
+                      'xp',
+                      'yp',
+                      'rotation',
+                      'spin',
+                      'tilt',
+                      'shear_magnitude',
+                      'shear_angle',
+                      'bulge_ellipticity',
+                      'bulge_axis_ratio',
+                      'bulge_fraction',
+                      'apparent_size_bulge',
+                      'bulge_truncation_factor',
+                      'apparent_size_disk',
+                      'disk_height_ratio',
+                      'disk_truncation_factor',)
+
+
+def iterate_child_phls(parent_phl, add_child, child_indices):
+    """
+        @brief Creates children of a physical model object just in time, yielding each and releasing it before the
+            next is created.
+
+        @details Each child gets the same ID and seed it would have if all the children were created at once, so its
+            parameters are generated the same way, but only one child and its descendants are held in memory at a
+            time. Children whose indices aren't in child_indices are skipped without being created. Any children
+            the parent already has are cleared first.
+
+        @param parent_phl
+            <SHE_GST_PhysicalModel.ParamHierarchyLevel> The object to create children of
+        @param add_child
+            <function> Method which adds a single child to parent_phl and returns it, eg. ImageGroup.add_image
+        @param child_indices
+            <iterable<int>> Indices of the children to create, in increasing order
+
+        @returns children
+            <generator<(int, SHE_GST_PhysicalModel.ParamHierarchyLevel)>> The index of each child and the child,
+            which is released when the next is requested and so mustn't be used after that
+    """
+
+    parent_phl.clear_children()
+
+    next_child_i = 0
+    for child_i in child_indices:
+        parent_phl.skip_children(child_i - next_child_i)
+        child_phl = add_child(parent_phl)
+
+        yield child_i, child_phl
+
+        parent_phl.release_children()
+        next_child_i = child_i + 1
+
+    return
+
+
+def get_child_phl(parent_phl, add_child, child_i):
+    """
+        @brief Creates a single child of a physical model object, with the same ID and seed it would have if all the
+            children before it were created too. Any children the parent already has are cleared first.
+
+        @param parent_phl
+            <SHE_GST_PhysicalModel.ParamHierarchyLevel> The object to create a child of
+        @param add_child
+            <function> Method which adds a single child to parent_phl and returns it, eg. ImageGroup.add_image
+        @param child_i
+            <int> Index of the child to create
+
+        @returns child_phl
+            <SHE_GST_PhysicalModel.ParamHierarchyLevel>
+    """
+
+    parent_phl.clear_children()
+    parent_phl.skip_children(child_i)
+
+    return add_child(parent_phl)
+
+
+# Survey object shared with forked worker processes. It's set up by generate_images before the pool is created, so
+# that each worker inherits the survey's configuration without it needing to be pickled.
+_worker_survey = None
+
+
+class ImageGroupWorkUnit(object):
+    """
+        @brief Picklable description of the work needed to generate a single image group.
 
-class generate_image_group_with_options_caller(object):
+        @details Physical model objects can't be pickled, so rather than passing an ImageGroup to a worker, we pass
+            the index of the image group and the seed of the survey. The worker then rebuilds this image group from
+            the survey's configuration and this seed, so the image group it generates is identical to the one which
+            would be generated in a serial run.
+    """
+
+    def __init__(self, image_group_index, seed, options, write_run_products = True):
+        self.image_group_index = image_group_index
+        self.seed = seed
+        self.options = options
+        self.write_run_products = write_run_products
+
+    def rebuild_image_group(self, survey):
+        """
+            @brief Resets the survey to its freshly-seeded state and returns the image group for this work unit.
+
+            @details Only this image group is created. The IDs of those before it are skipped, so it has the same ID
+                and seed it would have if the survey's image groups were all filled.
+
+            @param survey
+                <SHE_GST_PhysicalModel.Survey> The survey object which specifies parameters for generation
 
-    def __init__(self, *args, **kwargs):
-        self.args = args
-        self.kwargs = kwargs
+            @returns image_group
+                <SHE_GST_PhysicalModel.ImageGroup>
+        """
 
-    def __call__(self, x):
-        return generate_image_group(x, *self.args, **self.kwargs)
+        survey.clear()
+        survey.set_seed(self.seed)
+
+        # Get the number of image groups first, as fill_image_groups would, so any survey-level parameters are
+        # generated in the same order
+        num_image_groups = survey.get_num_image_groups()
+        if not 0 <= self.image_group_index < num_image_groups:
+            raise IndexError("Image group index " + str(self.image_group_index) + " is out of range for a survey " +
+                             "with " + str(num_image_groups) + " image groups.")
+
+        return get_child_phl(survey, SHE_GST_PhysicalModel.Survey.add_image_group, self.image_group_index)
+
+    def __call__(self, survey = None):
+        if survey is None:
+            survey = _worker_survey
+        return generate_image_group(self.rebuild_image_group(survey), self.options,
+                                    write_run_products = self.write_run_products)
+
+
+def _run_work_unit(work_unit):
+    """
+        @brief Module-level entry point for pool workers, which calls the work unit with the inherited survey.
+    """
+    return work_unit()
+
+
+def _warm_up_psf_caches(options):
+    """
+        @brief Loads the PSF models which may be needed while printing galaxies into their caches, so that forked
+            worker processes share them rather than each loading them separately.
+
+        @details The calls here must match those made in print_galaxies, so that the same cache entries are hit.
+
+        @param options
+            <dict> The options dictionary for this run
+    """
+
+    logger = getLogger(__name__)
+    logger.debug("Entering _warm_up_psf_caches method.")
+
+    if options['details_only']:
+        return
+
+    model_psf_offset = (options["model_psf_x_offset"], options["model_psf_y_offset"])
+
+    if options['model_psf_file_name'] is not None:
+        ns_zs = ((1, 0),)
+    elif not options['euclid_psf']:
+        # Only the background PSF will be used, which depends on the pixel scale, so we leave it to be loaded
+        # as needed
+        return
+    elif options['single_psf']:
+        ns_zs = ((1, 0),)
+    else:
+        ns_zs = [(n, z) for n in allowed_ns for z in allowed_zs]
+
+    for gal_n, gal_z in ns_zs:
+        for bulge in (True, False):
+            get_psf_profile(n = gal_n,
+                            z = gal_z,
+                            bulge = bulge,
+                            use_background_psf = False,
+                            data_dir = options['data_dir'],
+                            model_psf_file_name = options['model_psf_file_name'],
+                            model_psf_scale = options['model_psf_scale'] * 36000,  # Needs to be in units of pixels
+                            model_psf_offset = model_psf_offset,
+                            gsparams = default_gsparams,
+                            workdir = options['workdir'])
+
+    logger.debug("Exiting _warm_up_psf_caches method.")
+
+    return
 
 
 def generate_images(survey, options):
     """
         @brief This function handles assigning specific images to be created by different parallel
-            threads.
+            processes.
 
         @details If successful, generates images and corresponding details according to
-            the configuration stored in the survey and options objects.
+            the configuration stored in the survey and options objects. When more than one process is requested,
+            each image group is generated in a forked worker process, which rebuilds it from the survey's
+            configuration and seed, so the output is identical to that of a serial run.
 
         @param survey
             <SHE_GST_PhysicalModel.Survey> The survey object which specifies parameters for generation
         @param options
             <dict> The options dictionary for this run
     """
+    global _worker_survey
+
     logger = getLogger(__name__)
     logger.debug("Entering generate_images method.")
 
+    # Set up the on-disk PSF cache before any PSFs are loaded, so forked workers inherit it
+    set_psf_cache(options['psf_cache_dir'], options['psf_cache_max_size_mb'])
+
     # Seed the survey
     if options['seed'] == 0:
         survey.set_seed()  # Seed from the time
     else:
         survey.set_seed(options['seed'])
 
-    # Create empty image objects for the survey
-    survey.fill_image_groups()
-    image_groups = survey.get_image_groups()
+    # Image groups are created as they're generated, so we only need to know how many there will be
+    num_image_groups = survey.get_num_image_groups()
 
-    # Multiprocessing doesn't currently work, so print a warning if it's requested
+    # Set up a work unit for each image group. Only the last one writes the run-level listfiles and products, since
+    # each would otherwise overwrite those of the ones before it
+    work_units = [ImageGroupWorkUnit(image_group_index = i,
+                                     seed = survey.get_seed(),
+                                     options = options,
+                                     write_run_products = (i == num_image_groups - 1))
+                  for i in range(num_image_groups)]
 
-    if options['num_parallel_threads'] != 1:
-        logger.warning("Multi-processing is not currently functional; it requires features that " +
-                       "will be available in Python 3. Until then, if you wish to use multiple " +
-                       "processes, please call this program multiple times with different seed " +
-                       "values. Continuing with a single process...")
-        options['num_parallel_threads'] = 1
+    num_parallel_threads = get_num_processes(options['num_parallel_threads'], num_image_groups, "image groups")
 
-    # If we just have one thread, we'll just use a simply function call to ease debugging
-    if options['num_parallel_threads'] == 1:
-        for image_group in image_groups:
-            generate_image_group(image_group, options)
+    # If we just have one process, we'll just use a simple function call to ease debugging
+    if num_parallel_threads == 1:
+        for work_unit in work_units:
+            work_unit(survey)
     else:
-        if options['num_parallel_threads'] <= 0:
-            options['num_parallel_threads'] += cpu_count()
+        logger.info("Generating " + str(num_image_groups) + " image groups with " + str(num_parallel_threads) +
+                    " processes.")
+
+        # Load PSF models before forking, so they're shared by all workers
+        _warm_up_psf_caches(options)
 
-        pool = Pool(processes = cpu_count(), maxtasksperchild = 1)
-        pool.map(generate_image_group_with_options_caller(options), image_group, chunksize = 1)
+        _worker_survey = survey
+        try:
+            with get_context("fork").Pool(processes = num_parallel_threads, maxtasksperchild = 1) as pool:
+                pool.map(_run_work_unit, work_units, chunksize = 1)
+        finally:
+            _worker_survey = None
 
     logger.debug("Exiting generate_images method.")
 
@@ -143,14 +350,23 @@ class ProductFilenames(object):
 
         return
 
+    def to_dict(self):
+        return dict(vars(self))
 
-def generate_image_group(image_group_phl, options):
+    def update_from_dict(self, filenames_dict):
+        for key in filenames_dict:
+            setattr(self, key, list(filenames_dict[key]))
+
+
+def generate_image_group(image_group_phl, options, write_run_products = True):
     """
     Generate a FOV and save it in a multi-extension FITS file.
 
     Args:
         image_group_phl: <SHE_GST_PhysicalModel.ImageGroup> Physical model for the image_phl group
         options: <dict> Options dictionary
+        write_run_products: <bool> Whether to write the listfiles, table products, and stacked images which are
+                            shared by all image groups in the run
 
     Returns:
         None
@@ -158,10 +374,9 @@ def generate_image_group(image_group_phl, options):
 
     workdir = options['workdir']
 
-    image_group_phl.fill_images()
-
-    # Get the model hash so we can set up filenames
-    full_options = get_full_options(options, image_group_phl.get_image_descendants()[0])
+    # Images are created as they're generated, so that only one is held in memory at a time
+    image_group_phl.clear_children()
+    num_images = image_group_phl.get_num_images()
 
     num_dithers = len(get_dither_scheme(options['dithering_scheme']))
 
@@ -171,25 +386,67 @@ def generate_image_group(image_group_phl, options):
     mosaic_filenames = ProductFilenames()
     psf_filenames = ProductFilenames()
 
+    # Get the model hash so we can set up filenames
     full_options = get_full_options(options, image_group_phl)
     model_hash = hash_any(full_options, format = "base64")
     model_hash_fn = model_hash[0:model_hash_maxlen].replace('.', '-').replace('+', '-')
+    product_filenames = {"image"     : image_filenames,
+                         "detections": detections_filenames,
+                         "details"   : details_filenames,
+                         "mosaic"    : mosaic_filenames,
+                         "psf"       : psf_filenames, }
+
+    # If an identical image group has already been generated and cached, use its output instead of generating it again
+    if options['cache_dir'] is None or options['cache_dir'] == 'None':
+        output_cache = None
+    else:
+        output_cache = OutputCache(options['cache_dir'], model_hash, model_hash_fn, image_group_phl.get_seed(),
+                                   SHE_GST.__version__, get_product_options(options))
+        cached_product_filenames = output_cache.retrieve(workdir)
+        if cached_product_filenames is not None:
+            for key in product_filenames:
+                product_filenames[key].update_from_dict(cached_product_filenames[key])
+            if write_run_products:
+                write_image_group_run_products(options, num_dithers, image_filenames, detections_filenames,
+                                               details_filenames, mosaic_filenames, psf_filenames)
+            return
+
     psf_archive_filename = get_allowed_filename("PSF-ARCHIVE", model_hash_fn, extension = ".hdf5",
-                                                version = SHE_GST.__version__)
+                                                version = SHE_GST.__version__, timestamp = False)
 
     qualified_psf_archive_filename = os.path.join(workdir, psf_archive_filename)
 
     # Ensure the path exists for this file
     os.makedirs(os.path.split(qualified_psf_archive_filename)[0], exist_ok = True)
 
+    # Set up the checkpoint manifest for this image group. If we're resuming and it matches this model, detectors it
+    # records as complete will be kept; otherwise, clean up anything left over from an interrupted run
+    checkpoint_filename = get_allowed_filename("GST-CHECKPOINT", model_hash_fn, extension = ".json",
+                                               version = SHE_GST.__version__, timestamp = False)
+    checkpoint = CheckpointManifest(checkpoint_filename, model_hash, image_group_phl.get_seed(), SHE_GST.__version__,
+                                    workdir = workdir)
+    if options['details_only']:
+        num_image_files = 0
+    else:
+        num_image_files = 4 * num_dithers
+    resuming = options['resume'] and checkpoint.load() and len(checkpoint.writer_states) == num_image_files
+    if not resuming:
+        checkpoint.clear()
+        if os.path.exists(qualified_psf_archive_filename):
+            os.remove(qualified_psf_archive_filename)
+
     if ((options['output_psf_file_name'] is None or options['output_psf_file_name'] == 'None') and
             (options['model_psf_file_name'] is None or options['model_psf_file_name'] == 'None') and
             not options['single_psf']):
         psf_archive_filehandle = h5py.File(qualified_psf_archive_filename, 'a')
+
+        # Remove any PSFs from detectors which weren't completed
+        prune_psf_archive(psf_archive_filehandle, checkpoint.completed_image_IDs)
     else:
         psf_archive_filehandle = None
 
     # Get the filenames we'll need
+    checkpointed_filenames = set([filename for filename, _, _ in checkpoint.writer_states])
     for i in range(num_dithers):
         for filename_list, tag in ((image_filenames, SCI_TAG),
                                    (detections_filenames, DETECTIONS_TAG),
@@ -217,11 +474,20 @@ def generate_image_group(image_group_phl, options):
                                                 version = SHE_GST.__version__)
                 subfilename_list.append(filename)
 
-                # If it exists already, delete it
+                # If it exists already, delete it, unless it's an image file we're resuming writing to
                 qualified_filename = os.path.join(options['workdir'], filename)
-                if os.path.exists(qualified_filename):
+                if os.path.exists(qualified_filename) and filename not in checkpointed_filenames:
                     os.remove(qualified_filename)
 
+    # When resuming, continue writing to the image files recorded in the checkpoint
+    if resuming:
+        for i in range(num_dithers):
+            (image_filenames.data_filenames[i],
+             image_filenames.bkg_filenames[i],
+             image_filenames.wgt_filenames[i],
+             mosaic_filenames.data_filenames[i]) = [filename for filename, _, _ in
+                                                    checkpoint.writer_states[4 * i:4 * (i + 1)]]
+
     # Set up XML products we're outputting
     for i in range(num_dithers):
 
@@ -259,83 +525,106 @@ def generate_image_group(image_group_phl, options):
     # Set up combined tables
     details_tables = []
     detections_tables = []
-    psf_tables = []
+    psf_table_builders = []
     for i in range(num_dithers):
-        psf_tables.append([])
+        psf_table_builders.append(TableBuilder(pstf.init_table()))
 
-    image_i = -1
-
-    # Generate each image_phl, then append it and its data to the fits files
-    for image_phl in image_group_phl.get_image_descendants():
+    # Open a writer for each of the image files we'll output, which is kept open while all detectors are written.
+    # If resuming, each file is truncated back to how it was after the last completed detector
+    image_writers = []
+    if not options['details_only']:
+        for i in range(num_dithers):
+            image_writers.append([])
+            for j, filename in enumerate((image_filenames.data_filenames[i],
+                                          image_filenames.bkg_filenames[i],
+                                          image_filenames.wgt_filenames[i],
+                                          mosaic_filenames.data_filenames[i])):
+                if resuming:
+                    _, size, num_hdus = checkpoint.writer_states[4 * i + j]
+                else:
+                    size, num_hdus = 0, 0
+                image_writers[i].append(MultiExtensionFitsWriter(os.path.join(workdir, filename),
+                                                                 size = size,
+                                                                 num_hdus = num_hdus))
 
-        image_i += 1
-        wcs_list = []
+    def add_psf_tables(details_table):
+        """ Sets up the PSF table for each dither of a detector.
+        """
 
+        num_rows = len(details_table[datf.ID])
         for i in range(num_dithers):
-            wcs_list.append(get_wcs_from_image_phl(image_phl,
-                                                   dither_offset = get_dither_scheme(options['dithering_scheme'])[i]))
+            psf_table_builders[i].add_rows({pstf.ID         : details_table[datf.ID],
+                                            pstf.template   : -1,
+                                            pstf.bulge_index: -1,
+                                            pstf.disk_index : -1},
+                                           num_rows = num_rows)
+
+    # Start from the tables of any detectors which were completed before the run was interrupted
+    completed_detections_tables, completed_details_tables = checkpoint.read_tables()
+    for detections_table, details_table in zip(completed_detections_tables, completed_details_tables):
+        if not options['details_only']:
+            add_psf_tables(details_table)
+        details_tables.append(details_table)
+        detections_tables.append(detections_table)
+
+    def write_detector(indexed_detector_results):
+        """ Appends a detector's images to the fits files, stores its tables for combining, and records it as
+            complete in the checkpoint manifest.
+        """
+
+        image_i, image_ID, detector_results = indexed_detector_results
 
-        # Generate the data
         (image_dithers, noise_maps, mask_maps, wgt_maps, bkg_maps, segmentation_maps,
-         detections_table, details_table) = generate_image(image_phl, options, wcs_list, psf_archive_filehandle)
+         detections_table, details_table) = detector_results
 
         # Append to the fits file for each dither
         if not options['details_only']:
             for i in range(num_dithers):
 
-                workdir = options['workdir']
+                image_writer, bkg_writer, wgt_writer, seg_writer = image_writers[i]
 
-                qualified_image_filename = os.path.join(workdir, image_filenames.data_filenames[i])
-
-                # Science image
-                im_hdu = fits.ImageHDU(data = image_dithers[i].array,
-                                       header = fits.header.Header(list(image_dithers[i].header.items())))
-                append_hdu(qualified_image_filename, im_hdu)
-
-                # Noise map
-                rms_hdu = fits.ImageHDU(data = noise_maps[i].array,
-                                        header = fits.header.Header(list(noise_maps[i].header.items())))
-                append_hdu(qualified_image_filename, rms_hdu)
-
-                # Mask map
-                flg_hdu = fits.ImageHDU(data = mask_maps[i].array,
-                                        header = fits.header.Header(list(mask_maps[i].header.items())))
-                append_hdu(qualified_image_filename, flg_hdu)
+                # Science image, noise map, and mask map
+                image_writer.write_images([image_dithers[i], noise_maps[i], mask_maps[i]])
 
                 # Background map
-                bkg_hdu = fits.ImageHDU(data = bkg_maps[i].array,
-                                        header = fits.header.Header(list(bkg_maps[i].header.items())))
-                append_hdu(os.path.join(workdir, image_filenames.bkg_filenames[i]), bkg_hdu)
+                bkg_writer.write_images([bkg_maps[i]])
 
                 # Weight map
-                wgt_hdu = fits.ImageHDU(data = wgt_maps[i].array,
-                                        header = fits.header.Header(list(wgt_maps[i].header.items())))
-                append_hdu(os.path.join(workdir, image_filenames.wgt_filenames[i]), wgt_hdu)
+                wgt_writer.write_images([wgt_maps[i]])
 
                 # Segmentation map
+                seg_writer.write_images([segmentation_maps[i]])
 
-                seg_hdu = fits.ImageHDU(data = segmentation_maps[i].array,
-                                        header = fits.header.Header(list(segmentation_maps[i].header.items())))
-                append_hdu(os.path.join(workdir, mosaic_filenames.data_filenames[i]), seg_hdu)
-
-                # PSF catalogue and images
-
-                num_rows = len(details_table[datf.ID])
-                psf_table = pstf.init_table()
-                for j in range(num_rows):
-                    psf_table.add_row({pstf.ID         : details_table[datf.ID][j],
-                                       pstf.template   : -1,
-                                       pstf.bulge_index: -1,
-                                       pstf.disk_index : -1})
-
-                psf_tables[i].append(psf_table)
+            # PSF catalogue and images
+            add_psf_tables(details_table)
 
         # Tables to combine
 
         details_tables.append(details_table)
         detections_tables.append(detections_table)
 
-    # end for image_phl in image_group_phl.get_image_descendants():
+        # Make sure this detector's PSFs are on disk before recording it as complete
+        if psf_archive_filehandle is not None:
+            psf_archive_filehandle.flush()
+
+        checkpoint.record_detector(image_i, image_ID, detections_table, details_table,
+                                   [writer for writers in image_writers for writer in writers])
+
+    try:
+
+        # Generate each image_phl, then append it and its data to the fits files. Detectors are yielded in their
+        # original order even if they're generated in parallel, and may be written in a separate thread while the
+        # next ones are generated, with at most options['pipeline_queue_depth'] waiting to be written
+        consume_in_thread(generate_detectors(image_group_phl, options, psf_archive_filehandle,
+                                             num_images = num_images,
+                                             skip_image_indices = checkpoint.completed_image_indices),
+                          write_detector,
+                          get_pipeline_queue_depth(options))
+
+    finally:
+        for writers in image_writers:
+            for writer in writers:
+                writer.close()
 
     # Output combined tables
 
@@ -351,12 +640,8 @@ def generate_image_group(image_group_phl, options):
 
     # Output data products for tables
 
-    details_prod = products.she_simulated_catalog.create_simulated_catalog_product(details_filenames.data_filenames[0])
-    write_xml_product(details_prod, options['details_table'], workdir = workdir)
-
     detections_prod = products.mer_final_catalog.create_detections_product(detections_filenames.data_filenames[0])
     write_xml_product(detections_prod, detections_filenames.prod_filenames[0], workdir = workdir)
-    write_listfile(os.path.join(workdir, options['detections_tables']), [detections_filenames.prod_filenames[0]])
 
     if not options['details_only']:
 
@@ -364,8 +649,7 @@ def generate_image_group(image_group_phl, options):
 
         for i in range(num_dithers):
 
-            combined_psf_tables.append(table.vstack(psf_tables[i],
-                                                    metadata_conflicts = "silent"))
+            combined_psf_tables.append(psf_table_builders[i].to_table())
 
             if options['output_psf_file_name'] is None or options['output_psf_file_name'] == 'None':
                 if options['model_psf_file_name'] is not None and options['model_psf_file_name'] != 'None':
@@ -384,103 +668,296 @@ def generate_image_group(image_group_phl, options):
                                    exposure_index = i,
                                    stamp_size = options['psf_stamp_size'],
                                    scale = image_group_phl.get_param_value("pixel_scale") / options['psf_scale_factor'],
-                                   workdir = workdir)
-
-        # Output listfiles of filenames
-        write_listfile(os.path.join(options['workdir'], options['data_images']), image_filenames.prod_filenames)
-        write_listfile(os.path.join(options['workdir'],
-                                    options['segmentation_images']), mosaic_filenames.prod_filenames)
-        write_listfile(os.path.join(options['workdir'],
-                                    options['psf_images_and_tables']), psf_filenames.prod_filenames)
-
-        # If we're dithering, create stacks
-        if num_dithers > 1:
+                                   workdir = workdir,
+                                   layout = options['psf_output_layout'])
 
-            combine_image_dithers(options['data_images'],
-                                  options['stacked_data_image'],
-                                  options['dithering_scheme'],
-                                  workdir = options['workdir'])
+    if write_run_products:
+        write_image_group_run_products(options, num_dithers, image_filenames, detections_filenames,
+                                       details_filenames, mosaic_filenames, psf_filenames)
 
-            combine_segmentation_dithers(options['segmentation_images'],
-                                         options['stacked_segmentation_image'],
-                                         options['dithering_scheme'],
-                                         workdir = options['workdir'])
-
-    # Remove the now-unneeded PSF archive file
+    # Remove the now-unneeded PSF archive file and checkpoint
     del psf_archive_filehandle
     if os.path.exists(os.path.join(workdir, psf_archive_filename)):
         os.remove(os.path.join(workdir, psf_archive_filename))
+    checkpoint.clear()
+
+    # Store the complete output, so that it can be reused by any later run of the same image group
+    if output_cache is not None:
+        output_cache.store(dict([(key, product_filenames[key].to_dict()) for key in product_filenames]), workdir)
 
     return
 
 
-def print_galaxies(image_phl,
-                   options,
-                   wcs_list,
-                   centre_offset,
-                   num_dithers,
-                   dithers,
-                   full_x_size,
-                   full_y_size,
-                   pixel_scale,
-                   detections_table,
-                   details_table,
-                   psf_archive_filehandle):
+def get_pipeline_queue_depth(options):
     """
-        @brief Prints galaxies onto a new image and stores details on them in the output table.
+        @brief Gets the number of generated detectors which may wait to be written in a separate thread.
+
+        @details Detectors and tiles are generated in forked processes when num_parallel_detectors or
+            num_parallel_tiles isn't 1. A process forked while the writer thread holds a lock (such as h5py's global
+            lock or a logging handler's lock) inherits the lock in its held state and deadlocks when it tries to
+            take it, so detectors are written in the main thread whenever new processes may be forked while
+            writing. Worker processes can't fork their own pools, so this doesn't apply within them.
+
+        @param options
+            <dict> The options dictionary for this run
+
+        @returns queue_depth
+            <int> Maximum number of detectors waiting to be written, or 0 to write each in the main thread
+    """
+
+    queue_depth = options['pipeline_queue_depth']
+
+    if (queue_depth > 0 and not current_process().daemon and
+            (options['num_parallel_detectors'] != 1 or options['num_parallel_tiles'] != 1)):
+        getLogger(__name__).info("Writing detectors in the main thread, since they're generated with process pools.")
+        queue_depth = 0
+
+    return queue_depth
+
+
+def write_image_group_run_products(options, num_dithers, image_filenames, detections_filenames, details_filenames,
+                                   mosaic_filenames, psf_filenames):
+    """
+        @brief Writes the listfiles, table products, and stacked images which are shared by all image groups in the
+            run, pointing to the products of an image group.
+
+        @param options
+            <dict> The options dictionary for this run
+        @param num_dithers
+            <int> Number of dithers of each image
+        @param image_filenames, detections_filenames, details_filenames, mosaic_filenames, psf_filenames
+            <ProductFilenames> Filenames of each of the image group's products
+    """
+
+    workdir = options['workdir']
+
+    details_prod = products.she_simulated_catalog.create_simulated_catalog_product(
+        details_filenames.data_filenames[0])
+    write_xml_product(details_prod, options['details_table'], workdir = workdir)
+
+    write_listfile(os.path.join(workdir, options['detections_tables']), [detections_filenames.prod_filenames[0]])
+
+    if options['details_only']:
+        return
+
+    # Output listfiles of filenames, and create stacks if we're dithering
+    write_listfile(os.path.join(workdir, options['data_images']), image_filenames.prod_filenames)
+    write_listfile(os.path.join(workdir, options['segmentation_images']), mosaic_filenames.prod_filenames)
+    write_listfile(os.path.join(workdir, options['psf_images_and_tables']), psf_filenames.prod_filenames)
+
+    # If we're dithering, create stacks
+    if num_dithers > 1:
+
+        combine_image_dithers(options['data_images'],
+                              options['stacked_data_image'],
+                              options['dithering_scheme'],
+                              workdir = workdir)
+
+        combine_segmentation_dithers(options['segmentation_images'],
+                                     options['stacked_segmentation_image'],
+                                     options['dithering_scheme'],
+                                     workdir = workdir)
+
+    return
+
+
+# Image group and options shared with forked detector worker processes, set up by generate_detectors
+_worker_image_group = None
+_worker_options = None
+_worker_uses_psf_archive = False
+
+
+def get_wcs_list(image_phl, options):
+    """
+        @brief Gets the WCS for each dither of an image.
 
         @param image_phl
-            <SHE_GST_PhysicalModel.Image> Image-level object which will generate galaxies to print
+            <SHE_GST_PhysicalModel.Image> The Image-level object for this detector
+        @param options
+            <dict> The options dictionary for this run
+
+        @returns wcs_list
+            <list<galsim.BaseWCS>>
+    """
+
+    wcs_list = []
+    for dither_offset in get_dither_scheme(options['dithering_scheme']):
+        wcs_list.append(get_wcs_from_image_phl(image_phl, dither_offset = dither_offset))
+
+    return wcs_list
+
+
+def _generate_detector_in_worker(image_i):
+    """
+        @brief Generates a single detector in a forked worker process.
+
+        @details PSFs are written to an in-memory archive, and returned along with the generated data so that the
+            parent process can copy them into the real archive.
+
+        @param image_i
+            <int> Index of the detector within the image group
+
+        @returns image_ID
+            <int> Full ID of the detector's Image-level object
+        @returns detector_results
+            <tuple> The tuple returned by generate_image
+        @returns psf_entries
+            <(dict, list)> The PSF images and references added to the archive, as returned by
+            get_psf_archive_entries
+    """
+
+    options = _worker_options
+    image_phl = get_child_phl(_worker_image_group, SHE_GST_PhysicalModel.ImageGroup.add_image, image_i)
+    image_ID = image_phl.get_full_ID()
+
+    if _worker_uses_psf_archive:
+        # The name includes the process ID, so it can't clash with an in-memory file inherited from the parent
+        psf_archive_filehandle = h5py.File("PSF-ARCHIVE-WORKER-" + str(os.getpid()) + "-" + str(image_i), 'w',
+                                           driver = 'core', backing_store = False)
+    else:
+        psf_archive_filehandle = None
+
+    detector_results = generate_image(image_phl, options, get_wcs_list(image_phl, options), psf_archive_filehandle)
+
+    psf_entries = None
+    if psf_archive_filehandle is not None:
+        psf_entries = get_psf_archive_entries(psf_archive_filehandle)
+        psf_archive_filehandle.close()
+
+    return image_ID, detector_results, psf_entries
+
+
+def generate_detectors(image_group_phl, options, psf_archive_filehandle, num_images = None, skip_image_indices = ()):
+    """
+        @brief Generates each detector of an image group, yielding the results in the order of the group's images.
+
+        @details If options['num_parallel_detectors'] is greater than one, detectors are generated concurrently in
+            forked worker processes. Each worker inherits the image group as it was before any detector was generated,
+            so any image-group-level parameters are drawn in the same order and from the same RNG state as they are
+            for the first detector of a serial run, and the results are the same either way. For the same reason,
+            skipping detectors which have already been written doesn't change the results for the rest.
+
+            Each detector's Image-level object is created just before it's generated and released once it's done,
+            so only one detector's galaxies are held in memory at a time in each process.
+
+        @param image_group_phl
+            <SHE_GST_PhysicalModel.ImageGroup> Physical model for the image group. Any images it already has are
+            cleared
+        @param options
+            <dict> The options dictionary for this run
+        @param psf_archive_filehandle
+            <h5py.File> Archive which PSFs are saved to, or None if they aren't being archived
+        @param num_images
+            <int> Number of images in the group, or None to get it from image_group_phl
+        @param skip_image_indices
+            <set<int>> Indices of images within the group which shouldn't be generated
+
+        @returns detector_results
+            <generator<(int, int, tuple)>> The index of each detector, the full ID of its Image-level object, and the
+            tuple returned by generate_image for it
+    """
+    global _worker_image_group, _worker_options, _worker_uses_psf_archive
+
+    logger = getLogger(__name__)
+
+    if num_images is None:
+        num_images = image_group_phl.get_num_images()
+    image_indices = [image_i for image_i in range(num_images) if image_i not in skip_image_indices]
+    num_images_to_generate = len(image_indices)
+
+    num_parallel_detectors = get_num_processes(options['num_parallel_detectors'], num_images_to_generate,
+                                               "detectors")
+
+    if num_parallel_detectors == 1:
+        for image_i, image_phl in iterate_child_phls(image_group_phl, SHE_GST_PhysicalModel.ImageGroup.add_image,
+                                                     image_indices):
+            image_ID = image_phl.get_full_ID()
+            yield image_i, image_ID, generate_image(image_phl, options, get_wcs_list(image_phl, options),
+                                                    psf_archive_filehandle)
+        return
+
+    logger.info("Generating " + str(num_images_to_generate) + " detectors with " + str(num_parallel_detectors) +
+                " processes.")
+
+    # Workers create their own images, so make sure they all start from an image group without any
+    image_group_phl.clear_children()
+
+    _worker_image_group = image_group_phl
+    _worker_options = options
+    _worker_uses_psf_archive = psf_archive_filehandle is not None
+
+    # Limit how many detectors can be generated ahead of the one we're waiting on, to cap memory use
+    max_pending = num_parallel_detectors + max(options['pipeline_queue_depth'], 0)
+
+    try:
+        with get_context("fork").Pool(processes = num_parallel_detectors, maxtasksperchild = 1) as pool:
+
+            pending_results = deque()
+            next_i = 0
+
+            while next_i < num_images_to_generate or len(pending_results) > 0:
+
+                while next_i < num_images_to_generate and len(pending_results) < max_pending:
+                    image_i = image_indices[next_i]
+                    pending_results.append((image_i, pool.apply_async(_generate_detector_in_worker, (image_i,))))
+                    next_i += 1
+
+                # Take results in order, so we can commit each detector as soon as it and all before it are done
+                image_i, pending_result = pending_results.popleft()
+                image_ID, detector_results, psf_entries = pending_result.get()
+
+                if psf_entries is not None:
+                    add_psf_archive_entries(psf_archive_filehandle, *psf_entries)
+
+                yield image_i, image_ID, detector_results
+    finally:
+        _worker_image_group = None
+        _worker_options = None
+        _worker_uses_psf_archive = False
+
+    return
+
+
+def set_up_galaxy_population(image_phl, options):
+    """
+        @brief Chooses the galaxies to be drawn in an image, adding or removing galaxies to reach the requested number
+               of target galaxies, and arranging them into groups if shape noise cancellation is being applied.
+
+        @param image_phl
+            <SHE_GST_PhysicalModel.Image> Image-level object whose galaxies will be drawn
         @param options
             <dict> Options dictionary for this run
-        @param centre_offset
-            <float> The difference between Galsim's stated centres and the actual centres
-        @param num_dithers
-            <int> How many dithers there are
-        @param dithers
-            <list<>> A list which will be populated with a galsim.Image for each dither
-        @param full_x_size
-            <int> The size in pixels of the x-axis of the generated images
-        @param full_y_size
-            <int> The size in pixels of the y-axis of the generated images
-        @param pixel_scale
-            <float> The scale of pixels in the generated images in arcsec/pixel
-        @param detections_table
-            <astropy.Table> The table containing mock galaxy detections (ID and position),
-                            to be filled
-        @param details_table
-            <astropy.Table> The table containing details on each galaxy, to be filled.
 
         @returns galaxies
-            <SHE_GST_PhysicalModel.galaxy_list> Iterable list of the galaxies which were printed.
+            <list<SHE_GST_PhysicalModel.Galaxy>> The galaxies to draw, in order
+        @returns num_target_galaxies
+            <int> The number of target galaxies
+        @returns num_background_galaxies
+            <int> The number of background galaxies
+        @returns num_ratio
+            <float> The ratio of the requested number of target galaxies to the number the image had
+        @returns galaxy_group_IDs
+            <dict> The ID of the group of each galaxy, keyed by the galaxy's ID
     """
 
     logger = getLogger(__name__)
-    logger.debug("Entering 'print_galaxies' function.")
-
-    # Get some data out of the options
-    model_psf_offset = (options["model_psf_x_offset"], options["model_psf_y_offset"])
 
     # Get the galaxies we'll be drawing
-    galaxies = image_phl.get_galaxy_descendants()
+    galaxies = get_galaxy_descendants(image_phl)
 
     background_galaxies = []
     target_galaxies = []
 
-    # Since all WCSs are uniform so far, we just use a single jacobian WCS for profile transformations
-    jacobian_wcs = wcs_list[0].jacobian(image_pos = galsim.PositionD(0., 0.))
-
-    # Seed the python RNG
-    np.random.seed(image_phl.get_full_seed() % 2 ** 32)
-
     # Generate parameters first (for consistent rng)
 
     logger.debug("Generating galaxy parameters.")
-    for galaxy in galaxies:
-        galaxy.generate_parameters()
+    image_phl.generate_galaxy_descendant_parameters()
 
-        # Sort out target galaxies
-        if is_target_galaxy(galaxy, options):
+    # Sort out target galaxies
+    _, initial_galaxy_params = get_galaxy_param_arrays(image_phl, ('apparent_mag_vis',))
+    for galaxy, is_target_gal in zip(galaxies, is_target_magnitude(initial_galaxy_params['apparent_mag_vis'],
+                                                                   options)):
+        if is_target_gal:
             target_galaxies.append(galaxy)
         else:
             background_galaxies.append(galaxy)
@@ -508,34 +985,15 @@ def print_galaxies(image_phl,
             else:
                 num_extra_background_galaxies = 0
 
-            num_new_target_galaxies = 0
-            num_new_background_galaxies = 0
-
             field = image_phl.get_field_descendants()[0]
 
-            while ((num_new_target_galaxies < num_extra_target_galaxies) or
-                   (num_new_background_galaxies < num_extra_background_galaxies)):
-
-                new_galaxy = field.add_galaxy()
-
-                bad_type = True
+            # New galaxies are generated until there are enough of each type, with the target galaxies returned first
+            new_galaxies = field.add_galaxies_by_magnitude(num_extra_target_galaxies,
+                                                           num_extra_background_galaxies,
+                                                           options['magnitude_limit'])
 
-                while bad_type:
-                    new_galaxy.clear()
-                    new_galaxy.generate_parameters()
-
-                    # Check what type it is, and if we can add another galaxy of that type
-
-                    if is_target_galaxy(new_galaxy, options):
-                        if num_new_target_galaxies < num_extra_target_galaxies:
-                            target_galaxies.append(new_galaxy)
-                            num_new_target_galaxies += 1
-                            bad_type = False
-                    else:
-                        if num_new_background_galaxies < num_extra_background_galaxies:
-                            background_galaxies.append(new_galaxy)
-                            num_new_background_galaxies += 1
-                            bad_type = False
+            target_galaxies += new_galaxies[:num_extra_target_galaxies]
+            background_galaxies += new_galaxies[num_extra_target_galaxies:]
 
             logger.debug("Finished adjusting number of target galaxies upward.")
 
@@ -636,6 +1094,82 @@ def print_galaxies(image_phl,
             # Use the galaxy's own ID as the group ID
             galaxy_group_IDs[galaxy.get_full_ID()] = galaxy.get_full_ID()
 
+    return galaxies, num_target_galaxies, num_background_galaxies, num_ratio, galaxy_group_IDs
+
+
+def print_galaxies(image_phl,
+                   options,
+                   wcs_list,
+                   centre_offset,
+                   num_dithers,
+                   dithers,
+                   full_x_size,
+                   full_y_size,
+                   pixel_scale,
+                   detections_table_builder,
+                   details_table_builder,
+                   psf_archive_filehandle,
+                   snapshot_filename = None,
+                   snapshot_population = None):
+    """
+        @brief Prints galaxies onto a new image and stores details on them in the output table.
+
+        @param image_phl
+            <SHE_GST_PhysicalModel.Image> Image-level object which will generate galaxies to print
+        @param options
+            <dict> Options dictionary for this run
+        @param centre_offset
+            <float> The difference between Galsim's stated centres and the actual centres
+        @param num_dithers
+            <int> How many dithers there are
+        @param dithers
+            <list<>> A list which will be populated with a galsim.Image for each dither
+        @param full_x_size
+            <int> The size in pixels of the x-axis of the generated images
+        @param full_y_size
+            <int> The size in pixels of the y-axis of the generated images
+        @param pixel_scale
+            <float> The scale of pixels in the generated images in arcsec/pixel
+        @param detections_table_builder
+            <TableBuilder> Builder for the table containing mock galaxy detections (ID and position),
+                           to be filled
+        @param details_table_builder
+            <TableBuilder> Builder for the table containing details on each galaxy, to be filled.
+        @param snapshot_filename
+            <str> Fully-qualified name of the file to save a snapshot of the physical model to once the population
+                  of galaxies is final, or None to not save one. Nothing is saved if the snapshot already exists
+        @param snapshot_population
+            <dict> The population description loaded along with a snapshot the image was restored from, or None if
+                   it wasn't restored from one
+
+        @returns galaxies
+            <SHE_GST_PhysicalModel.galaxy_list> Iterable list of the galaxies which were printed.
+    """
+
+    logger = getLogger(__name__)
+    logger.debug("Entering 'print_galaxies' function.")
+
+    # Get some data out of the options
+    model_psf_offset = (options["model_psf_x_offset"], options["model_psf_y_offset"])
+
+    # Since all WCSs are uniform so far, we just use a single jacobian WCS for profile transformations
+    jacobian_wcs = wcs_list[0].jacobian(image_pos = galsim.PositionD(0., 0.))
+
+    if snapshot_population is None:
+        (galaxies, num_target_galaxies, num_background_galaxies, num_ratio,
+         galaxy_group_IDs) = set_up_galaxy_population(image_phl, options)
+    else:
+        # The galaxies were restored from a snapshot of the final population, so use them as they are
+        galaxies_by_ID = {}
+        for galaxy in get_galaxy_descendants(image_phl):
+            galaxies_by_ID[galaxy.get_full_ID()] = galaxy
+        galaxies = [galaxies_by_ID[galaxy_ID] for galaxy_ID in snapshot_population['galaxy_IDs']]
+        num_target_galaxies = snapshot_population['num_target_galaxies']
+        num_background_galaxies = snapshot_population['num_background_galaxies']
+        num_ratio = snapshot_population['num_ratio']
+        galaxy_group_IDs = dict([(galaxy_ID, group_ID)
+                                 for galaxy_ID, group_ID in snapshot_population['galaxy_group_IDs']])
+
     # Figure out how to set up the grid for galaxy stamps, making it as square as possible
     ncols = int(np.ceil(np.sqrt(num_target_galaxies)))
     if ncols == 0:
@@ -687,11 +1221,38 @@ def print_galaxies(image_phl,
     num_target_galaxies_printed = 0
     num_background_galaxies_printed = 0
 
+    # Stamps to draw onto the dithers, in the order of the galaxies, and the sizes chosen for them
+    stamps = []
+    stamp_size_planner = StampSizePlanner()
+
+    # Get the parameters of all galaxies at once, now that any adjustments to them have been made
+    galaxy_rows, galaxy_params = get_galaxy_param_arrays(image_phl, galaxy_param_names)
+
+    if snapshot_population is None:
+        population = {'galaxy_IDs': [galaxy.get_full_ID() for galaxy in galaxies],
+                      'num_target_galaxies': num_target_galaxies,
+                      'num_background_galaxies': num_background_galaxies,
+                      'num_ratio': num_ratio,
+                      'galaxy_group_IDs': list(galaxy_group_IDs.items())}
+        save_snapshot(image_phl, snapshot_filename, population)
+    is_target_gal_array = is_target_magnitude(galaxy_params['apparent_mag_vis'], options)
+    image_ID = image_phl.get_full_ID()
+
+    # Get the fidelity tier each galaxy will be drawn in, if we're using them
+    fidelity_tiers = get_fidelity_tiers(options['fidelity_tiers'], default_gsparams)
+    if fidelity_tiers is not None:
+        fidelity_tier_indices = get_fidelity_tier_indices(galaxy_params['apparent_mag_vis'],
+                                                          options['magnitude_limit'],
+                                                          fidelity_tiers)
+
     # Loop over galaxies now
 
     for galaxy in galaxies:
 
-        is_target_gal = is_target_galaxy(galaxy, options)
+        galaxy_ID = galaxy.get_full_ID()
+        gal_row = galaxy_rows[galaxy_ID]
+
+        is_target_gal = bool(is_target_gal_array[gal_row])
 
         # If it isn't a target and we aren't rendering background galaxies, skip it
         if (not is_target_gal) and (not options['render_background_galaxies']):
@@ -708,17 +1269,31 @@ def print_galaxies(image_phl,
                             str(num_background_galaxies) + " background galaxies.")
             num_background_galaxies_printed += 1
 
+        # Get the settings to draw this galaxy with
+        if fidelity_tiers is None:
+            gal_gsparams = default_gsparams
+            stamp_size_factor = options['stamp_size_factor']
+            draw_method = 'auto'
+        else:
+            fidelity_tier = fidelity_tiers[fidelity_tier_indices[gal_row]]
+            gal_gsparams = fidelity_tier.gsparams
+            if fidelity_tier.stamp_size_factor is None:
+                stamp_size_factor = options['stamp_size_factor']
+            else:
+                stamp_size_factor = fidelity_tier.stamp_size_factor
+            draw_method = fidelity_tier.method
+
         # Get some galaxy info to avoid repeating method calls
-        gal_intensity = get_I(galaxy.get_param_value('apparent_mag_vis'),
+        gal_intensity = get_I(galaxy_params['apparent_mag_vis'][gal_row],
                               'mag_vis',
                               gain = options['gain'],
-                              exp_time = galaxy.get_param_value('exp_time'))
+                              exp_time = galaxy_params['exp_time'][gal_row])
         if options['single_psf']:
             gal_n = 1
             gal_z = 0
         else:
-            gal_n = galaxy.get_param_value('sersic_index')
-            gal_z = galaxy.get_param_value('redshift')
+            gal_n = galaxy_params['sersic_index'][gal_row]
+            gal_z = galaxy_params['redshift'][gal_row]
 
         if not options['details_only']:
 
@@ -764,18 +1339,20 @@ def print_galaxies(image_phl,
 
                     add_psf_to_archive(psf_profile = output_bulge_psf_profile,
                                        archive_filehandle = psf_archive_filehandle,
-                                       galaxy_id = galaxy.get_full_ID(),
+                                       galaxy_id = galaxy_ID,
                                        exposure_index = di,
                                        psf_type = "bulge",
                                        stamp_size = options['psf_stamp_size'],
-                                       scale = pixel_scale / options['psf_scale_factor'], )
+                                       scale = pixel_scale / options['psf_scale_factor'],
+                                       image_id = image_ID)
                     add_psf_to_archive(psf_profile = output_disk_psf_profile,
                                        archive_filehandle = psf_archive_filehandle,
-                                       galaxy_id = galaxy.get_full_ID(),
+                                       galaxy_id = galaxy_ID,
                                        exposure_index = di,
                                        psf_type = "disk",
                                        stamp_size = options['psf_stamp_size'],
-                                       scale = pixel_scale / options['psf_scale_factor'])
+                                       scale = pixel_scale / options['psf_scale_factor'],
+                                       image_id = image_ID)
 
             # Get the position of the galaxy, depending on whether we're in field or stamp mode
 
@@ -792,8 +1369,8 @@ def print_galaxies(image_phl,
                 # Adjust galaxy position in stamp mode
                 if (options['mode'] == 'stamps'):
 
-                    xp_init = galaxy.get_param_value("xp")
-                    yp_init = galaxy.get_param_value("yp")
+                    xp_init = galaxy_params['xp'][gal_row]
+                    yp_init = galaxy_params['yp'][gal_row]
 
                     xp_sp_shift = xp_init - int(xp_init)
                     yp_sp_shift = yp_init - int(yp_init)
@@ -803,23 +1380,24 @@ def print_galaxies(image_phl,
 
                 else:
 
-                    xp = galaxy.get_param_value("xp")
-                    yp = galaxy.get_param_value("yp")
+                    xp = galaxy_params['xp'][gal_row]
+                    yp = galaxy_params['yp'][gal_row]
 
             elif options['mode'] == 'stamps':
 
                 # Background galaxy in stamp mode. We'll have to determine a valid position
                 # on a non-empty stamp
 
-                # Pick a random stamp to appear on
-                si = np.random.randint(0, num_target_galaxies)
+                # Pick a random stamp to appear on, using a stream specific to this galaxy
+                si = get_rng(image_phl.get_seed(), galaxy.get_ID_seq(),
+                             RNG_STREAM_STAMP_PLACEMENT).integers(0, num_target_galaxies)
                 yi = si // ncols
                 xi = si - yi * ncols
 
                 # Use the generated xp and yp values as random input here, so we don't affect
                 # the seeding
-                xp_init = galaxy.get_param_value("xp")
-                yp_init = galaxy.get_param_value("yp")
+                xp_init = galaxy_params['xp'][gal_row]
+                yp_init = galaxy_params['yp'][gal_row]
 
                 # Place bgs in a circular aperture around target galaxies
 
@@ -834,8 +1412,8 @@ def print_galaxies(image_phl,
 
             else:
 
-                xp = galaxy.get_param_value("xp")
-                yp = galaxy.get_param_value("yp")
+                xp = galaxy_params['xp'][gal_row]
+                yp = galaxy_params['yp'][gal_row]
 
             xp_i = int(xp)
             yp_i = int(yp)
@@ -856,22 +1434,22 @@ def print_galaxies(image_phl,
 
         # Store galaxy data to save calls to the class
 
-        rotation = galaxy.get_param_value('rotation')
-        spin = galaxy.get_param_value('spin')
-        tilt = galaxy.get_param_value('tilt')
+        rotation = galaxy_params['rotation'][gal_row]
+        spin = galaxy_params['spin'][gal_row]
+        tilt = galaxy_params['tilt'][gal_row]
 
-        g_shear = galaxy.get_param_value('shear_magnitude')
-        beta_shear = galaxy.get_param_value('shear_angle')
+        g_shear = galaxy_params['shear_magnitude'][gal_row]
+        beta_shear = galaxy_params['shear_angle'][gal_row]
 
-        g_ell = galaxy.get_param_value('bulge_ellipticity')
+        g_ell = galaxy_params['bulge_ellipticity'][gal_row]
 
-        bulge_fraction = galaxy.get_param_value('bulge_fraction')
-        bulge_size = galaxy.get_param_value('apparent_size_bulge')
-        bulge_trunc_factor = galaxy.get_param_value('bulge_truncation_factor')
+        bulge_fraction = galaxy_params['bulge_fraction'][gal_row]
+        bulge_size = galaxy_params['apparent_size_bulge'][gal_row]
+        bulge_trunc_factor = galaxy_params['bulge_truncation_factor'][gal_row]
 
-        disk_size = galaxy.get_param_value('apparent_size_disk')
-        disk_height_ratio = galaxy.get_param_value('disk_height_ratio')
-        disk_trunc_factor = galaxy.get_param_value('disk_truncation_factor')
+        disk_size = galaxy_params['apparent_size_disk'][gal_row]
+        disk_height_ratio = galaxy_params['disk_height_ratio'][gal_row]
+        disk_trunc_factor = galaxy_params['disk_truncation_factor'][gal_row]
 
         if not options['details_only']:
             if is_target_gal:
@@ -884,16 +1462,11 @@ def print_galaxies(image_phl,
                                                                    g_shear = g_shear,
                                                                    beta_deg_shear = beta_shear,
                                                                    trunc_factor = bulge_trunc_factor,
-                                                                   gsparams = default_gsparams)
+                                                                   gsparams = gal_gsparams)
 
                 # Convert the profile to image co-ordinates
                 bulge_gal_profile = jacobian_wcs.toImage(bulge_gal_profile_world)
 
-                # Convolve the galaxy, psf, and pixel profile to determine the final (well,
-                # before noise) pixelized image_phl
-                final_bulge = galsim.Convolve([bulge_gal_profile, bulge_psf_profile],
-                                              gsparams = default_gsparams)
-
                 # Try to get a disk galaxy profile if the galsim version supports it
                 disk_gal_profile_world = get_disk_galaxy_profile(half_light_radius = disk_size,
                                                                  rotation = rotation,
@@ -903,14 +1476,20 @@ def print_galaxies(image_phl,
                                                                  beta_deg_shear = beta_shear,
                                                                  height_ratio = disk_height_ratio,
                                                                  trunc_factor = disk_trunc_factor,
-                                                                 gsparams = default_gsparams)
+                                                                 gsparams = gal_gsparams)
 
                 # Convert the profile to image co-ordinates
                 disk_gal_profile = jacobian_wcs.toImage(disk_gal_profile_world)
 
-                final_disk = galsim.Convolve([disk_gal_profile, disk_psf_profile,
-                                              galsim.Pixel(scale = pixel_scale)],
-                                             gsparams = default_gsparams)
+                # Convolve the galaxy, psf, and pixel profile to determine the final (well,
+                # before noise) pixelized image_phl
+                final_components = get_target_galaxy_components(bulge_gal_profile,
+                                                                disk_gal_profile,
+                                                                bulge_psf_profile,
+                                                                disk_psf_profile,
+                                                                pixel_scale = pixel_scale,
+                                                                draw_method = draw_method,
+                                                                gsparams = gal_gsparams)
 
                 # Now draw the PSFs for this galaxy onto those images
 
@@ -924,30 +1503,43 @@ def print_galaxies(image_phl,
                                                              beta_deg_ell = rotation,
                                                              g_shear = g_shear,
                                                              beta_deg_shear = beta_shear,
-                                                             gsparams = default_gsparams)
+                                                             gsparams = gal_gsparams)
 
                 gal_profile = jacobian_wcs.toImage(gal_profile_world)
 
                 # Convolve the galaxy, psf, and pixel profile to determine the final
                 # (well, before noise) pixelized image_phl
                 final_gal = galsim.Convolve([gal_profile, disk_psf_profile],
-                                            gsparams = default_gsparams)
+                                            gsparams = gal_gsparams)
 
             if not options['mode'] == 'stamps':
                 if is_target_gal:
-                    stamp_size_pix = 2 * (
-                        np.max((int(options['stamp_size_factor'] * bulge_size / (3600 * pixel_scale)),
-                                int(options['stamp_size_factor'] * disk_size / (3600 * pixel_scale))))) + \
+                    min_stamp_size_pix = 2 * (
+                        np.max((int(stamp_size_factor * bulge_size / (3600 * pixel_scale)),
+                                int(stamp_size_factor * disk_size / (3600 * pixel_scale))))) + \
                                      int(np.max(np.shape(disk_psf_profile.image.array)) / subsampling_factor)
+                    stamp_components = final_components
                 else:
-                    stamp_size_pix = 4 * (
-                        np.max((int(options['stamp_size_factor'] * bulge_size / (3600 * pixel_scale)),
-                                int(options['stamp_size_factor'] * disk_size / (3600 * pixel_scale)))))
+                    min_stamp_size_pix = 4 * (
+                        np.max((int(stamp_size_factor * bulge_size / (3600 * pixel_scale)),
+                                int(stamp_size_factor * disk_size / (3600 * pixel_scale)))))
+                    stamp_components = [(final_gal, draw_method)]
+
+                min_stamp_size_pix = min(min_stamp_size_pix, full_x_size, full_y_size)
+
+                # Enlarge the stamp to a size which is efficient to draw
+                stamp_size_pix = stamp_size_planner.plan(galaxy_ID, min_stamp_size_pix, stamp_components,
+                                                         max_size = min(full_x_size, full_y_size))
+                logger.debug("Galaxy " + str(galaxy_ID) + ": minimum stamp size " + str(min_stamp_size_pix) +
+                             ", stamp size " + str(stamp_size_pix) + ", FFT size " +
+                             str(stamp_size_planner.fft_sizes[-1]) + ".")
 
-                if stamp_size_pix > full_x_size:
-                    stamp_size_pix = full_x_size
-                if stamp_size_pix > full_y_size:
-                    stamp_size_pix = full_y_size
+                # The centre of a stamp moves by half a pixel if its size changes parity, so offset the galaxy to
+                # draw it where it would be in a stamp of the minimum size
+                parity_offset = 0.5 * (min_stamp_size_pix % 2 - stamp_size_pix % 2)
+
+            else:
+                parity_offset = 0.
 
             # Determine boundaries
             xl = xp_i - stamp_size_pix // 2 + 1
@@ -976,10 +1568,6 @@ def print_galaxies(image_phl,
 
             bounds = galsim.BoundsI(xl, xh, yl, yh)
 
-            gal_images = []
-            for di in range(num_dithers):
-                gal_images.append(dithers[di][bounds])
-
             # Get centers, correcting by 1.5 - 1 since Galsim is offset by 1, .5 to move from
             # corner of pixel to center
             x_centre_offset = x_shift
@@ -987,29 +1575,25 @@ def print_galaxies(image_phl,
             xc = bounds.center.x + centre_offset + x_centre_offset
             yc = bounds.center.y + centre_offset + y_centre_offset
 
-            # Draw the image
-            for gal_image, (x_offset, y_offset) in zip(gal_images, get_dither_scheme(options['dithering_scheme'])):
-
-                if is_target_gal:
-                    final_bulge.drawImage(gal_image, scale = 1.0,
-                                          offset = (-x_centre_offset + x_offset + xp_sp_shift,
-                                                    - y_centre_offset + y_offset + yp_sp_shift),
-                                          add_to_image = True)
-
-                    disk_xp_sp_shift = xp_sp_shift
-                    disk_yp_sp_shift = yp_sp_shift
-
-                    final_disk.drawImage(gal_image, scale = 1.0,
-                                         offset = (-x_centre_offset + x_offset + disk_xp_sp_shift,
-                                                   - y_centre_offset + y_offset + disk_yp_sp_shift),
-                                         add_to_image = True,
-                                         method = 'no_pixel')
+            # Photon shooting uses a stream specific to this galaxy and dither
+            if draw_method == 'phot':
+                photon_seeds = [get_stream_seed(image_phl.get_seed(), galaxy.get_ID_seq(), RNG_STREAM_PHOTONS, di)
+                                for di in range(num_dithers)]
+            else:
+                photon_seeds = None
 
-                else:
-                    final_gal.drawImage(gal_image, scale = 1.0,
-                                        offset = (-x_centre_offset + x_offset + xp_sp_shift,
-                                                  - y_centre_offset + y_offset + xp_sp_shift),
-                                        add_to_image = True)
+            # Set up the stamp to be drawn once all galaxies have been processed
+            if is_target_gal:
+                stamps.append(Stamp(bounds, [(final_profile, (parity_offset - x_centre_offset,
+                                                              parity_offset - y_centre_offset),
+                                              (xp_sp_shift, yp_sp_shift), method)
+                                             for final_profile, method in final_components],
+                                    photon_seeds = photon_seeds))
+            else:
+                stamps.append(Stamp(bounds, [(final_gal, (parity_offset - x_centre_offset,
+                                                          parity_offset - y_centre_offset),
+                                              (xp_sp_shift, xp_sp_shift), draw_method)],
+                                    photon_seeds = photon_seeds))
 
         xy_world = wcs_list[0].toWorld(galsim.PositionD(xc + xp_sp_shift, yc + yp_sp_shift))
 
@@ -1018,43 +1602,59 @@ def print_galaxies(image_phl,
             g1 = g_shear * np.cos(2 * beta_shear * np.pi / 180)
             g2 = g_shear * np.sin(2 * beta_shear * np.pi / 180)
 
-            details_table.add_row(vals = {datf.ID               : galaxy.get_full_ID(),
-                                          datf.group_ID         : galaxy_group_IDs[galaxy.get_full_ID()],
-                                          datf.ra               : xy_world.x,
-                                          datf.dec              : xy_world.y,
-                                          datf.hlr_bulge        : bulge_size,
-                                          datf.hlr_disk         : disk_size,
-                                          datf.bulge_ellipticity: g_ell,
-                                          datf.bulge_axis_ratio : galaxy.get_param_value('bulge_axis_ratio'),
-                                          datf.bulge_fraction   : bulge_fraction,
-                                          datf.disk_height_ratio: disk_height_ratio,
-                                          datf.z                : gal_z,
-                                          datf.magnitude        : galaxy.get_param_value('apparent_mag_vis'),
-                                          datf.snr              : 0,
-                                          datf.sersic_index     : gal_n,
-                                          datf.rotation         : rotation,
-                                          datf.tilt             : tilt,
-                                          datf.spin             : spin,
-                                          datf.g1               : g1,
-                                          datf.g2               : g2,
-                                          datf.target_galaxy    : is_target_gal})
+            details_row = {datf.ID               : galaxy_ID,
+                           datf.group_ID         : galaxy_group_IDs[galaxy_ID],
+                           datf.ra               : xy_world.x,
+                           datf.dec              : xy_world.y,
+                           datf.hlr_bulge        : bulge_size,
+                           datf.hlr_disk         : disk_size,
+                           datf.bulge_ellipticity: g_ell,
+                           datf.bulge_axis_ratio : galaxy_params['bulge_axis_ratio'][gal_row],
+                           datf.bulge_fraction   : bulge_fraction,
+                           datf.disk_height_ratio: disk_height_ratio,
+                           datf.z                : gal_z,
+                           datf.magnitude        : galaxy_params['apparent_mag_vis'][gal_row],
+                           datf.snr              : 0,
+                           datf.sersic_index     : gal_n,
+                           datf.rotation         : rotation,
+                           datf.tilt             : tilt,
+                           datf.spin             : spin,
+                           datf.g1               : g1,
+                           datf.g2               : g2,
+                           datf.target_galaxy    : is_target_gal}
+            if fidelity_tiers is not None:
+                details_row[RENDER_TIER_COLNAME] = fidelity_tier_indices[gal_row]
+            if (options['mode'] == 'field') and not options['details_only']:
+                details_row[STAMP_SIZE_COLNAME] = stamp_size_planner.stamp_sizes[-1]
+                details_row[FFT_SIZE_COLNAME] = stamp_size_planner.fft_sizes[-1]
+
+            details_table_builder.add_row(vals = details_row)
 
         if is_target_gal and not options['details_only']:
 
             hlr = bulge_size * bulge_fraction + disk_size * (1 - bulge_fraction)
 
             # Add to detections table only if it's a target galaxy
-            detections_table.add_row(vals = {
-                detf.ID               : galaxy.get_full_ID(),
+            detections_table_builder.add_row(vals = {
+                detf.ID               : galaxy_ID,
                 detf.seg_ID           : -99,
                 detf.vis_det          : True,
                 detf.gal_x_world      : xy_world.x,
                 detf.gal_y_world      : xy_world.y,
                 detf.SEGMENTATION_AREA: np.pi * (2 * hlr) ** 2,
-                detf.FLUX_VIS_APER    : 10 ** (-0.4 * galaxy.get_param_value('apparent_mag_vis')),
+                detf.FLUX_VIS_APER    : 10 ** (-0.4 * galaxy_params['apparent_mag_vis'][gal_row]),
                 })
 
-            del final_disk, disk_psf_profile
+            del final_components, disk_psf_profile
+
+    # Draw all the galaxies' stamps
+    if len(stamp_size_planner) > 0:
+        logger.info(stamp_size_planner.get_summary())
+    if not options['details_only']:
+        draw_stamps(stamps, dithers, get_dither_scheme(options['dithering_scheme']),
+                    tile_size = options['render_tile_size'],
+                    num_processes = options['num_parallel_tiles'],
+                    oversample_dithers = options['render_oversampled_dithers'])
 
     logger.info("Finished printing galaxies.")
 
@@ -1166,7 +1766,15 @@ def generate_image(image_phl,
 
     # Setup
 
-    image_phl.autofill_children()
+    # Restore the galaxies from a snapshot if one was saved by an earlier run, and generate them otherwise
+    snapshot_filename = get_snapshot_filename(image_phl, options)
+    snapshot_population = load_snapshot(image_phl, snapshot_filename)
+    if snapshot_population is None:
+        # Galaxies in blocks can't be moved into groups, so they're only used without shape noise cancellation
+        if options['galaxy_blocks'] and not options['shape_noise_cancellation']:
+            image_phl.autofill_children_with_galaxy_blocks()
+        else:
+            image_phl.autofill_children()
 
     # General setup from config
     num_dithers = len(get_dither_scheme(options['dithering_scheme']))
@@ -1198,19 +1806,35 @@ def generate_image(image_phl,
 
     # Set up a table for output if necessary
     if options['details_output_format'] == 'none':
+        detections_table_builder = None
+        details_table_builder = None
         detections_table = None
         details_table = None
     else:
         full_options = get_full_options(options, image_phl)
-        detections_table = detf.init_table(image_phl.get_parent(), full_options,
-                                           optional_columns = [detf.seg_ID,
-                                                               detf.FLUX_VIS_APER])
-        details_table = datf.init_table(image_phl.get_parent(), full_options)
+        detections_table_builder = TableBuilder(detf.init_table(image_phl.get_parent(), full_options,
+                                                                optional_columns = [detf.seg_ID,
+                                                                                    detf.FLUX_VIS_APER]))
+        details_table_template = datf.init_table(image_phl.get_parent(), full_options)
+        if get_fidelity_tiers(options['fidelity_tiers'], default_gsparams) is not None:
+            details_table_template.add_column(table.Column(name = RENDER_TIER_COLNAME, dtype = np.int16, length = 0))
+        if (options['mode'] == 'field') and not options['details_only']:
+            # Record the stamp size planned for each galaxy, for auditing the cost of drawing it
+            details_table_template.add_column(table.Column(name = STAMP_SIZE_COLNAME, dtype = np.int32, length = 0))
+            details_table_template.add_column(table.Column(name = FFT_SIZE_COLNAME, dtype = np.int32, length = 0))
+        details_table_builder = TableBuilder(details_table_template)
 
     # Print the galaxies
     galaxies = print_galaxies(image_phl, options, wcs_list, centre_offset, num_dithers, dithers,
                               full_x_size, full_y_size, pixel_scale,
-                              detections_table, details_table, psf_archive_filehandle)
+                              detections_table_builder, details_table_builder, psf_archive_filehandle,
+                              snapshot_filename = snapshot_filename,
+                              snapshot_population = snapshot_population)
+
+    # Convert the rows recorded while printing into tables
+    if options['details_output_format'] != 'none':
+        detections_table = detections_table_builder.to_table()
+        details_table = details_table_builder.to_table()
 
     sky_level_subtracted = image_phl.get_param_value('subtracted_background')
     sky_level_subtracted_pixel = sky_level_subtracted * pixel_scale ** 2 * 3600 ** 2
@@ -1220,14 +1844,16 @@ def generate_image(image_phl,
     else:
         output_sky_level_unsubtracted_pixel = options['output_unsubtracted_background'] * pixel_scale ** 2 * 3600 ** 2
 
-    # Get the initial noise deviates
+    # Get the initial noise deviates, with an independent stream for each detector and dither
     base_deviates = []
     if not options['suppress_noise']:
+        if options['noise_seed'] != 0:
+            noise_seed = options['noise_seed']
+        else:
+            noise_seed = image_phl.get_seed()
         for di in range(num_dithers):
-            if options['noise_seed'] != 0:
-                base_deviate = galsim.BaseDeviate(num_dithers * options['noise_seed'] + di)
-            else:
-                base_deviate = galsim.BaseDeviate(image_phl.get_full_seed() + 1 + di)
+            base_deviate = galsim.BaseDeviate(get_stream_seed(noise_seed, image_phl.get_ID_seq(),
+                                                              RNG_STREAM_NOISE, di))
             base_deviates.append(base_deviate)
 
     # For each dither
@@ -1348,7 +1974,9 @@ def generate_image(image_phl,
                                      base_deviate = base_deviates[di],
                                      var_array = var_array,
                                      image_phl = image_phl,
-                                     options = options)
+                                     options = options,
+                                     noise_seed = noise_seed,
+                                     dither_index = di)
                 else:
                     dither.addNoise(galsim.CCDNoise(base_deviates[di],
                                                     gain = options['gain'],
@@ -1361,22 +1989,24 @@ def generate_image(image_phl,
         logger.info("Finished printing dither " + str(di + 1) + ".")
 
         # Now that the galaxies have been printed, we can calculate their S/Ns
-        for row in details_table:
+        rmses = [np.mean(noise_maps[di].array) for di in range(num_dithers)]
+        snrs = np.zeros(len(details_table), dtype = details_table[datf.snr].dtype)
+        for row_i, (ra, dec) in enumerate(zip(details_table[datf.ra], details_table[datf.dec])):
             signal_to_noise_estimates = []
             for di in range(num_dithers):
-                signal_to_noise_estimates.append(get_signal_to_noise_estimate(ra = row[datf.ra],
-                                                                              dec = row[datf.dec],
+                signal_to_noise_estimates.append(get_signal_to_noise_estimate(ra = ra,
+                                                                              dec = dec,
                                                                               image = dithers[di],
                                                                               background = bkg_maps[di],
-                                                                              rms = np.mean(noise_maps[di].array),
+                                                                              rms = rmses[di],
                                                                               gain = options['gain'],
                                                                               stamp_size = options['stamp_size']))
             # Add the S/N estimates in quadrature
             snr_squared = 0
             for signal_to_noise_estimate in signal_to_noise_estimates:
                 snr_squared += signal_to_noise_estimate ** 2
-            snr = np.sqrt(snr_squared)
-            row[datf.snr] = snr
+            snrs[row_i] = np.sqrt(snr_squared)
+        details_table[datf.snr][:] = snrs
 
     logger.info("Finished printing image " + str(image_phl.get_local_ID()) + ".")
 
@@ -6,7 +6,7 @@
     in simulated images.
 """
 
-__updated__ = "2021-08-17"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -28,6 +28,7 @@ import galsim
 import numpy as np
 
 from .gain import get_ADU_from_count, get_count_from_ADU
+from .utility.random import RNG_STREAM_NOISE, get_rng
 
 
 def get_sky_level_ADU_per_pixel(sky_level_ADU_per_sq_arcsec,
@@ -130,12 +131,67 @@ def get_var_ADU_per_pixel(pixel_value_ADU,
     return total_var
 
 
+def add_shared_group_noise(image_array,
+                           var_array,
+                           stamp_size,
+                           ncols,
+                           group_sizes,
+                           group_rngs):
+    """ Adds Gaussian noise to a grid of stamps, where all stamps in a group share the same unit noise field, scaled
+        by each stamp's own variance. Each group's stamps follow on from the previous group's along the rows of the
+        grid, and the noise for all of them is added in one array operation.
+
+        @param image_array The C-contiguous array of the image to add noise to, whose shape must be a whole number
+                           of stamps in each dimension
+        @param var_array Array of the variance of the noise for each pixel, with the same shape as image_array
+        @param stamp_size The size of each stamp in pixels
+        @param ncols The number of columns of stamps in the grid
+        @param group_sizes The number of stamps in each group
+        @param group_rngs A numpy.random.Generator for each group, from which its noise field is drawn
+    """
+
+    if not image_array.flags.c_contiguous:
+        raise ValueError("Image array must be C-contiguous to add noise to it in place.")
+
+    nrows = image_array.shape[0] // stamp_size
+
+    # Views of the arrays indexed by row of stamps, y within stamp, column of stamps, and x within stamp
+    image_cells = image_array.reshape((nrows, stamp_size, ncols, stamp_size))
+    var_cells = np.asarray(var_array).reshape((nrows, stamp_size, ncols, stamp_size))
+
+    first_cell = 0
+    for group_size, rng in zip(group_sizes, group_rngs):
+
+        if group_size == 0:
+            continue
+
+        cells = np.arange(first_cell, first_cell + group_size)
+        if cells[-1] >= nrows * ncols:
+            raise Exception("More galaxies than expected when printing stamps.")
+        irows, icols = np.divmod(cells, ncols)
+
+        noise_field = rng.standard_normal((stamp_size, stamp_size))
+
+        image_cells[irows, :, icols, :] += np.sqrt(var_cells[irows, :, icols, :]) * noise_field
+
+        first_cell += group_size
+
+    return
+
+
 def add_stable_noise(image,
                      base_deviate,
                      var_array,
                      image_phl,
-                     options):
+                     options,
+                     noise_seed=None,
+                     dither_index=0):
     """ Adds stable noise to an image.
+
+        In stamps mode with shape noise cancellation, each galaxy group's stamps get the same noise. If
+        options['vectorised_stable_noise'] is set, the noise for each group is drawn from a counter-based stream keyed
+        on noise_seed, the group's ID sequence, and dither_index, and added to all its stamps at once by
+        add_shared_group_noise, rather than by drawing it again from a copy of base_deviate for each stamp.
     """
 
     # If not in stamp mode or not applying shape noise cancellation, add noise simply
@@ -165,6 +221,19 @@ def add_stable_noise(image,
     # In stamp mode, add to each galaxy group's stamps the same way
 
     galaxy_groups = image_phl.get_galaxy_group_descendants()
+
+    if options['vectorised_stable_noise']:
+        add_shared_group_noise(image_array=image.array,
+                               var_array=var_array,
+                               stamp_size=stamp_size_pix,
+                               ncols=ncols,
+                               group_sizes=[len(galaxy_group.get_galaxy_descendants())
+                                            for galaxy_group in galaxy_groups],
+                               group_rngs=[get_rng(noise_seed, galaxy_group.get_ID_seq(), RNG_STREAM_NOISE,
+                                                   dither_index)
+                                           for galaxy_group in galaxy_groups])
+        return
+
     for galaxy_group in galaxy_groups:
 
         # Only want to advance deviate once per group, which we do by copying again here
@@ -0,0 +1,229 @@
+""" @file output_cache.py
+
+    Created 17 Oct 2026
+
+    A cache of the complete output of image groups, keyed by model hash, seed, version, and the options which choose
+    which products are written, so that identical image groups don't need to be generated again.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import hashlib
+import json
+import os
+import shutil
+
+from SHE_PPT.logging import getLogger
+
+
+logger = getLogger(__name__)
+
+CACHE_VERSION = 2
+MANIFEST_FILENAME = "manifest.json"
+
+COPY_CHUNK_SIZE = 1024 ** 2
+
+# Options which don't affect the model hash, but do change which output products are written or what they contain
+product_option_names = ('details_only',
+                        'details_output_format',
+                        'dithering_scheme',
+                        'render_oversampled_dithers',)
+
+
+def get_product_options(options):
+    """
+        @brief Gets the options which change which output products of an image group exist or what they contain, but
+            which aren't part of the model hash.
+
+        @param options
+            <dict> Options dictionary
+
+        @returns product_options
+            <dict>
+    """
+
+    # Round-trip through JSON so these compare equal to those read back from a manifest
+    return json.loads(json.dumps(dict([(name, options[name]) for name in product_option_names])))
+
+
+def _copy_with_checksum(src, dst):
+    """ Copies a file to a new location, returning the checksum of the data copied. Files are never linked, since
+        output files can be updated in place (e.g. when a run is resumed), which would also change the other copy.
+    """
+
+    dst_dir = os.path.split(dst)[0]
+    if dst_dir != "":
+        os.makedirs(dst_dir, exist_ok=True)
+
+    if os.path.exists(dst):
+        os.remove(dst)
+
+    hasher = hashlib.sha1()
+    with open(src, 'rb') as fi, open(dst, 'wb') as fo:
+        for chunk in iter(lambda: fi.read(COPY_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            fo.write(chunk)
+    shutil.copystat(src, dst)
+
+    return hasher.hexdigest()
+
+
+class OutputCache(object):
+    """
+        @brief Stores and retrieves the output files of an image group.
+
+        @details Each entry is a directory within the cache directory, named from the model hash, seed, and
+            SHE_GST version of the image group, and a hash of the product options (see get_product_options). It holds a copy of each output file, under the same name it has
+            relative to the workdir, and a manifest listing the files with their sizes and checksums along with the
+            filenames of each product. Entries are written to a temporary directory and renamed into place once
+            complete, and are only used if the manifest matches in full and every file it lists is present with the
+            recorded size. Files are always copied into and out of the cache rather than linked, and each file's
+            checksum is checked as it's retrieved, so an entry which has changed since it was stored is discarded.
+    """
+
+    def __init__(self, cache_dir, model_hash, model_hash_fn, seed, version, product_options=None):
+        self.model_hash = model_hash
+        self.seed = seed
+        self.version = version
+        self.product_options = product_options if product_options is not None else {}
+        self.cache_dir = cache_dir
+
+        product_options_hash = hashlib.sha1(json.dumps(self.product_options, sort_keys=True).encode()).hexdigest()
+        self.entry_dir = os.path.join(cache_dir, model_hash_fn + "-" + str(seed) + "-" + str(version) + "-" +
+                                      product_options_hash[0:8])
+
+    def retrieve(self, workdir):
+        """
+            @brief Copies the files of a matching cache entry into the workdir, if one exists.
+
+            @param workdir
+                <str> The workdir to place the files in
+
+            @returns product_filenames
+                <dict<str, dict<str, list<str>>>> The filenames of each product as passed to store, or None if there
+                was no valid matching entry
+        """
+
+        qualified_manifest_filename = os.path.join(self.entry_dir, MANIFEST_FILENAME)
+
+        if not os.path.exists(qualified_manifest_filename):
+            return None
+
+        try:
+            with open(qualified_manifest_filename, 'r') as fi:
+                manifest = json.load(fi)
+        except ValueError:
+            logger.warning("Output cache manifest " + qualified_manifest_filename + " is unreadable; ignoring it.")
+            return None
+
+        if (manifest.get("cache_version") != CACHE_VERSION or
+                manifest.get("model_hash") != self.model_hash or
+                manifest.get("seed") != self.seed or
+                manifest.get("version") != self.version or
+                manifest.get("product_options") != self.product_options):
+            logger.warning("Output cache entry " + self.entry_dir + " is for a different model or cache version; " +
+                           "ignoring it.")
+            return None
+
+        for filename, size, _ in manifest["files"]:
+            qualified_filename = os.path.join(self.entry_dir, filename)
+            if not os.path.exists(qualified_filename) or os.path.getsize(qualified_filename) != size:
+                logger.warning("File " + qualified_filename + " in output cache is missing or has the wrong size; " +
+                               "discarding the entry.")
+                self._discard()
+                return None
+
+        for filename, _, checksum in manifest["files"]:
+            qualified_filename = os.path.join(self.entry_dir, filename)
+            if _copy_with_checksum(qualified_filename, os.path.join(workdir, filename)) != checksum:
+                # Any files already copied will be overwritten when the image group is generated
+                logger.warning("File " + qualified_filename + " in output cache doesn't match its checksum; " +
+                               "discarding the entry.")
+                self._discard()
+                return None
+
+        logger.info("Retrieved " + str(len(manifest["files"])) + " output files from cache entry " +
+                    self.entry_dir + ".")
+
+        return manifest["product_filenames"]
+
+    def _discard(self):
+        """ Removes the manifest of an invalid entry, so that it's replaced when the image group is stored again.
+        """
+
+        try:
+            os.remove(os.path.join(self.entry_dir, MANIFEST_FILENAME))
+        except FileNotFoundError:
+            pass
+
+        return
+
+    def store(self, product_filenames, workdir):
+        """
+            @brief Stores the output files of an image group in the cache.
+
+            @param product_filenames
+                <dict<str, dict<str, list<str>>>> The filenames of each product, relative to the workdir. Each file
+                which exists is stored, and the whole dict is returned by retrieve
+            @param workdir
+                <str> The workdir the files are in
+        """
+
+        if os.path.exists(os.path.join(self.entry_dir, MANIFEST_FILENAME)):
+            return
+
+        temp_entry_dir = self.entry_dir + ".tmp" + str(os.getpid())
+        if os.path.isdir(temp_entry_dir):
+            shutil.rmtree(temp_entry_dir)
+        os.makedirs(temp_entry_dir)
+
+        files = []
+        stored_filenames = set()
+        for filename_lists in product_filenames.values():
+            for filename_list in filename_lists.values():
+                for filename in filename_list:
+                    qualified_filename = os.path.join(workdir, filename)
+                    if not os.path.exists(qualified_filename) or filename in stored_filenames:
+                        continue
+                    stored_filenames.add(filename)
+                    qualified_entry_filename = os.path.join(temp_entry_dir, filename)
+                    checksum = _copy_with_checksum(qualified_filename, qualified_entry_filename)
+                    files.append((filename, os.path.getsize(qualified_entry_filename), checksum))
+
+        manifest = {"cache_version": CACHE_VERSION,
+                    "model_hash": self.model_hash,
+                    "seed": self.seed,
+                    "version": self.version,
+                    "product_options": self.product_options,
+                    "files": files,
+                    "product_filenames": product_filenames, }
+
+        with open(os.path.join(temp_entry_dir, MANIFEST_FILENAME), 'w') as fo:
+            json.dump(manifest, fo)
+
+        # Move the entry into place, replacing any incomplete one, unless another process has stored the same one in
+        # the meantime
+        if os.path.isdir(self.entry_dir) and not os.path.exists(os.path.join(self.entry_dir, MANIFEST_FILENAME)):
+            shutil.rmtree(self.entry_dir)
+        try:
+            os.rename(temp_entry_dir, self.entry_dir)
+        except OSError:
+            shutil.rmtree(temp_entry_dir)
+            return
+
+        logger.info("Stored " + str(len(files)) + " output files in cache entry " + self.entry_dir + ".")
+
+        return
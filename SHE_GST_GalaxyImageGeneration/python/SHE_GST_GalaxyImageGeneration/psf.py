@@ -5,7 +5,7 @@
     @TODO: File docstring
 """
 
-__updated__ = "2021-08-17"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -22,19 +22,24 @@ __updated__ = "2021-08-17"
 
 from copy import deepcopy
 from functools import lru_cache
+import hashlib
 from os.path import join
 
 from SHE_PPT.constants.fits import BULGE_PSF_TAG, DISK_PSF_TAG
-from SHE_PPT.file_io import find_file
 from SHE_PPT.logging import getLogger
 from SHE_PPT.table_formats.she_psf_model_image import tf as pstf
+from astropy import table
 from astropy.io import fits
 from astropy.io.fits import table_to_hdu
 import galsim
+import h5py
 
 import SHE_GST_GalaxyImageGeneration.magic_values as mv
 import numpy as np
 
+from .psf_cache import get_file_checksum, get_psf_cache
+from .utility.file_resolver import resolve_file
+
 
 logger = getLogger(__name__)
 
@@ -65,6 +70,39 @@ gal_id_label = "GAL_ID"
 exposure_index_label = "EX_INDEX"
 SCALE_LABEL = "GS_SCALE"
 type_label = "PSF_TYPE"
+image_id_label = "IMAGE_ID"
+hash_label = "PSF_HASH"
+
+# Group of the archive which holds each distinct PSF image, keyed by the hash of its contents. All other entries in
+# the archive are references to these images.
+psf_images_group_name = "PSF_IMAGES"
+
+# Layouts of the output PSF file: one extension for each galaxy's bulge and disk PSF, or a single cube of the distinct
+# PSF images, with the table giving the index of each galaxy's PSFs in the cube
+psf_extensions_layout = "extensions"
+psf_cube_layout = "cube"
+allowed_psf_output_layouts = (psf_extensions_layout, psf_cube_layout)
+
+layout_label = "PSF_LAYT"
+psf_cube_extname = "PSF_CUBE"
+
+# Key in the on-disk PSF cache of each profile loaded through it, by the id of the profile, along with the profile
+# itself so that the id isn't reused
+_psf_profile_cache_keys = {}
+
+
+def _get_cached_profile(key, make_profile):
+    """Gets a profile through the on-disk PSF cache if it's set up, and otherwise just makes it.
+    """
+
+    psf_cache = get_psf_cache()
+    if psf_cache is None:
+        return make_profile()
+
+    profile = psf_cache.get_profile(key, make_profile)
+    _psf_profile_cache_keys[id(profile)] = (profile, key)
+
+    return profile
 
 
 @lru_cache()
@@ -78,7 +116,7 @@ def load_psf_model_from_sed_z(sed,
 
     model_filename = join(data_dir, "psf_models", sed_names[sed] + ".fits_0.000_0.804_" + z_str + ".fits")
 
-    qualified_filename = find_file(model_filename, workdir)
+    qualified_filename = resolve_file(model_filename, workdir)
 
     return load_psf_model_from_file(qualified_filename,
                                     scale=mv.psf_model_scale,
@@ -92,6 +130,18 @@ def load_psf_model_from_file(file_name,
                              offset,
                              gsparams=galsim.GSParams()):
 
+    if get_psf_cache() is None:
+        return _load_psf_model_from_file(file_name, scale, offset, gsparams)
+
+    return _get_cached_profile(("model", get_file_checksum(file_name), scale, offset, gsparams),
+                               lambda: _load_psf_model_from_file(file_name, scale, offset, gsparams))
+
+
+def _load_psf_model_from_file(file_name,
+                              scale,
+                              offset,
+                              gsparams):
+
     try:
         model = galsim.fits.read(file_name)
     except OSError as e:
@@ -110,6 +160,13 @@ def load_psf_model_from_file(file_name,
 def get_background_psf_profile(gsparams=galsim.GSParams(),
                                pixel_scale=mv.default_pixel_scale):
 
+    return _get_cached_profile(("background", gsparams, pixel_scale),
+                               lambda: _make_background_psf_profile(gsparams, pixel_scale))
+
+
+def _make_background_psf_profile(gsparams,
+                                 pixel_scale):
+
     prof = galsim.OpticalPSF(lam=725,  # nm
                              diam=1.2,  # m
                              scale_unit=galsim.degrees,
@@ -138,7 +195,7 @@ def get_psf_profile(n,
         return get_background_psf_profile(pixel_scale=pixel_scale, gsparams=gsparams)
 
     if model_psf_file_name is not None:
-        qualified_model_filename = find_file(model_psf_file_name, workdir)
+        qualified_model_filename = resolve_file(model_psf_file_name, workdir)
         return load_psf_model_from_file(qualified_model_filename, model_psf_scale, model_psf_offset, gsparams=gsparams)
 
     diffs = np.abs(allowed_zs - z)
@@ -154,6 +211,45 @@ def get_psf_profile(n,
     return load_psf_model_from_sed_z(sed, allowed_zs[zi_best], gsparams=gsparams, data_dir=data_dir)
 
 
+def _draw_psf_stamp(psf_profile,
+                    stamp_size,
+                    scale):
+    """Draws an image of a PSF profile. If the profile was loaded through the on-disk PSF cache, the image is stored
+       in the cache too.
+    """
+
+    def draw_psf_stamp():
+        # Draw the profile onto an image of the proper size
+        psf_image = galsim.ImageF(stamp_size, stamp_size, scale=scale)
+        psf_profile.drawImage(psf_image, method='no_pixel')
+        return psf_image.array
+
+    psf_cache = get_psf_cache()
+    profile_and_key = _psf_profile_cache_keys.get(id(psf_profile))
+
+    if psf_cache is not None and profile_and_key is not None and profile_and_key[0] is psf_profile:
+        return psf_cache.get_stamp(("stamp", profile_and_key[1], stamp_size, scale), draw_psf_stamp)
+
+    return draw_psf_stamp()
+
+
+@lru_cache()
+def get_psf_image_and_hash(psf_profile,
+                           stamp_size=mv.default_psf_stamp_size,
+                           scale=mv.default_pixel_scale / mv.default_psf_scale_factor,):
+    """Gets the image of a PSF profile, along with a hash of its contents, which is used as the key of the image in a
+       PSF archive. Each is only drawn and hashed once for each profile, stamp size, and scale.
+    """
+
+    psf_data = _draw_psf_stamp(psf_profile, stamp_size, scale)
+
+    hasher = hashlib.sha1()
+    hasher.update(str((psf_data.dtype.str, psf_data.shape, float(scale))).encode())
+    hasher.update(np.ascontiguousarray(psf_data).tobytes())
+
+    return hasher.hexdigest(), psf_data
+
+
 @lru_cache()
 def create_psf_hdu(psf_profile,
                    stamp_size=mv.default_psf_stamp_size,
@@ -161,40 +257,154 @@ def create_psf_hdu(psf_profile,
     """Creates an HDU of an image of a PSF profile.
     """
 
-    # Draw the profile onto an image of the proper size
-    psf_image = galsim.ImageF(stamp_size, stamp_size, scale=scale)
-    psf_profile.drawImage(psf_image, method='no_pixel')
+    _, psf_data = get_psf_image_and_hash(psf_profile=psf_profile,
+                                         stamp_size=stamp_size,
+                                         scale=scale)
 
     # Set up an image HDU with this image
-    psf_hdu = fits.ImageHDU(data=psf_image.array)
+    psf_hdu = fits.ImageHDU(data=psf_data)
 
     # Return
     return psf_hdu
 
 
+def get_psf_image_hash(psf_profile,
+                       stamp_size=mv.default_psf_stamp_size,
+                       scale=mv.default_pixel_scale / mv.default_psf_scale_factor,):
+    """Gets a hash of the contents of the image of a PSF profile created by create_psf_hdu, which is used as the key
+       of the image in a PSF archive.
+    """
+
+    psf_hash, _ = get_psf_image_and_hash(psf_profile=psf_profile,
+                                         stamp_size=stamp_size,
+                                         scale=scale)
+
+    return psf_hash
+
+
+def _get_psf_archive_key(galaxy_id, exposure_index, psf_type):
+    return str(galaxy_id) + "_" + str(exposure_index) + "_" + psf_type
+
+
+def _get_psf_reference_keys(archive_filehandle):
+    """Gets the keys of all entries in an archive which refer to a PSF image.
+    """
+    return [dataset_key for dataset_key in archive_filehandle if dataset_key != psf_images_group_name]
+
+
+def _add_psf_image_to_archive(archive_filehandle, psf_hash, data, scale):
+    """Stores a PSF image in an archive, unless an image with the same hash is already stored.
+    """
+
+    psf_images_group = archive_filehandle.require_group(psf_images_group_name)
+    if psf_hash not in psf_images_group:
+        psf_image_dataset = psf_images_group.create_dataset(psf_hash, data=data)
+        psf_image_dataset.attrs[SCALE_LABEL] = scale
+
+    return
+
+
+def _add_psf_reference_to_archive(archive_filehandle, dataset_key, attrs):
+    """Adds an entry to an archive which refers to a stored PSF image through its hash attribute.
+    """
+
+    psf_dataset = archive_filehandle.create_dataset(dataset_key, data=h5py.Empty("f4"))
+    for attr_key in attrs:
+        psf_dataset.attrs[attr_key] = attrs[attr_key]
+
+    return
+
+
 def add_psf_to_archive(psf_profile,
                        archive_filehandle,
                        galaxy_id,
                        exposure_index,
                        psf_type,
                        stamp_size=mv.default_psf_stamp_size,
-                       scale=mv.default_pixel_scale / mv.default_psf_scale_factor):
-    """Creates a PSF HDU and saves it to an archive file.
+                       scale=mv.default_pixel_scale / mv.default_psf_scale_factor,
+                       image_id=None):
+    """Draws an image of a PSF and saves it to an archive file. If image_id is given, it's stored with the PSF so that
+       PSFs from detectors which weren't completed can be pruned when resuming.
+
+       Each distinct PSF image is only stored once, keyed by the hash of its contents, and the entry for the galaxy,
+       exposure, and PSF type only refers to it.
     """
 
-    # Create the HDU
-    psf_hdu = create_psf_hdu(psf_profile=psf_profile,
-                             stamp_size=stamp_size,
-                             scale=scale)
+    # Get the image, which is only drawn the first time it's needed for this profile
+    psf_hash, psf_data = get_psf_image_and_hash(psf_profile=psf_profile,
+                                                stamp_size=stamp_size,
+                                                scale=scale)
+
+    _add_psf_image_to_archive(archive_filehandle, psf_hash, psf_data, scale)
 
-    psf_dataset = archive_filehandle.create_dataset(str(galaxy_id) + "_" + str(exposure_index) + "_" + psf_type,
-                                                    data=psf_hdu.data)
+    # Add needed keywords to the attributes of the reference to the image
+    attrs = {gal_id_label: galaxy_id,
+             exposure_index_label: exposure_index,
+             SCALE_LABEL: scale,
+             type_label: psf_type,
+             hash_label: psf_hash}
+    if image_id is not None:
+        attrs[image_id_label] = image_id
 
-    # Add needed keywords to the attributes of this dataset
-    psf_dataset.attrs[gal_id_label] = galaxy_id
-    psf_dataset.attrs[exposure_index_label] = exposure_index
-    psf_dataset.attrs[SCALE_LABEL] = scale
-    psf_dataset.attrs[type_label] = psf_type
+    _add_psf_reference_to_archive(archive_filehandle, _get_psf_archive_key(galaxy_id, exposure_index, psf_type),
+                                  attrs)
+
+    return
+
+
+def get_psf_archive_entries(archive_filehandle):
+    """Gets the contents of an archive, so that they can be added to another with add_psf_archive_entries. Returns
+       a dict of the data of each stored image, keyed by hash, and a list of the key and attributes of each reference
+       to them.
+    """
+
+    psf_images = {}
+    if psf_images_group_name in archive_filehandle:
+        psf_images_group = archive_filehandle[psf_images_group_name]
+        for psf_hash in psf_images_group:
+            psf_image_dataset = psf_images_group[psf_hash]
+            psf_images[psf_hash] = (psf_image_dataset[:, :], psf_image_dataset.attrs[SCALE_LABEL])
+
+    psf_references = []
+    for dataset_key in _get_psf_reference_keys(archive_filehandle):
+        psf_references.append((dataset_key, dict(archive_filehandle[dataset_key].attrs)))
+
+    return psf_images, psf_references
+
+
+def add_psf_archive_entries(archive_filehandle, psf_images, psf_references):
+    """Adds entries returned by get_psf_archive_entries to an archive. Images already stored in it aren't
+       duplicated.
+    """
+
+    for psf_hash in psf_images:
+        data, scale = psf_images[psf_hash]
+        _add_psf_image_to_archive(archive_filehandle, psf_hash, data, scale)
+
+    for dataset_key, attrs in psf_references:
+        _add_psf_reference_to_archive(archive_filehandle, dataset_key, attrs)
+
+    return
+
+
+def prune_psf_archive(archive_filehandle, image_ids):
+    """Removes all PSFs from an archive except those stored for the given image IDs, along with any stored images
+       which are no longer referred to.
+    """
+
+    used_psf_hashes = set()
+    for dataset_key in _get_psf_reference_keys(archive_filehandle):
+        attrs = archive_filehandle[dataset_key].attrs
+        if attrs.get(image_id_label) not in image_ids:
+            del archive_filehandle[dataset_key]
+        else:
+            used_psf_hashes.add(attrs[hash_label])
+
+    if psf_images_group_name in archive_filehandle:
+        psf_images_group = archive_filehandle[psf_images_group_name]
+        for psf_hash in list(psf_images_group):
+            if psf_hash not in used_psf_hashes:
+                del psf_images_group[psf_hash]
 
     return
 
@@ -204,9 +414,10 @@ def get_psf_from_archive(archive_filehandle,
                          exposure_index,
                          psf_type):
 
-    dataset = archive_filehandle[str(galaxy_id) + "_" + str(exposure_index) + "_" + psf_type]
+    dataset = archive_filehandle[_get_psf_archive_key(galaxy_id, exposure_index, psf_type)]
+    psf_image_dataset = archive_filehandle[psf_images_group_name][dataset.attrs[hash_label]]
 
-    psf_image = galsim.ImageF(dataset[:, :], scale=dataset.attrs[SCALE_LABEL])
+    psf_image = galsim.ImageF(psf_image_dataset[:, :], scale=dataset.attrs[SCALE_LABEL])
 
     return psf_image
 
@@ -218,12 +429,31 @@ def sort_psfs_from_archive(psf_table,
                            output_psf_filename=None,
                            stamp_size=mv.default_psf_stamp_size,
                            scale=mv.psf_model_scale,
-                           workdir="."):
+                           workdir=".",
+                           layout=psf_extensions_layout):
+    """Writes the PSF table and the PSF images for one exposure to the output PSF file, either in an extension for
+       each galaxy's bulge and disk PSF, or with layout psf_cube_layout, in a single cube (see write_psf_cube).
+    """
 
     logger.debug("Entering sort_psfs_from_archive")
 
     qualified_psf_data_filename = join(workdir, psf_data_filename)
 
+    if layout == psf_cube_layout:
+        write_psf_cube(psf_table=psf_table,
+                       qualified_psf_data_filename=qualified_psf_data_filename,
+                       exposure_index=exposure_index,
+                       archive_filehandle=archive_filehandle,
+                       output_psf_filename=output_psf_filename,
+                       stamp_size=stamp_size,
+                       scale=scale,
+                       workdir=workdir)
+        logger.debug("Exiting sort_psfs_from_archive")
+        return
+    elif layout != psf_extensions_layout:
+        raise ValueError("Invalid PSF output layout '" + str(layout) + "'. Allowed layouts are: " +
+                         str(allowed_psf_output_layouts) + ".")
+
     psf_table_hdu = table_to_hdu(psf_table)
     data_hdulist = fits.open(qualified_psf_data_filename, mode='append')
     data_hdulist.append(psf_table_hdu)
@@ -235,7 +465,7 @@ def sort_psfs_from_archive(psf_table,
 
     # If we're using a single output PSF for all galaxies, use optimisations
     if output_psf_filename != None and output_psf_filename != 'None':
-        qualified_output_psf_filename = find_file(output_psf_filename, workdir)
+        qualified_output_psf_filename = resolve_file(output_psf_filename, workdir)
         psf_profile = load_psf_model_from_file(qualified_output_psf_filename,
                                                scale=scale,
                                                offset=mv.default_psf_center_offset)
@@ -268,7 +498,12 @@ def sort_psfs_from_archive(psf_table,
     # Otherwise, sort from the archive
     else:
 
-        for dataset_key in archive_filehandle:
+        psf_images_group = archive_filehandle.get(psf_images_group_name)
+
+        # Read each stored image only once, however many galaxies refer to it
+        psf_image_data = {}
+
+        for dataset_key in _get_psf_reference_keys(archive_filehandle):
 
             dataset = archive_filehandle[dataset_key]
 
@@ -279,8 +514,12 @@ def sort_psfs_from_archive(psf_table,
 
             gal_id = dataset.attrs[gal_id_label]
 
+            psf_hash = dataset.attrs[hash_label]
+            if psf_hash not in psf_image_data:
+                psf_image_data[psf_hash] = psf_images_group[psf_hash][:, :]
+
             # Set up the hdu
-            psf_hdu = fits.ImageHDU(data=dataset[:, :])
+            psf_hdu = fits.ImageHDU(data=psf_image_data[psf_hash])
             psf_hdu.header[gal_id_label] = dataset.attrs[gal_id_label]
             psf_hdu.header[exposure_index_label] = dataset.attrs[exposure_index_label]
             psf_hdu.header[SCALE_LABEL] = dataset.attrs[SCALE_LABEL]
@@ -312,3 +551,123 @@ def sort_psfs_from_archive(psf_table,
     logger.debug("Exiting sort_psfs_from_archive")
 
     return
+
+
+def write_psf_cube(psf_table,
+                   qualified_psf_data_filename,
+                   exposure_index,
+                   archive_filehandle=None,
+                   output_psf_filename=None,
+                   stamp_size=mv.default_psf_stamp_size,
+                   scale=mv.psf_model_scale,
+                   workdir="."):
+    """Writes the PSF table and the PSF images for one exposure to the output PSF file as a table extension followed
+       by a single 3D image extension (EXTNAME PSF_CUBE) holding each distinct PSF image once. The bulge and disk
+       index columns of the table give the index of each galaxy's PSFs along the first axis of the cube. If PSFs are
+       taken from the archive, the pixel scale recorded is that of the archived images.
+    """
+
+    if output_psf_filename is not None and output_psf_filename != 'None':
+
+        # All galaxies share a single PSF
+        qualified_output_psf_filename = resolve_file(output_psf_filename, workdir)
+        psf_profile = load_psf_model_from_file(qualified_output_psf_filename,
+                                               scale=scale,
+                                               offset=mv.default_psf_center_offset)
+        psf_cube = create_psf_hdu(psf_profile=psf_profile,
+                                  stamp_size=stamp_size,
+                                  scale=scale).data[np.newaxis, :, :]
+
+        bulge_indices = np.zeros(len(psf_table), dtype=psf_table[pstf.bulge_index].dtype)
+        disk_indices = np.zeros(len(psf_table), dtype=psf_table[pstf.disk_index].dtype)
+
+    else:
+
+        bulge_indices = np.array(psf_table[pstf.bulge_index])
+        disk_indices = np.array(psf_table[pstf.disk_index])
+
+        row_indices = dict(zip(psf_table[pstf.ID].tolist(), range(len(psf_table))))
+
+        psf_images_group = archive_filehandle.get(psf_images_group_name)
+        plane_indices = {}
+        psf_planes = []
+
+        for dataset_key in _get_psf_reference_keys(archive_filehandle):
+
+            attrs = archive_filehandle[dataset_key].attrs
+
+            if attrs[exposure_index_label] != exposure_index:
+                continue
+
+            # Add each distinct image to the cube the first time it's referred to
+            psf_hash = attrs[hash_label]
+            if psf_hash not in plane_indices:
+                plane_indices[psf_hash] = len(psf_planes)
+                psf_planes.append(psf_images_group[psf_hash][:, :])
+
+            row_index = row_indices[int(attrs[gal_id_label])]
+            if attrs[type_label] == "bulge":
+                bulge_indices[row_index] = plane_indices[psf_hash]
+            else:
+                disk_indices[row_index] = plane_indices[psf_hash]
+
+        if len(psf_planes) > 0:
+            psf_cube = np.stack(psf_planes)
+            scale = psf_images_group[next(iter(plane_indices))].attrs[SCALE_LABEL]
+        else:
+            psf_cube = np.zeros((0, stamp_size, stamp_size), dtype=np.float32)
+
+    psf_table[pstf.bulge_index] = bulge_indices
+    psf_table[pstf.disk_index] = disk_indices
+
+    psf_table_hdu = table_to_hdu(psf_table)
+    psf_table_hdu.header[layout_label] = psf_cube_layout
+
+    psf_cube_hdu = fits.ImageHDU(data=psf_cube)
+    psf_cube_hdu.header['EXTNAME'] = psf_cube_extname
+    psf_cube_hdu.header[exposure_index_label] = exposure_index
+    psf_cube_hdu.header[SCALE_LABEL] = scale
+    psf_cube_hdu.header[layout_label] = psf_cube_layout
+
+    data_hdulist = fits.open(qualified_psf_data_filename, mode='append')
+    data_hdulist.append(psf_table_hdu)
+    data_hdulist.append(psf_cube_hdu)
+    data_hdulist.flush()
+    data_hdulist.close()
+
+    return
+
+
+def read_psf_cube(psf_data_filename, workdir="."):
+    """Reads a PSF file written by write_psf_cube. The cube is memory-mapped, so only the PSF images which are used
+       are read from disk. Returns the PSF table, the cube, and the pixel scale of its images.
+    """
+
+    with fits.open(join(workdir, psf_data_filename), mode='readonly', memmap=True) as data_hdulist:
+
+        if data_hdulist[1].header.get(layout_label) != psf_cube_layout:
+            raise ValueError("PSF file " + psf_data_filename + " wasn't written with the " + psf_cube_layout +
+                             " layout.")
+
+        psf_table = table.Table.read(data_hdulist[1])
+        psf_cube_hdu = data_hdulist[psf_cube_extname]
+        psf_cube = psf_cube_hdu.data
+        scale = psf_cube_hdu.header[SCALE_LABEL]
+
+    return psf_table, psf_cube, scale
+
+
+def get_psf_from_cube(psf_table, psf_cube, galaxy_id, psf_type, scale):
+    """Gets the image of a galaxy's bulge or disk PSF from a table and cube returned by read_psf_cube.
+    """
+
+    row = psf_table[psf_table[pstf.ID] == galaxy_id]
+    if len(row) == 0:
+        raise KeyError("Galaxy " + str(galaxy_id) + " isn't in the PSF table.")
+
+    if psf_type == "bulge":
+        plane_index = row[pstf.bulge_index][0]
+    else:
+        plane_index = row[pstf.disk_index][0]
+
+    return galsim.ImageF(np.array(psf_cube[plane_index]), scale=scale)
@@ -0,0 +1,318 @@
+""" @file psf_cache.py
+
+    Created 18 Oct 2026
+
+    A persistent on-disk cache of prepared PSF profiles and the stamps drawn from them, so that new processes don't
+    need to prepare them again.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from functools import lru_cache
+import hashlib
+import os
+import pickle
+import stat
+
+from SHE_PPT.logging import getLogger
+import galsim
+
+import SHE_GST
+import numpy as np
+
+
+logger = getLogger(__name__)
+
+CACHE_VERSION = 1
+
+PROFILE_EXTENSION = ".pkl"
+STAMP_EXTENSION = ".npy"
+
+# Permissions of entries written to the cache, which mustn't be writable by anyone else
+ENTRY_MODE = stat.S_IRUSR | stat.S_IWUSR | stat.S_IRGRP | stat.S_IROTH
+CACHE_DIR_MODE = stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH
+
+# The cache used by the psf module, if any, set up by set_psf_cache
+_psf_cache = None
+
+
+def _is_private(file_stat):
+    """ Checks whether a file or directory is owned by the current user and can't be written by anyone else.
+    """
+    return file_stat.st_uid == os.geteuid() and not file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+@lru_cache()
+def _get_file_checksum(qualified_filename, mtime, size):
+    """ Gets the checksum of a file's contents. The modification time and size are only used so that the cached
+        checksum is recalculated if the file changes.
+    """
+
+    hasher = hashlib.sha1()
+    with open(qualified_filename, 'rb') as fi:
+        for block in iter(lambda: fi.read(1 << 20), b''):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+def get_file_checksum(qualified_filename):
+    """
+        @brief Gets the checksum of a file's contents, which is only calculated again if the file changes.
+
+        @param qualified_filename
+            <str> Fully-qualified name of the file
+
+        @returns checksum
+            <str>
+    """
+
+    stat = os.stat(qualified_filename)
+
+    return _get_file_checksum(qualified_filename, stat.st_mtime_ns, stat.st_size)
+
+
+class PSFCache(object):
+    """
+        @brief Stores prepared PSF profiles and PSF stamps in a directory, bounded in total size.
+
+        @details Each entry is a file named from a hash of its key, along with the version of the cache, of GalSim,
+            and of SHE_GST, so entries from other versions are never used. Keys should contain everything the entry
+            depends on, e.g. the checksum of the file a profile is read from, its scale and offset, and its GSParams.
+            Profiles are stored with pickle, so they keep anything GalSim keeps when pickling them (such as the
+            stepk and maxk of an InterpolatedImage), and stamps as NumPy arrays.
+
+            Entries are written to a temporary file and moved into place once complete, so concurrent processes
+            can share a cache directory. Reading an entry updates its modification time, and when the total size of
+            the entries exceeds the limit, the least recently used are removed.
+
+            Unpickling a file can run arbitrary code, so profiles are only read from the cache if both the cache
+            directory and the entry are owned by the current user and can't be written by anyone else. Otherwise, a
+            warning is logged and profiles are made without the cache. Stamps are read without unpickling, so they
+            don't need this check.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """
+            @param cache_dir
+                <str> The directory to store entries in
+            @param max_size
+                <int> The maximum total size of the entries in bytes
+        """
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self._warned_untrusted = False
+
+    def _get_entry_filename(self, key, extension):
+
+        full_key = repr((CACHE_VERSION, galsim.__version__, SHE_GST.__version__, key))
+
+        return os.path.join(self.cache_dir, hashlib.sha1(full_key.encode()).hexdigest() + extension)
+
+    def _read(self, qualified_filename, read_entry):
+        """ Reads an entry, returning None if it doesn't exist or can't be read.
+        """
+
+        try:
+            value = read_entry(qualified_filename)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("PSF cache entry " + qualified_filename + " is unreadable (" + str(e) + "); replacing it.")
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(qualified_filename)
+        except OSError:
+            pass
+
+        return value
+
+    def _write(self, qualified_filename, write_entry):
+        """ Writes an entry to a temporary file and moves it into place, then evicts entries if necessary.
+        """
+
+        temp_filename = qualified_filename + ".tmp" + str(os.getpid())
+        try:
+            os.makedirs(self.cache_dir, mode=CACHE_DIR_MODE, exist_ok=True)
+            write_entry(temp_filename)
+            os.chmod(temp_filename, ENTRY_MODE)
+            os.replace(temp_filename, qualified_filename)
+        except OSError as e:
+            logger.warning("Can't write PSF cache entry " + qualified_filename + ": " + str(e))
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+            return
+
+        self.evict()
+
+        return
+
+    def get_profile(self, key, make_profile):
+        """
+            @brief Gets a prepared PSF profile from the cache, or makes and stores it if it isn't there.
+
+            @param key
+                <tuple> Key of the profile, whose repr must be the same for the same profile in any process
+            @param make_profile
+                <callable> Function which takes no arguments and returns the profile
+
+            @returns profile
+                <galsim.GSObject>
+        """
+
+        if not self._is_cache_dir_trusted():
+            return make_profile()
+
+        qualified_filename = self._get_entry_filename(key, PROFILE_EXTENSION)
+
+        def read_profile(filename):
+            with open(filename, 'rb') as fi:
+                # Check the file we've opened, so it can't be swapped for another after the check
+                if not _is_private(os.fstat(fi.fileno())):
+                    raise ValueError("it isn't owned by this user or is writable by others, so won't be unpickled")
+                return pickle.load(fi)
+
+        profile = self._read(qualified_filename, read_profile)
+        if profile is not None:
+            return profile
+
+        profile = make_profile()
+
+        # Make sure anything which is kept when pickling is prepared before the profile is stored
+        profile.stepk
+        profile.maxk
+
+        def write_profile(filename):
+            with open(filename, 'wb') as fo:
+                pickle.dump(profile, fo, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write(qualified_filename, write_profile)
+
+        return profile
+
+    def _is_cache_dir_trusted(self):
+        """ Checks that profiles can safely be read from and written to the cache directory, warning once if not.
+        """
+
+        try:
+            if _is_private(os.stat(self.cache_dir)):
+                return True
+        except FileNotFoundError:
+            # It'll be created by this user when the first entry is written
+            return True
+
+        if not self._warned_untrusted:
+            logger.warning("PSF cache directory " + self.cache_dir + " isn't owned by this user or is writable by " +
+                           "others, so PSF profiles won't be cached in it.")
+            self._warned_untrusted = True
+
+        return False
+
+    def get_stamp(self, key, make_stamp):
+        """
+            @brief Gets a PSF stamp from the cache, or makes and stores it if it isn't there.
+
+            @param key
+                <tuple> Key of the stamp, whose repr must be the same for the same stamp in any process
+            @param make_stamp
+                <callable> Function which takes no arguments and returns the stamp
+
+            @returns stamp
+                <np.ndarray>
+        """
+
+        qualified_filename = self._get_entry_filename(key, STAMP_EXTENSION)
+
+        def read_stamp(filename):
+            with open(filename, 'rb') as fi:
+                return np.load(fi, allow_pickle=False)
+
+        stamp = self._read(qualified_filename, read_stamp)
+        if stamp is not None:
+            return stamp
+
+        stamp = make_stamp()
+
+        def write_stamp(filename):
+            with open(filename, 'wb') as fo:
+                np.save(fo, stamp, allow_pickle=False)
+
+        self._write(qualified_filename, write_stamp)
+
+        return stamp
+
+    def evict(self):
+        """
+            @brief Removes the least recently used entries until their total size is within the limit.
+        """
+
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not (filename.endswith(PROFILE_EXTENSION) or filename.endswith(STAMP_EXTENSION)):
+                continue
+            qualified_filename = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(qualified_filename)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, qualified_filename))
+
+        total_size = sum([size for _, size, _ in entries])
+
+        for _, size, qualified_filename in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(qualified_filename)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+        return
+
+
+def set_psf_cache(cache_dir, max_size_mb):
+    """
+        @brief Sets up the on-disk cache used when preparing PSF profiles and drawing PSF stamps.
+
+        @param cache_dir
+            <str> The directory to cache PSFs in, or None to not cache them on disk
+        @param max_size_mb
+            <float> The maximum total size of the cache in MB
+    """
+    global _psf_cache
+
+    if cache_dir is None or cache_dir == 'None':
+        _psf_cache = None
+    else:
+        _psf_cache = PSFCache(cache_dir, int(max_size_mb * 1024 ** 2))
+
+    return
+
+
+def get_psf_cache():
+    """
+        @brief Gets the on-disk cache set up by set_psf_cache.
+
+        @returns psf_cache
+            <PSFCache> The cache, or None if PSFs aren't being cached on disk
+    """
+
+    return _psf_cache
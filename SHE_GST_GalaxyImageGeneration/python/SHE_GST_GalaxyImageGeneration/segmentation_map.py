@@ -5,7 +5,7 @@
     Functions to generate mock segmentation maps.
 """
 
-__updated__ = "2021-04-23"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -28,18 +28,6 @@ import galsim
 import numpy as np
 
 
-def get_seg_ID():
-
-    seg_ID = 1
-
-    while True:
-        yield seg_ID
-        seg_ID += 1
-
-
-seg_ID_gen = get_seg_ID()
-
-
 def make_segmentation_map(noisefree_image,
                           detections_table,
                           wcs,
@@ -91,6 +79,13 @@ def make_segmentation_map(noisefree_image,
 
     r_max_factor_scaled = r_max_factor / scale
 
+    # New seg_IDs follow on from any already in this detector's table, so they don't depend on what other detectors
+    # have been generated in this process
+    if len(detections_table) > 0:
+        next_seg_ID = max(int(np.max(detections_table[detf.seg_ID])), 0) + 1
+    else:
+        next_seg_ID = 1
+
     for i in range(len(sorted_dtc_table)):
 
         # Get the seg_ID from the table if it's already been set
@@ -99,7 +94,8 @@ def make_segmentation_map(noisefree_image,
             seg_ID = table_seg_ID
         else:
             # Not set, so generate a new one
-            seg_ID = next(seg_ID_gen)
+            seg_ID = next_seg_ID
+            next_seg_ID += 1
 
         # For each object, look for pixels near it above the threshold value
         gal_xy = wcs.toImage(galsim.PositionD(float(sorted_dtc_table[detf.gal_x_world][i]),
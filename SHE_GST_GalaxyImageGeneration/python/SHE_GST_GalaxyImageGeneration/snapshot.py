@@ -0,0 +1,165 @@
+""" @file snapshot.py
+
+    Created 18 Oct 2026
+
+    Snapshots of the physical model for each image, so that the same galaxies can be rendered again with different
+    settings (e.g. PSF, dithering, or noise) without being regenerated.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import json
+import os
+
+import SHE_GST
+from EL_PythonUtils.utilities import hash_any
+from SHE_PPT.logging import getLogger
+from .config.config_default import allowed_survey_settings
+
+
+snapshot_hash_maxlen = 32  # Long enough that different models won't collide
+
+# Options which change which galaxies are drawn, or how they're grouped and rotated
+population_option_names = ('galaxies_per_group',
+                           'magnitude_limit',
+                           'mode',
+                           'num_target_galaxies',
+                           'render_background_galaxies',
+                           'shape_noise_cancellation',)
+
+population_extension = ".json"
+
+
+def get_snapshot_filename(image_phl, options):
+    """
+        @brief Gets the name of the snapshot file for an image.
+
+        @details The name is built from a hash of everything which determines the image's galaxy population: the
+            generation level and setting of each survey parameter, the options which choose and arrange the galaxies
+            to be drawn, the position of the image in the hierarchy, its seed, and the SHE_GST version. Options which
+            only affect how galaxies are rendered don't affect it, so runs which differ only in those share snapshots.
+
+        @param image_phl
+            <SHE_GST_PhysicalModel.Image> The Image-level object for the image
+        @param options
+            <dict> The options dictionary for this run
+
+        @returns qualified_snapshot_filename
+            <str> Fully-qualified name of the snapshot file, or None if options['snapshot_dir'] isn't set
+    """
+
+    if options['snapshot_dir'] is None or options['snapshot_dir'] == 'None':
+        return None
+
+    model = {}
+    for allowed_survey_setting in allowed_survey_settings:
+        model[allowed_survey_setting + "_level"] = image_phl.get_generation_level(allowed_survey_setting)
+        param_settings = image_phl.get_param(allowed_survey_setting).get_params()
+        model[allowed_survey_setting + "_setting"] = (param_settings.name() + " " +
+                                                      param_settings.get_parameters_string())
+
+    population_options = [options[option_name] for option_name in population_option_names]
+
+    snapshot_hash = hash_any((model, population_options, list(image_phl.get_ID_seq()), image_phl.get_seed(),
+                              SHE_GST.__version__),
+                             format = "base64")
+    snapshot_hash_fn = snapshot_hash[0:snapshot_hash_maxlen].replace('.', '-').replace('+', '-').replace('/', '-')
+
+    return os.path.join(options['snapshot_dir'], "GST-SNAPSHOT-" + snapshot_hash_fn + ".bin")
+
+
+def load_snapshot(image_phl, qualified_snapshot_filename):
+    """
+        @brief Restores an image and its galaxies from a snapshot, if one exists.
+
+        @param image_phl
+            <SHE_GST_PhysicalModel.Image> The Image-level object to restore
+        @param qualified_snapshot_filename
+            <str> Fully-qualified name of the snapshot file, or None to not use snapshots
+
+        @returns population
+            <dict> The description of the galaxy population saved with the snapshot, or None if there's no snapshot
+            to load. If None, image_phl is unchanged
+    """
+
+    if qualified_snapshot_filename is None:
+        return None
+
+    qualified_population_filename = qualified_snapshot_filename + population_extension
+    if not (os.path.exists(qualified_snapshot_filename) and os.path.exists(qualified_population_filename)):
+        return None
+
+    with open(qualified_population_filename, 'r') as fi:
+        population = json.load(fi)
+
+    image_phl.load_snapshot(qualified_snapshot_filename)
+
+    getLogger(__name__).info("Loaded physical model for image " + str(image_phl.get_full_ID()) +
+                             " from snapshot " + qualified_snapshot_filename + ".")
+
+    return population
+
+
+def _write_atomically(qualified_filename, write):
+    """ Writes a file to a temporary file and moves it into place once complete.
+    """
+
+    temp_filename = qualified_filename + ".tmp" + str(os.getpid())
+    write(temp_filename)
+    os.replace(temp_filename, qualified_filename)
+
+    return
+
+
+def save_snapshot(image_phl, qualified_snapshot_filename, population):
+    """
+        @brief Saves a snapshot of an image and its galaxies, unless one already exists.
+
+        @details The snapshot should be taken once the population of galaxies is final, so that it contains every
+            galaxy which will be drawn and any adjustments made to them. Parameters which haven't been generated
+            yet aren't generated here; they'll be generated in the same way after the snapshot is loaded. The
+            population description is saved alongside the snapshot in a JSON file. Both are written to temporary
+            files and moved into place once complete, so concurrent runs can share a snapshot directory.
+
+        @param image_phl
+            <SHE_GST_PhysicalModel.Image> The Image-level object to save
+        @param qualified_snapshot_filename
+            <str> Fully-qualified name of the snapshot file, or None to not use snapshots
+        @param population
+            <dict> Description of the galaxy population which isn't stored in the physical model (e.g. the order
+            galaxies are drawn in), which must be serialisable to JSON
+    """
+
+    if qualified_snapshot_filename is None:
+        return
+
+    qualified_population_filename = qualified_snapshot_filename + population_extension
+    if os.path.exists(qualified_snapshot_filename) and os.path.exists(qualified_population_filename):
+        return
+
+    os.makedirs(os.path.split(qualified_snapshot_filename)[0], exist_ok = True)
+
+    def write_population(filename):
+        with open(filename, 'w') as fo:
+            json.dump(population, fo)
+
+    _write_atomically(qualified_population_filename, write_population)
+    _write_atomically(qualified_snapshot_filename, image_phl.save_snapshot)
+
+    getLogger(__name__).info("Saved physical model for image " + str(image_phl.get_full_ID()) +
+                             " to snapshot " + qualified_snapshot_filename + ".")
+
+    return
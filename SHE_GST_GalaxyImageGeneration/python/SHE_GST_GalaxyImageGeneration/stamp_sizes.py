@@ -0,0 +1,187 @@
+""" @file stamp_sizes.py
+
+    Created 18 Oct 2026
+
+    Functions to choose sizes for galaxy stamps which are efficient to draw, and to record the choices made.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from bisect import bisect_left
+
+from astropy import table
+import galsim
+
+import numpy as np
+
+
+MAX_GOOD_STAMP_SIZE = 2 ** 16
+
+# Names of the columns each galaxy's stamp size and FFT grid size are recorded in, in the details table
+STAMP_SIZE_COLNAME = "SHE_GST_STAMP_SIZE"
+FFT_SIZE_COLNAME = "SHE_GST_FFT_SIZE"
+
+
+def _get_good_stamp_sizes(max_size):
+    """ Gets all even numbers up to max_size with no prime factors other than 2, 3, and 5, in increasing order.
+    """
+
+    sizes = []
+    power_of_2 = 2
+    while power_of_2 <= max_size:
+        power_of_3 = power_of_2
+        while power_of_3 <= max_size:
+            size = power_of_3
+            while size <= max_size:
+                sizes.append(size)
+                size *= 5
+            power_of_3 *= 3
+        power_of_2 *= 2
+
+    return sorted(sizes)
+
+
+good_stamp_sizes = _get_good_stamp_sizes(MAX_GOOD_STAMP_SIZE)
+
+
+def get_good_stamp_size(min_size):
+    """
+        @brief Gets the smallest size of the form 2^a * 3^b * 5^c (a >= 1) which is at least min_size.
+
+        @param min_size
+            <int> The minimum size of the stamp in pixels
+
+        @returns stamp_size
+            <int> The chosen size, or min_size itself if it's larger than any size in the table
+    """
+
+    i = bisect_left(good_stamp_sizes, min_size)
+    if i == len(good_stamp_sizes):
+        return int(min_size)
+    return good_stamp_sizes[i]
+
+
+def get_fft_size(profile, stamp_size, method = 'auto'):
+    """
+        @brief Gets the size of the grid GalSim will use to draw a profile onto a stamp with pixel scale 1 by FFT.
+
+        @details This follows GalSim's choice in drawFFT: the size suggested by the profile's stepk, enlarged to cover
+            the stamp if necessary, then rounded up to a size it can transform efficiently.
+
+        @param profile
+            <galsim.GSObject> The profile to be drawn
+        @param stamp_size
+            <int> The size of the stamp in pixels
+        @param method
+            <str> The method the profile will be drawn with
+
+        @returns fft_size
+            <int> The size of the FFT grid
+    """
+
+    if method != 'no_pixel':
+        profile = galsim.Convolve([profile, galsim.Pixel(scale = 1.0)], gsparams = profile.gsparams)
+
+    fft_size = galsim.Image.good_fft_size(max(profile.getGoodImageSize(1.0), stamp_size))
+
+    return max(fft_size, profile.gsparams.minimum_fft_size)
+
+
+class StampSizePlanner(object):
+    """
+        @brief Chooses the size of each galaxy's stamp, and records the sizes chosen.
+
+        @details Each stamp is enlarged from the minimum size needed to the next size with no prime factors larger
+            than 5, which can be drawn and transformed efficiently. The minimum size, the chosen size, and the size
+            of the FFT grid GalSim will use for the largest of the galaxy's components are recorded for each galaxy,
+            so the extra pixels drawn can be compared against the cost of the transforms.
+    """
+
+    def __init__(self):
+        self.galaxy_IDs = []
+        self.min_sizes = []
+        self.stamp_sizes = []
+        self.fft_sizes = []
+
+    def __len__(self):
+        return len(self.galaxy_IDs)
+
+    def plan(self, galaxy_ID, min_size, components, max_size = None):
+        """
+            @brief Chooses the size of a galaxy's stamp.
+
+            @param galaxy_ID
+                <int> ID of the galaxy
+            @param min_size
+                <int> The minimum size of the stamp in pixels
+            @param components
+                <list<(galsim.GSObject, str)>> The profile of each component to be drawn, and the method it will be
+                drawn with
+            @param max_size
+                <int> If not None, the size is limited to this
+
+            @returns stamp_size
+                <int> The chosen size in pixels
+        """
+
+        stamp_size = get_good_stamp_size(min_size)
+        if max_size is not None and stamp_size > max_size:
+            stamp_size = max_size
+
+        fft_size = max([get_fft_size(profile, stamp_size, method) for profile, method in components])
+
+        self.galaxy_IDs.append(galaxy_ID)
+        self.min_sizes.append(min_size)
+        self.stamp_sizes.append(stamp_size)
+        self.fft_sizes.append(fft_size)
+
+        return stamp_size
+
+    def get_table(self):
+        """
+            @brief Gets a table of the sizes recorded for each galaxy.
+
+            @returns plan_table
+                <astropy.table.Table> Table with columns ID, MIN_STAMP_SIZE, STAMP_SIZE, and FFT_SIZE
+        """
+
+        return table.Table([np.array(self.galaxy_IDs, dtype = np.int64),
+                            np.array(self.min_sizes, dtype = np.int32),
+                            np.array(self.stamp_sizes, dtype = np.int32),
+                            np.array(self.fft_sizes, dtype = np.int32)],
+                           names = ("ID", "MIN_STAMP_SIZE", "STAMP_SIZE", "FFT_SIZE"))
+
+    def get_summary(self):
+        """
+            @brief Gets a summary of the sizes recorded, for logging.
+
+            @returns summary
+                <str>
+        """
+
+        if len(self) == 0:
+            return "No stamp sizes planned."
+
+        min_area = np.sum(np.square(np.array(self.min_sizes, dtype = float)))
+        stamp_area = np.sum(np.square(np.array(self.stamp_sizes, dtype = float)))
+        fft_area = np.sum(np.square(np.array(self.fft_sizes, dtype = float)))
+
+        return ("Planned " + str(len(self)) + " stamps: " +
+                "mean size " + "%.1f" % np.mean(self.stamp_sizes) + " pixels (minimum " +
+                "%.1f" % np.mean(self.min_sizes) + "), " +
+                "%.1f" % (100. * (stamp_area / min_area - 1.)) + "% more stamp area than the minimum, " +
+                "mean FFT grid size " + "%.1f" % np.mean(self.fft_sizes) + " (" +
+                "%.1f" % (fft_area / stamp_area) + " times the stamp area).")
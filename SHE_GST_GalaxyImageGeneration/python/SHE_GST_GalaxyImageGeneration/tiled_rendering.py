@@ -0,0 +1,332 @@
+""" @file tiled_rendering.py
+
+    Created 17 Oct 2026
+
+    Functions to draw galaxy stamps onto an image, either serially or split into tiles which are rendered in
+    parallel processes.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from multiprocessing import RawArray, get_context
+
+from SHE_PPT.logging import getLogger
+import galsim
+
+from SHE_GST_GalaxyImageGeneration.utility.processes import get_num_processes
+import numpy as np
+
+
+logger = getLogger(__name__)
+
+# Ctypes codes for the shared buffers, for each image dtype we might draw onto
+_rawarray_typecodes = {np.dtype(np.float32): 'f',
+                       np.dtype(np.float64): 'd', }
+
+# Largest oversampling factor which will be used to draw all dithers at once
+MAX_DITHER_OVERSAMPLING = 4
+
+# Draw methods which can't be sampled from an oversampled draw, so are always drawn separately for each dither
+SEPARATE_DITHER_METHODS = ('phot', 'real_space')
+
+# Stamps, dither offsets, oversampling factor, and tile buffers shared with forked worker processes, set up by
+# draw_stamps
+_worker_stamps = None
+_worker_dither_offsets = None
+_worker_oversampling = None
+_worker_tiles = None
+
+
+class Stamp(object):
+    """
+        @brief Description of the profiles to be drawn onto the same bounds of each dither of an image.
+
+        @details Each component is a tuple of (profile, centre_offset, sp_shift, method). The offset used when drawing
+            is centre_offset + dither_offset + sp_shift, in that order. Components drawn by photon shooting use the
+            seed in photon_seeds for each dither, so they're drawn the same way however the stamps are split up.
+    """
+
+    def __init__(self, bounds, components, photon_seeds=None):
+        self.bounds = bounds
+        self.components = components
+        self.photon_seeds = photon_seeds
+
+
+class _Tile(object):
+    """
+        @brief A tile of an image, along with the stamps assigned to it and the shared buffers it's drawn onto.
+    """
+
+    def __init__(self, core_bounds):
+        self.core_bounds = core_bounds
+        self.buffer_bounds = core_bounds
+        self.stamp_indices = []
+        self.buffers = []
+        self.dtype = None
+
+    def get_buffer_images(self):
+        """ Gets a galsim.Image view of each dither's shared buffer.
+        """
+        images = []
+        ny = self.buffer_bounds.ymax - self.buffer_bounds.ymin + 1
+        nx = self.buffer_bounds.xmax - self.buffer_bounds.xmin + 1
+        for buffer in self.buffers:
+            array = np.frombuffer(buffer, dtype=self.dtype).reshape((ny, nx))
+            images.append(galsim.Image(array, xmin=self.buffer_bounds.xmin, ymin=self.buffer_bounds.ymin))
+        return images
+
+
+def get_dither_oversampling(dither_offsets, max_oversampling=MAX_DITHER_OVERSAMPLING):
+    """
+        @brief Gets the smallest factor by which pixels can be divided so that every dither offset lies on the
+            resulting sub-pixel lattice.
+
+        @param dither_offsets
+            <list<(float,float)>> The offset for each dither
+        @param max_oversampling
+            <int> The largest factor to try
+
+        @returns oversampling
+            <int> The oversampling factor, or None if no factor up to max_oversampling works
+    """
+
+    for oversampling in range(1, max_oversampling + 1):
+        scaled_offsets = np.array(dither_offsets, dtype=float) * oversampling
+        if np.allclose(scaled_offsets, np.round(scaled_offsets), rtol=0., atol=1e-6):
+            return oversampling
+
+    return None
+
+
+def _draw_stamp_oversampled(stamp, images, dither_offsets, oversampling):
+    """
+        @brief Draws a stamp onto each dither from a single draw at a finer pixel scale.
+
+        @details Each component is drawn once onto an image with pixels oversampling times smaller, which is sampled
+            at the positions of the centres of each dither's pixels. Components which are normally drawn with the
+            pixel response are convolved with a full-sized pixel for this draw, so each sample is what a separate
+            draw would give for that pixel. The draw is done by FFT, so components to be drawn with any of
+            SEPARATE_DITHER_METHODS mustn't be passed to this.
+    """
+
+    n = oversampling
+    lattice_offsets = [(int(round(x_offset * n)), int(round(y_offset * n))) for x_offset, y_offset in dither_offsets]
+    kx_min = min([kx for kx, _ in lattice_offsets])
+    kx_max = max([kx for kx, _ in lattice_offsets])
+    ky_min = min([ky for _, ky in lattice_offsets])
+    ky_max = max([ky for _, ky in lattice_offsets])
+
+    bounds = stamp.bounds
+    fine_image = galsim.ImageD(galsim.BoundsI(n * bounds.xmin - kx_max, n * bounds.xmax - kx_min,
+                                              n * bounds.ymin - ky_max, n * bounds.ymax - ky_min),
+                               scale=1.0 / n)
+
+    for profile, centre_offset, sp_shift, method in stamp.components:
+        if method != 'no_pixel':
+            profile = galsim.Convolve([profile, galsim.Pixel(scale=1.0)], gsparams=profile.gsparams)
+        profile.drawImage(fine_image,
+                          offset=(n * (bounds.true_center.x + centre_offset[0] + sp_shift[0]) -
+                                  fine_image.true_center.x,
+                                  n * (bounds.true_center.y + centre_offset[1] + sp_shift[1]) -
+                                  fine_image.true_center.y),
+                          add_to_image=True,
+                          method='no_pixel')
+
+    # Samples are scaled by the area of the fine pixels, so scale them back up to that of full-sized pixels
+    fine_image.array[:, :] *= n ** 2
+
+    nx = bounds.xmax - bounds.xmin + 1
+    ny = bounds.ymax - bounds.ymin + 1
+    for image, (kx, ky) in zip(images, lattice_offsets):
+        image[bounds].array[:, :] += fine_image.array[ky_max - ky:ky_max - ky + n * ny:n,
+                                                      kx_max - kx:kx_max - kx + n * nx:n]
+
+    return
+
+
+def draw_stamp(stamp, images, dither_offsets, oversampling=None):
+    """
+        @brief Draws a stamp onto each dither.
+
+        @param stamp
+            <Stamp> The stamp to draw
+        @param images
+            <list<galsim.Image>> The image for each dither, which must contain the stamp's bounds
+        @param dither_offsets
+            <list<(float,float)>> The offset for each dither
+        @param oversampling
+            <int> If not None, draw every dither from a single draw with pixels this many times smaller, which
+            requires every dither offset to be a multiple of 1/oversampling. Otherwise, draw each dither separately.
+            Components drawn by photon shooting or in real space are drawn separately for each dither either way
+    """
+
+    separate_components = stamp.components
+
+    if oversampling is not None:
+        oversampled_components = [component for component in stamp.components
+                                  if component[3] not in SEPARATE_DITHER_METHODS]
+        separate_components = [component for component in stamp.components
+                               if component[3] in SEPARATE_DITHER_METHODS]
+        if len(oversampled_components) > 0:
+            _draw_stamp_oversampled(Stamp(stamp.bounds, oversampled_components), images, dither_offsets,
+                                    oversampling)
+
+    for di, (image, (x_offset, y_offset)) in enumerate(zip(images, dither_offsets)):
+
+        gal_image = image[stamp.bounds]
+
+        for profile, centre_offset, sp_shift, method in separate_components:
+            offset = (centre_offset[0] + x_offset + sp_shift[0],
+                      centre_offset[1] + y_offset + sp_shift[1])
+            if method == 'phot' and stamp.photon_seeds is not None:
+                profile.drawImage(gal_image, scale=1.0, offset=offset, add_to_image=True, method=method,
+                                  rng=galsim.BaseDeviate(stamp.photon_seeds[di]))
+            else:
+                profile.drawImage(gal_image, scale=1.0, offset=offset, add_to_image=True, method=method)
+
+    return
+
+
+def _get_tiles(stamps, bounds, tile_size):
+    """
+        @brief Splits an image into tiles and assigns each stamp to the tile containing its centre. Each tile's buffer
+            is grown to include the bounds of all stamps assigned to it, giving it a halo around its core.
+    """
+
+    tiles = {}
+
+    for stamp_i, stamp in enumerate(stamps):
+
+        centre = stamp.bounds.center
+        tx = (centre.x - bounds.xmin) // tile_size
+        ty = (centre.y - bounds.ymin) // tile_size
+
+        if (tx, ty) not in tiles:
+            xmin = bounds.xmin + tx * tile_size
+            ymin = bounds.ymin + ty * tile_size
+            core_bounds = galsim.BoundsI(xmin, xmin + tile_size - 1, ymin, ymin + tile_size - 1) & bounds
+            tiles[(tx, ty)] = _Tile(core_bounds)
+
+        tile = tiles[(tx, ty)]
+        tile.stamp_indices.append(stamp_i)
+        tile.buffer_bounds = tile.buffer_bounds + stamp.bounds
+
+    return [tiles[key] for key in sorted(tiles)]
+
+
+def _render_tile(tile_i):
+    """
+        @brief Draws the stamps assigned to a tile onto its shared buffers, in a forked worker process.
+    """
+
+    tile = _worker_tiles[tile_i]
+    buffer_images = tile.get_buffer_images()
+
+    for stamp_i in tile.stamp_indices:
+        draw_stamp(_worker_stamps[stamp_i], buffer_images, _worker_dither_offsets, _worker_oversampling)
+
+    return
+
+
+def draw_stamps(stamps, images, dither_offsets, tile_size=0, num_processes=1, oversample_dithers=False):
+    """
+        @brief Draws a list of stamps onto each dither of an image.
+
+        @details If num_processes is greater than one and tile_size is positive, the image is split into tiles of
+            tile_size x tile_size pixels, which are drawn in parallel into shared-memory buffers by forked worker
+            processes. The buffers extend beyond their tiles to include the full bounds of each stamp assigned to
+            them, and these overlapping halos are summed back into the image. Since the sum over overlapping stamps
+            is done in a different order, pixels covered by stamps from more than one tile can differ from a serial
+            draw at the level of floating-point rounding.
+
+            If oversample_dithers is True and every dither offset is a multiple of 1/n for some n up to
+            MAX_DITHER_OVERSAMPLING (e.g. n=2 for the 2x2 scheme), each stamp is drawn once with pixels n times
+            smaller, and each dither's pixels are sampled from that draw rather than drawn separately. This gives
+            the same images up to the accuracy of the rendering, for roughly the cost of drawing a single dither.
+            Components drawn by photon shooting or in real space are still drawn separately for each dither, with
+            the same photon seeds, so they're the same as without oversampling.
+
+        @param stamps
+            <list<Stamp>> The stamps to draw, in the order they should be drawn
+        @param images
+            <list<galsim.Image>> The image for each dither, all with the same bounds and dtype
+        @param dither_offsets
+            <list<(float,float)>> The offset for each dither
+        @param tile_size
+            <int> Size in pixels of the sides of each tile
+        @param num_processes
+            <int> Number of processes to use. Values <= 0 are taken relative to the number of CPUs available.
+        @param oversample_dithers
+            <bool> Whether to draw all dithers from a single oversampled draw where possible
+    """
+    global _worker_stamps, _worker_dither_offsets, _worker_oversampling, _worker_tiles
+
+    logger.debug("Entering draw_stamps")
+
+    if oversample_dithers and len(dither_offsets) > 1:
+        oversampling = get_dither_oversampling(dither_offsets)
+        if oversampling is None:
+            logger.warning("Dither offsets " + str(dither_offsets) + " can't be drawn from a single oversampled " +
+                           "draw; drawing each dither separately.")
+    else:
+        oversampling = None
+
+    if tile_size > 0 and len(images) > 0:
+        tiles = _get_tiles(stamps, images[0].bounds, tile_size)
+        num_processes = get_num_processes(num_processes, len(tiles), "tiles")
+    else:
+        num_processes = 1
+
+    if num_processes == 1 or images[0].array.dtype not in _rawarray_typecodes:
+        for stamp in stamps:
+            draw_stamp(stamp, images, dither_offsets, oversampling)
+        logger.debug("Exiting draw_stamps")
+        return
+
+    logger.info("Drawing " + str(len(stamps)) + " stamps in " + str(len(tiles)) + " tiles with " +
+                str(num_processes) + " processes.")
+
+    # Set up the shared buffers before forking, so they're inherited by the workers
+    dtype = images[0].array.dtype
+    for tile in tiles:
+        tile.dtype = dtype
+        npix = ((tile.buffer_bounds.xmax - tile.buffer_bounds.xmin + 1) *
+                (tile.buffer_bounds.ymax - tile.buffer_bounds.ymin + 1))
+        tile.buffers = [RawArray(_rawarray_typecodes[dtype], npix) for _ in images]
+
+    _worker_stamps = stamps
+    _worker_dither_offsets = dither_offsets
+    _worker_oversampling = oversampling
+    _worker_tiles = tiles
+
+    try:
+        with get_context("fork").Pool(processes=num_processes) as pool:
+            pool.map(_render_tile, range(len(tiles)), chunksize=1)
+    finally:
+        _worker_stamps = None
+        _worker_dither_offsets = None
+        _worker_oversampling = None
+        _worker_tiles = None
+
+    # Sum each tile's buffer, including its halo, back into the images
+    for tile in tiles:
+        for image, buffer_image in zip(images, tile.get_buffer_images()):
+            image[tile.buffer_bounds].array[:, :] += buffer_image.array
+        tile.buffers = []
+
+    logger.debug("Exiting draw_stamps")
+
+    return
@@ -0,0 +1,173 @@
+""" @file utility/file_resolver.py
+
+    Created 18 Oct 2026
+
+    An in-memory index of where files requested by name are found in the AUX and workdir search paths, so repeated
+    lookups don't search the filesystem again.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import time
+
+from SHE_PPT.file_io import find_file
+
+
+AUX_PREFIX = "AUX/"
+AUX_PATH_ENVVAR = "ELEMENTS_AUX_PATH"
+
+# Minimum time in seconds between checks that a resolved path is still valid
+DEFAULT_CHECK_INTERVAL = 5.0
+
+
+def _get_mtime(filename):
+    """ Gets the modification time of a file or directory, or None if it doesn't exist.
+    """
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+class FileResolver(object):
+    """
+        @brief Finds files in the same way as SHE_PPT.file_io.find_file, remembering where each was found.
+
+        @details Filenames starting with "AUX/" are searched for in each directory of the auxiliary path, and others in
+            each directory of the colon-separated path they're requested with, as find_file does. Once a file is
+            found, later requests for it are answered from memory.
+
+            Along with each resolved path, the modification times of the file and of each directory it was looked
+            for in are recorded. If a file is added to or removed from any of those directories, or the file itself
+            is changed, the path is resolved again. These are checked at most once every check_interval seconds for
+            each file, so lookups in hot loops don't touch the filesystem. Files which can't be found aren't
+            recorded, and find_file's error is raised.
+    """
+
+    def __init__(self, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._index = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def clear(self):
+        """
+            @brief Forgets all resolved paths.
+        """
+        self._index.clear()
+
+    @staticmethod
+    def _get_search_dirs(filename, path):
+        """ Gets the directories a file should be searched for in, and its name relative to them.
+        """
+
+        if filename.startswith(AUX_PREFIX):
+            return os.environ.get(AUX_PATH_ENVVAR, "").split(os.pathsep), filename[len(AUX_PREFIX):]
+
+        return path.split(":"), filename
+
+    @staticmethod
+    def _search(search_dirs, relative_filename):
+        """ Searches for a file in each directory in turn, returning the first match and the modification times of
+            everything looked at.
+        """
+
+        watched_mtimes = []
+        for search_dir in search_dirs:
+
+            test_filename = os.path.join(search_dir, relative_filename)
+
+            test_dir = os.path.dirname(test_filename)
+            if test_dir == "":
+                test_dir = "."
+            watched_mtimes.append((test_dir, _get_mtime(test_dir)))
+
+            if os.path.exists(test_filename):
+                watched_mtimes.append((test_filename, _get_mtime(test_filename)))
+                return test_filename, watched_mtimes
+
+        return None, watched_mtimes
+
+    def resolve(self, filename, path="."):
+        """
+            @brief Gets the fully-qualified name of a file.
+
+            @param filename
+                <str> The name of the file, which may start with "AUX/" to search for it in the auxiliary path
+            @param path
+                <str> Colon-separated list of directories to search for the file in
+
+            @returns qualified_filename
+                <str>
+        """
+
+        search_dirs, relative_filename = self._get_search_dirs(filename, path)
+        key = (filename, path, tuple(search_dirs))
+
+        entry = self._index.get(key)
+        if entry is not None:
+            qualified_filename, watched_mtimes, check_time = entry
+
+            now = time.monotonic()
+            if now - check_time < self.check_interval:
+                return qualified_filename
+
+            if all([_get_mtime(watched_filename) == mtime for watched_filename, mtime in watched_mtimes]):
+                entry[2] = now
+                return qualified_filename
+
+        qualified_filename, watched_mtimes = self._search(search_dirs, relative_filename)
+
+        # If we can't find it, let find_file handle it, so the behaviour and error are the same as without an index
+        if qualified_filename is None:
+            qualified_filename = find_file(filename, path)
+            watched_mtimes = [(qualified_filename, _get_mtime(qualified_filename))]
+
+        self._index[key] = [qualified_filename, watched_mtimes, time.monotonic()]
+
+        return qualified_filename
+
+
+# Resolver shared by everything in a process, and inherited by forked workers
+_file_resolver = FileResolver()
+
+
+def get_file_resolver():
+    """
+        @brief Gets the file resolver shared within this process.
+
+        @returns file_resolver
+            <FileResolver>
+    """
+    return _file_resolver
+
+
+def resolve_file(filename, path="."):
+    """
+        @brief Gets the fully-qualified name of a file using the shared file resolver. This can be used in place of
+            SHE_PPT.file_io.find_file.
+
+        @param filename
+            <str> The name of the file, which may start with "AUX/" to search for it in the auxiliary path
+        @param path
+            <str> Colon-separated list of directories to search for the file in
+
+        @returns qualified_filename
+            <str>
+    """
+    return _file_resolver.resolve(filename, path)
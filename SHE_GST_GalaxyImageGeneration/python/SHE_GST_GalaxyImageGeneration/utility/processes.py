@@ -0,0 +1,113 @@
+""" @file utility/processes.py
+
+    Created 17 Oct 2026
+
+    Functions related to splitting work up between multiple processes and threads
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from multiprocessing import cpu_count, current_process
+from queue import Queue
+from threading import Thread
+
+from SHE_PPT.logging import getLogger
+
+
+def get_num_processes(num_requested, num_tasks, task_name="tasks"):
+    """
+        @brief Determines how many processes to use for a set of tasks.
+
+        @param num_requested
+            <int> Number of processes requested. Values <= 0 are taken relative to the number of CPUs available.
+        @param num_tasks
+            <int> Number of tasks to be split up between the processes
+        @param task_name
+            <str> Name of the tasks, used for logging
+
+        @returns num_processes
+            <int> Number of processes to use, where 1 means the tasks should be run in the current process
+    """
+
+    num_processes = num_requested
+    if num_processes <= 0:
+        num_processes += cpu_count()
+    num_processes = max(min(num_processes, num_tasks), 1)
+
+    # Daemonic worker processes can't start their own pools
+    if num_processes > 1 and current_process().daemon:
+        getLogger(__name__).warning("Can't generate " + task_name + " in parallel within a worker process. " +
+                                    "Continuing with a single process...")
+        num_processes = 1
+
+    return num_processes
+
+
+def consume_in_thread(items, consumer, queue_depth):
+    """
+        @brief Passes each item from an iterable to a consumer function, which runs in a separate thread so that it
+            can overlap with producing the next items.
+
+        @details Items are passed through a queue which holds at most queue_depth items, so the producer blocks
+            rather than building up an unbounded backlog. Items are consumed in the order they're produced. If the
+            consumer raises an exception, remaining items are discarded and the exception is re-raised here once the
+            producer has finished.
+
+        @param items
+            <iterable> Items to consume, which may be a generator doing the work of producing them
+        @param consumer
+            <function> Function to be called on each item
+        @param queue_depth
+            <int> Maximum number of items waiting to be consumed. If <= 0, items are consumed in this thread instead.
+    """
+
+    if queue_depth <= 0:
+        for item in items:
+            consumer(item)
+        return
+
+    end_of_items = object()
+    item_queue = Queue(maxsize=queue_depth)
+    consumer_exceptions = []
+
+    def consume_queue():
+        while True:
+            item = item_queue.get()
+            if item is end_of_items:
+                return
+            if consumer_exceptions:
+                continue
+            try:
+                consumer(item)
+            except Exception as e:
+                consumer_exceptions.append(e)
+
+    consumer_thread = Thread(target=consume_queue, name="consumer")
+    consumer_thread.start()
+
+    try:
+        for item in items:
+            if consumer_exceptions:
+                break
+            item_queue.put(item)
+    finally:
+        item_queue.put(end_of_items)
+        consumer_thread.join()
+
+    if consumer_exceptions:
+        raise consumer_exceptions[0]
+
+    return
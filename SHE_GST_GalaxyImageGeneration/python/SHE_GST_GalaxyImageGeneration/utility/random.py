@@ -5,7 +5,7 @@
     Functions related to random number generation
 """
 
-__updated__ = "2018-07-03"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -22,6 +22,56 @@ __updated__ = "2018-07-03"
 
 import numpy as np
 
+# Labels for the independent random streams which can be drawn for each object in the physical model
+RNG_STREAM_STAMP_PLACEMENT = 0
+RNG_STREAM_NOISE = 1
+RNG_STREAM_PHOTONS = 2
+
+
+def get_seed_sequence(seed, id_seq, stream, *counters):
+    """ Gets the seed sequence for a random stream belonging to an object in the physical model.
+
+        The sequence is keyed on the object's ID sequence, the stream label, and any extra counters (such as a
+        dither index), rather than spawned sequentially, so each stream is the same no matter which other streams
+        have been used before it or in which process.
+
+        @param seed The seed for the model (or the noise)
+        @param id_seq Sequence of local IDs from the survey down to the object, from its get_ID_seq method
+        @param stream Label for the stream, one of the RNG_STREAM_* values
+        @param counters Any further indices needed to distinguish the stream
+
+        @return A numpy.random.SeedSequence
+    """
+
+    return np.random.SeedSequence(entropy=int(seed) % 2 ** 64,
+                                  spawn_key=tuple(int(i) for i in id_seq) + (stream,) + tuple(counters))
+
+
+def get_rng(seed, id_seq, stream, *counters):
+    """ Gets a counter-based random generator for a stream belonging to an object in the physical model. See
+        get_seed_sequence for the meanings of the arguments.
+
+        @return A numpy.random.Generator using the Philox bit generator
+    """
+
+    return np.random.Generator(np.random.Philox(get_seed_sequence(seed, id_seq, stream, *counters)))
+
+
+def get_stream_seed(seed, id_seq, stream, *counters):
+    """ Gets an integer seed for a stream belonging to an object in the physical model, for use with RNGs which
+        can't take a seed sequence, such as GalSim's deviates. See get_seed_sequence for the meanings of the
+        arguments.
+
+        @return A positive integer less than 2**32. It is never 0, which GalSim takes to mean seeding from the time.
+    """
+
+    stream_seed = int(get_seed_sequence(seed, id_seq, stream, *counters).generate_state(1, dtype=np.uint32)[0])
+
+    if stream_seed == 0:
+        stream_seed = 1
+
+    return stream_seed
+
 
 def rand_from_cdf_arrays(xvals, cvals):
 
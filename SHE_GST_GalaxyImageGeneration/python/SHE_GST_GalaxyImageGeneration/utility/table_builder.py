@@ -0,0 +1,124 @@
+""" @file utility/table_builder.py
+
+    Created 17 Oct 2026
+
+    Columnar builder for astropy tables which are filled one row at a time
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from copy import deepcopy
+
+from astropy import table
+
+import numpy as np
+
+DEFAULT_INITIAL_CAPACITY = 1024
+
+
+class TableBuilder(object):
+    """
+        @brief Collects rows for an astropy table in growable NumPy column buffers, and converts them to a table at
+            the end.
+
+        @details Table.add_row copies every column each time it's called, so filling a table row by row takes time
+            quadratic in its length. Here each column is stored in a NumPy array which is doubled in size when full,
+            and the table is only built once all rows have been added. The columns, their attributes, and the table
+            metadata are taken from an empty template table, such as one returned by a table format's init_table.
+            As with Table.add_row, any column without a value given for a row is filled with zero (or an empty
+            string).
+    """
+
+    def __init__(self, template_table, initial_capacity=DEFAULT_INITIAL_CAPACITY):
+        self.template_table = template_table
+        self._num_rows = 0
+        self._buffers = {}
+        for colname in template_table.colnames:
+            col = template_table[colname]
+            self._buffers[colname] = np.zeros((initial_capacity,) + col.shape[1:], dtype=col.dtype)
+
+    def __len__(self):
+        return self._num_rows
+
+    def _reserve(self, num_rows):
+        """ Ensures there's space in each buffer for at least num_rows rows.
+        """
+
+        for colname in self._buffers:
+            buffer = self._buffers[colname]
+            capacity = len(buffer)
+            if capacity >= num_rows:
+                continue
+            while capacity < num_rows:
+                capacity = max(2 * capacity, 1)
+            new_buffer = np.zeros((capacity,) + buffer.shape[1:], dtype=buffer.dtype)
+            new_buffer[:self._num_rows] = buffer[:self._num_rows]
+            self._buffers[colname] = new_buffer
+
+    def add_row(self, vals):
+        """
+            @brief Adds a single row.
+
+            @param vals
+                <dict> The value for each column, keyed by column name
+        """
+
+        self._reserve(self._num_rows + 1)
+
+        for colname in vals:
+            self._buffers[colname][self._num_rows] = vals[colname]
+
+        self._num_rows += 1
+
+    def add_rows(self, vals, num_rows=None):
+        """
+            @brief Adds a block of rows at once.
+
+            @param vals
+                <dict> The values for each column, keyed by column name, as array-likes of the same length or
+                scalars to be used for every row
+            @param num_rows
+                <int> Number of rows to add. If not given, the length of the first array-like in vals is used
+        """
+
+        if num_rows is None:
+            for colname in vals:
+                if np.ndim(vals[colname]) > len(self._buffers[colname].shape) - 1:
+                    num_rows = len(vals[colname])
+                    break
+            if num_rows is None:
+                raise ValueError("num_rows must be given if no column values are arrays.")
+
+        self._reserve(self._num_rows + num_rows)
+
+        for colname in vals:
+            self._buffers[colname][self._num_rows:self._num_rows + num_rows] = vals[colname]
+
+        self._num_rows += num_rows
+
+    def to_table(self):
+        """
+            @brief Builds the table from the rows added so far.
+
+            @returns table
+                <astropy.table.Table> A table with the same columns and metadata as the template, containing the
+                rows which have been added
+        """
+
+        columns = [self.template_table[colname].copy(data=self._buffers[colname][:self._num_rows].copy())
+                   for colname in self.template_table.colnames]
+
+        return table.Table(columns, meta=deepcopy(self.template_table.meta), copy=False)
@@ -0,0 +1,72 @@
+""" @file checkpoint_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the image group checkpoint manifest.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+
+from astropy import table
+from astropy.io import fits
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.checkpoint import CheckpointManifest
+from SHE_GST_GalaxyImageGeneration.fits_writer import MultiExtensionFitsWriter
+import numpy as np
+
+
+class TestCheckpoint:
+    """
+
+
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.workdir = tmpdir.strpath
+
+    def test_record_and_load(self):
+        """ Test that a recorded detector is loaded again only by a manifest for the same model.
+        """
+
+        writer = MultiExtensionFitsWriter(os.path.join(self.workdir, "image.fits"))
+        writer.write_arrays([(np.zeros((4, 4), dtype=np.float32), fits.Header())])
+
+        details_table = table.Table({"ID": [1, 2, 3]})
+
+        checkpoint = CheckpointManifest("checkpoint.json", "hash", 1, "0.1", workdir=self.workdir)
+        checkpoint.record_detector(0, 101, None, details_table, [writer])
+        writer.close()
+
+        resumed_checkpoint = CheckpointManifest("checkpoint.json", "hash", 1, "0.1", workdir=self.workdir)
+        assert resumed_checkpoint.load()
+        assert resumed_checkpoint.completed_image_indices == set([0])
+        assert resumed_checkpoint.completed_image_IDs == set([101])
+        assert resumed_checkpoint.writer_states == [("image.fits", writer.size, 1)]
+
+        detections_tables, details_tables = resumed_checkpoint.read_tables()
+        assert detections_tables == [None]
+        assert list(details_tables[0]["ID"]) == [1, 2, 3]
+
+        assert not CheckpointManifest("checkpoint.json", "other_hash", 1, "0.1", workdir=self.workdir).load()
+        assert not CheckpointManifest("checkpoint.json", "hash", 2, "0.1", workdir=self.workdir).load()
+
+        resumed_checkpoint.clear()
+        assert not os.path.exists(os.path.join(self.workdir, "checkpoint.json"))
+        assert not resumed_checkpoint.load()
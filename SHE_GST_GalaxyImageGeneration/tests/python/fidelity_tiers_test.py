@@ -0,0 +1,84 @@
+""" @file fidelity_tiers_test.py
+
+    Created 18 Oct 2026
+
+    Tests of rendering fidelity tiers.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import galsim
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.fidelity_tiers import get_fidelity_tier_indices, get_fidelity_tiers
+import numpy as np
+
+
+class TestFidelityTiers:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.default_gsparams = galsim.GSParams(folding_threshold = 5e-3, kvalue_accuracy = 1e-5)
+
+        return
+
+    def test_no_tiers(self):
+        """ Test that tiers aren't used unless asked for.
+        """
+
+        assert get_fidelity_tiers('none', self.default_gsparams) is None
+        assert get_fidelity_tiers(None, self.default_gsparams) is None
+
+    def test_standard_tiers(self):
+        """ Test that the standard tiers draw targets at full precision and background galaxies with less.
+        """
+
+        tiers = get_fidelity_tiers('standard', self.default_gsparams)
+
+        assert tiers[0].gsparams == self.default_gsparams
+        assert tiers[-1].gsparams.folding_threshold > self.default_gsparams.folding_threshold
+
+        tier_indices = get_fidelity_tier_indices(np.array([20., 24.5, 25.5, 28.]), 24.5, tiers)
+        assert list(tier_indices) == [0, 0, 1, 2]
+
+    def test_custom_tiers(self):
+        """ Test that tiers can be given in the config.
+        """
+
+        tiers = get_fidelity_tiers("0,,,,; 2,1e-2,1e-4,,; inf,2e-2,1e-3,3.0,phot", self.default_gsparams)
+
+        assert len(tiers) == 3
+        assert tiers[0].gsparams == self.default_gsparams
+        assert tiers[0].method == 'auto'
+        assert tiers[1].gsparams.folding_threshold == 1e-2
+        assert tiers[1].gsparams.kvalue_accuracy == 1e-4
+        assert tiers[1].stamp_size_factor is None
+        assert tiers[2].stamp_size_factor == 3.0
+        assert tiers[2].method == 'phot'
+
+        with pytest.raises(ValueError):
+            get_fidelity_tiers("0,,,,; 2,,,,", self.default_gsparams)
+        with pytest.raises(ValueError):
+            get_fidelity_tiers("2,,,,; 0,,,,; inf,,,,", self.default_gsparams)
+        with pytest.raises(ValueError):
+            get_fidelity_tiers("inf,,,,sb", self.default_gsparams)
+        with pytest.raises(ValueError):
+            get_fidelity_tiers("inf,,,", self.default_gsparams)
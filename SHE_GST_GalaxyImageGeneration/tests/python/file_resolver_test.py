@@ -0,0 +1,92 @@
+""" @file file_resolver_test.py
+
+    Created 18 Oct 2026
+
+    Tests of the index of resolved file paths.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.utility.file_resolver import AUX_PATH_ENVVAR, FileResolver
+
+
+class TestFileResolver:
+    """
+
+
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.first_dir = os.path.join(tmpdir.strpath, "first")
+        self.second_dir = os.path.join(tmpdir.strpath, "second")
+        os.makedirs(self.first_dir)
+        os.makedirs(self.second_dir)
+        self.path = self.first_dir + ":" + self.second_dir
+
+    def _write(self, qualified_filename):
+        with open(qualified_filename, 'w') as fo:
+            fo.write("contents")
+
+    def test_resolve_from_index(self):
+        """ Test that files are found in path order, and later lookups are answered from the index.
+        """
+
+        self._write(os.path.join(self.second_dir, "psf.fits"))
+
+        file_resolver = FileResolver(check_interval=3600.)
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.second_dir, "psf.fits")
+        assert len(file_resolver) == 1
+
+        # Changes aren't noticed until the check interval has passed
+        self._write(os.path.join(self.first_dir, "psf.fits"))
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.second_dir, "psf.fits")
+        assert len(file_resolver) == 1
+
+        file_resolver.clear()
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.first_dir, "psf.fits")
+
+    def test_invalidation(self):
+        """ Test that a path is resolved again when a file is added to or removed from a directory it was looked for
+            in.
+        """
+
+        self._write(os.path.join(self.second_dir, "psf.fits"))
+
+        file_resolver = FileResolver(check_interval=0.)
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.second_dir, "psf.fits")
+
+        # Make sure the directory's modification time changes, even on filesystems with coarse timestamps
+        self._write(os.path.join(self.first_dir, "psf.fits"))
+        os.utime(self.first_dir, ns=(0, 0))
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.first_dir, "psf.fits")
+
+        os.remove(os.path.join(self.first_dir, "psf.fits"))
+        assert file_resolver.resolve("psf.fits", self.path) == os.path.join(self.second_dir, "psf.fits")
+
+    def test_aux_file(self, monkeypatch):
+        """ Test that files starting with AUX/ are found in the auxiliary path.
+        """
+
+        self._write(os.path.join(self.first_dir, "model.fits"))
+        monkeypatch.setenv(AUX_PATH_ENVVAR, self.second_dir + os.pathsep + self.first_dir)
+
+        file_resolver = FileResolver()
+        assert file_resolver.resolve("AUX/model.fits") == os.path.join(self.first_dir, "model.fits")
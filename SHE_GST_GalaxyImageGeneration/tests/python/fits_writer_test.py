@@ -0,0 +1,113 @@
+""" @file fits_writer_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the multi-extension FITS writer.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+
+from astropy.io import fits
+import galsim
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.fits_writer import MultiExtensionFitsWriter
+import numpy as np
+
+
+class TestFitsWriter:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.images = []
+        for i, dtype in enumerate((np.float32, np.float32, np.int32, np.float64, np.int16)):
+            image = galsim.Image(np.arange(35 * 17, dtype=dtype).reshape((35, 17)) * (i + 1), scale=0.1)
+            image.header = galsim.FitsHeader()
+            image.header["EXTNAME"] = "EXT" + str(i)
+            image.wcs.writeToFitsHeader(image.header, image.bounds)
+            cls.images.append(image)
+
+        return
+
+    @classmethod
+    def teardown_class(cls):
+
+        return
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.workdir = tmpdir.strpath
+
+    def test_write_images(self):
+        """ Test that images written in batches match those written by appending to the file with astropy.
+        """
+
+        written_filename = os.path.join(self.workdir, "written.fits")
+        appended_filename = os.path.join(self.workdir, "appended.fits")
+
+        with MultiExtensionFitsWriter(written_filename) as writer:
+            writer.write_images(self.images[:3])
+            writer.write_images(self.images[3:])
+            assert writer.num_hdus == len(self.images)
+
+        for image in self.images:
+            hdulist = fits.open(appended_filename, mode='append')
+            hdulist.append(fits.ImageHDU(data=image.array, header=fits.header.Header(list(image.header.items()))))
+            hdulist.close()
+
+        written_hdulist = fits.open(written_filename)
+        appended_hdulist = fits.open(appended_filename)
+
+        assert len(written_hdulist) == len(appended_hdulist)
+        assert isinstance(written_hdulist[0], fits.PrimaryHDU)
+
+        for written_hdu, appended_hdu in zip(written_hdulist, appended_hdulist):
+            assert written_hdu.name == appended_hdu.name
+            assert list(written_hdu.header.keys()) == list(appended_hdu.header.keys())
+            assert written_hdu.data.dtype == appended_hdu.data.dtype
+            assert (written_hdu.data == appended_hdu.data).all()
+
+        written_hdulist.close()
+        appended_hdulist.close()
+
+    def test_resume(self):
+        """ Test that a writer can continue a file from an earlier batch, discarding anything written after it.
+        """
+
+        filename = os.path.join(self.workdir, "resumed.fits")
+
+        with MultiExtensionFitsWriter(filename) as writer:
+            writer.write_images(self.images[:2])
+            size, num_hdus = writer.size, writer.num_hdus
+            writer.write_images(self.images[2:4])
+
+        with MultiExtensionFitsWriter(filename, size=size, num_hdus=num_hdus) as writer:
+            writer.write_images(self.images[4:])
+            assert writer.num_hdus == 3
+
+        hdulist = fits.open(filename)
+
+        assert [hdu.name for hdu in hdulist] == ["EXT0", "EXT1", "EXT4"]
+        assert (hdulist[2].data == self.images[4].array).all()
+
+        hdulist.close()
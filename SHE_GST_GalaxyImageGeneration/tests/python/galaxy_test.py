@@ -0,0 +1,104 @@
+""" @file galaxy_test.py
+
+    Created 18 Oct 2026
+
+    Tests of building galaxy profiles for drawing.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import galsim
+from numpy.testing import assert_allclose
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.galaxy import get_target_galaxy_components
+import numpy as np
+
+
+class TestGalaxy:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.stamp_size = 64
+        cls.offset = (0.3, -0.2)
+        cls.gsparams = galsim.GSParams()
+
+        # Profiles in image co-ordinates, with a PSF made the same way as one from a model file
+        cls.bulge = galsim.Sersic(n=4., half_light_radius=2., flux=40., trunc=10.).shear(g1=0.2, g2=-0.1)
+        cls.disk = galsim.InclinedSersic(n=1., inclination=60. * galsim.degrees, scale_radius=3., trunc=15.,
+                                         flux=60., scale_h_over_r=0.1).rotate(30. * galsim.degrees)
+
+        cls.psf_image = galsim.Airy(lam_over_diam=1.2).drawImage(nx=64, ny=64, scale=0.5)
+
+        return
+
+    @classmethod
+    def teardown_class(cls):
+
+        return
+
+    def draw(self, components):
+        image = galsim.ImageD(self.stamp_size, self.stamp_size, scale=1.0)
+        for profile, method in components:
+            profile.drawImage(image, offset=self.offset, add_to_image=True, method=method)
+        return image.array
+
+    @pytest.mark.parametrize("pixel_scale", [1.0, 0.5, 2.0, 0.1 / 3600])
+    @pytest.mark.parametrize("draw_method", ['auto', 'fft'])
+    def test_shared_psf_components(self, pixel_scale, draw_method):
+        """ Test that a bulge and disk sharing a PSF are drawn the same as when they're drawn separately, to within
+            1e-6 of the peak pixel value.
+        """
+
+        psf = galsim.InterpolatedImage(self.psf_image, scale=0.5)
+
+        # An equal but distinct PSF, so the components are drawn separately
+        other_psf = galsim.InterpolatedImage(self.psf_image, scale=0.5)
+
+        shared_components = get_target_galaxy_components(self.bulge, self.disk, psf, psf,
+                                                         pixel_scale=pixel_scale,
+                                                         draw_method=draw_method,
+                                                         gsparams=self.gsparams)
+        separate_components = get_target_galaxy_components(self.bulge, self.disk, psf, other_psf,
+                                                           pixel_scale=pixel_scale,
+                                                           draw_method=draw_method,
+                                                           gsparams=self.gsparams)
+
+        assert len(shared_components) == 1
+        assert len(separate_components) == 2
+
+        shared_image = self.draw(shared_components)
+        separate_image = self.draw(separate_components)
+
+        assert_allclose(shared_image, separate_image, rtol=0., atol=1e-6 * separate_image.max())
+
+    def test_separate_components(self):
+        """ Test that components are drawn separately when the bulge wouldn't be drawn by FFT.
+        """
+
+        psf = galsim.InterpolatedImage(self.psf_image, scale=0.5)
+
+        components = get_target_galaxy_components(self.bulge, self.disk, psf, psf,
+                                                  pixel_scale=0.5,
+                                                  draw_method='real_space',
+                                                  gsparams=self.gsparams)
+
+        assert [method for _, method in components] == ['real_space', 'no_pixel']
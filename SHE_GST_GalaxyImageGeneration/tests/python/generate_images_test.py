@@ -0,0 +1,357 @@
+""" @file generate_images_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the functions used to split image generation up between processes.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import pickle
+
+import h5py
+from numpy.testing import assert_array_equal
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.config.config_default import load_default_configurations
+import SHE_GST_GalaxyImageGeneration.generate_images as generate_images_module
+import SHE_GST_PhysicalModel
+from SHE_GST_GalaxyImageGeneration.generate_images import (ImageGroupWorkUnit, generate_detectors, generate_image,
+                                                           generate_images, get_pipeline_queue_depth, get_wcs_list,
+                                                           iterate_child_phls)
+from SHE_GST_GalaxyImageGeneration.psf import get_psf_archive_entries
+
+
+def get_detector_results(image_group_phl, options, skip_image_indices=()):
+    """ Generates the detectors of an image group, returning the results and the contents of the PSF archive.
+    """
+
+    psf_archive_filehandle = h5py.File("PSF-ARCHIVE-" + str(image_group_phl.get_full_ID()), 'w', driver='core',
+                                       backing_store=False)
+
+    detector_results = list(generate_detectors(image_group_phl, options, psf_archive_filehandle,
+                                               skip_image_indices=skip_image_indices))
+    psf_entries = get_psf_archive_entries(psf_archive_filehandle)
+
+    psf_archive_filehandle.close()
+
+    return detector_results, psf_entries
+
+
+def assert_detector_results_equal(detector_results, other_detector_results):
+    """ Checks that the images and tables generated for each detector are identical.
+    """
+
+    assert len(detector_results) == len(other_detector_results)
+
+    for (image_i, image_ID, results), (other_image_i, other_image_ID, other_results) in zip(detector_results,
+                                                                                              other_detector_results):
+
+        assert image_i == other_image_i
+        assert image_ID == other_image_ID
+
+        # Images for each dither: science, noise, mask, weight, background, and segmentation maps
+        for images, other_images in zip(results[:6], other_results[:6]):
+            assert len(images) == len(other_images)
+            for image, other_image in zip(images, other_images):
+                assert_array_equal(image.array, other_image.array)
+
+        # Detections and details tables
+        for table, other_table in zip(results[6:], other_results[6:]):
+            assert table.colnames == other_table.colnames
+            for colname in table.colnames:
+                assert_array_equal(table[colname], other_table[colname])
+
+
+def assert_psf_entries_equal(psf_entries, other_psf_entries):
+    """ Checks that the PSF images and references added to two archives are identical.
+    """
+
+    psf_images, psf_references = psf_entries
+    other_psf_images, other_psf_references = other_psf_entries
+
+    assert sorted(psf_images) == sorted(other_psf_images)
+    for psf_hash in psf_images:
+        assert_array_equal(psf_images[psf_hash][0], other_psf_images[psf_hash][0])
+        assert psf_images[psf_hash][1] == other_psf_images[psf_hash][1]
+
+    assert len(psf_references) == len(other_psf_references)
+    for (key, attrs), (other_key, other_attrs) in zip(sorted(psf_references, key=lambda r: r[0]),
+                                                      sorted(other_psf_references, key=lambda r: r[0])):
+        assert key == other_key
+        assert sorted(attrs) == sorted(other_attrs)
+        for attr in attrs:
+            assert_array_equal(attrs[attr], other_attrs[attr])
+
+
+class TestGenerateImages:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.seed = 1234
+        cls.num_image_groups = 3
+
+        return
+
+    @classmethod
+    def teardown_class(cls):
+
+        return
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.workdir = tmpdir.strpath
+
+        self.survey, self.options = load_default_configurations()
+        self.survey.set_param_params('num_image_groups', 'fixed', self.num_image_groups)
+        self.options['workdir'] = self.workdir
+
+    def test_work_unit_pickle(self):
+        """ Test that work units survive being sent to another process.
+        """
+
+        work_unit = ImageGroupWorkUnit(image_group_index=1,
+                                       seed=self.seed,
+                                       options=self.options,
+                                       write_run_products=False)
+
+        unpickled_work_unit = pickle.loads(pickle.dumps(work_unit))
+
+        assert unpickled_work_unit.image_group_index == 1
+        assert unpickled_work_unit.seed == self.seed
+        assert unpickled_work_unit.options == self.options
+        assert not unpickled_work_unit.write_run_products
+
+    def test_rebuild_image_group(self):
+        """ Test that rebuilding an image group gives the same one as was generated in the parent.
+        """
+
+        self.survey.set_seed(self.seed)
+        self.survey.fill_image_groups()
+
+        image_groups = self.survey.get_image_groups()
+        assert len(image_groups) == self.num_image_groups
+
+        full_seeds = [image_group.get_full_seed() for image_group in image_groups]
+        num_images = [image_group.get_param_value("num_images") for image_group in image_groups]
+
+        # Rebuild in reverse order, to make sure it doesn't depend on what's been generated before
+        for i in reversed(range(self.num_image_groups)):
+
+            work_unit = ImageGroupWorkUnit(image_group_index=i,
+                                           seed=self.seed,
+                                           options=self.options)
+
+            image_group = work_unit.rebuild_image_group(self.survey)
+
+            assert image_group.get_local_ID() == i
+            assert image_group.get_full_seed() == full_seeds[i]
+            assert image_group.get_param_value("num_images") == num_images[i]
+
+    def test_pipeline_queue_depth(self):
+        """ Test that detectors aren't written in a separate thread when process pools may be forked.
+        """
+
+        self.options['pipeline_queue_depth'] = 2
+        assert get_pipeline_queue_depth(self.options) == 2
+
+        self.options['num_parallel_detectors'] = 2
+        assert get_pipeline_queue_depth(self.options) == 0
+
+        self.options['num_parallel_detectors'] = 1
+        self.options['num_parallel_tiles'] = 0
+        assert get_pipeline_queue_depth(self.options) == 0
+
+    def test_iterate_child_phls(self):
+        """ Test that images created one at a time are the same as those created all at once.
+        """
+
+        self.survey.set_seed(self.seed)
+        image_group = self.survey.add_image_group()
+        image_group.set_param_params('num_images', 'fixed', 4)
+        image_group.fill_images()
+
+        images = image_group.get_image_descendants()
+        full_seeds = [image.get_full_seed() for image in images]
+        full_IDs = [image.get_full_ID() for image in images]
+
+        # Skip one image, to check it doesn't affect those after it
+        image_indices = [0, 2, 3]
+        for image_i, image in iterate_child_phls(image_group, SHE_GST_PhysicalModel.ImageGroup.add_image,
+                                                 image_indices):
+
+            # Only the current image should exist at any time
+            assert image_group.num_children() == 1
+
+            assert image.get_local_ID() == image_i
+            assert image.get_full_seed() == full_seeds[image_i]
+            assert image.get_full_ID() == full_IDs[image_i]
+
+        assert image_group.num_children() == 0
+
+    def get_details_table(self, snapshot_dir, **extra_options):
+        """ Generates the details of the galaxies in an image, by default with the population adjusted to a number of
+            target galaxies and arranged for shape noise cancellation.
+        """
+
+        survey, options = load_default_configurations()
+        survey.set_seed(self.seed)
+        survey.set_param_params('image_size_xp', 'fixed', 512)
+        survey.set_param_params('image_size_yp', 'fixed', 512)
+
+        options['workdir'] = self.workdir
+        options['snapshot_dir'] = snapshot_dir
+        options['details_only'] = True
+        options['mode'] = 'stamps'
+        options['num_target_galaxies'] = 10
+        options['shape_noise_cancellation'] = True
+        options.update(extra_options)
+
+        image = survey.add_image_group().add_image()
+
+        details_table = generate_image(image, options, get_wcs_list(image, options), None)[7]
+
+        return details_table
+
+    def test_snapshot_details(self):
+        """ Test that the details of an image restored from a snapshot are the same as those of the image without
+            snapshots.
+        """
+
+        details_table = self.get_details_table(None)
+        assert len(details_table) > 0
+
+        snapshot_dir = os.path.join(self.workdir, "snapshots")
+
+        # The first run saves the snapshot, and the second loads it
+        for _ in range(2):
+            snapshot_details_table = self.get_details_table(snapshot_dir)
+
+            assert snapshot_details_table.colnames == details_table.colnames
+            for colname in details_table.colnames:
+                assert_array_equal(snapshot_details_table[colname], details_table[colname])
+
+        assert len(os.listdir(snapshot_dir)) == 2
+
+    def test_galaxy_block_details(self):
+        """ Test that the details of an image whose galaxies are stored in galaxy blocks are the same as those of the
+            image with separate galaxies.
+        """
+
+        details_table = self.get_details_table(None, mode='field', num_target_galaxies=0,
+                                               shape_noise_cancellation=False)
+        assert len(details_table) > 0
+
+        block_details_table = self.get_details_table(None, mode='field', num_target_galaxies=0,
+                                                     shape_noise_cancellation=False, galaxy_blocks=True)
+
+        assert block_details_table.colnames == details_table.colnames
+        for colname in details_table.colnames:
+            assert_array_equal(block_details_table[colname], details_table[colname])
+
+    def get_image_group_results(self, num_parallel_threads, monkeypatch):
+        """ Generates every image group of a survey through generate_images, returning the results of each, keyed by
+            its full ID. The images and tables are recorded rather than written to the workdir.
+        """
+
+        self.survey.set_param_params('num_images', 'fixed', 2)
+        self.survey.set_param_params('image_size_xp', 'fixed', 256)
+        self.survey.set_param_params('image_size_yp', 'fixed', 256)
+
+        results_dir = os.path.join(self.workdir, "results_" + str(num_parallel_threads))
+        os.makedirs(results_dir)
+
+        self.options['seed'] = self.seed
+        self.options['num_parallel_threads'] = num_parallel_threads
+
+        def record_image_group(image_group_phl, options, write_run_products=True):
+            # This may run in a worker process, so pass the results back through a file
+            results_filename = os.path.join(results_dir, str(image_group_phl.get_full_ID()) + ".pkl")
+            with open(results_filename, 'wb') as fo:
+                pickle.dump(get_detector_results(image_group_phl, options), fo)
+
+        monkeypatch.setattr(generate_images_module, "generate_image_group", record_image_group)
+
+        generate_images(self.survey, self.options)
+
+        image_group_results = {}
+        for results_filename in os.listdir(results_dir):
+            with open(os.path.join(results_dir, results_filename), 'rb') as fi:
+                image_group_results[results_filename] = pickle.load(fi)
+
+        return image_group_results
+
+    def test_parallel_image_groups(self, monkeypatch):
+        """ Test that image groups generated in a process pool are identical to those generated in serial.
+        """
+
+        serial_results = self.get_image_group_results(1, monkeypatch)
+        parallel_results = self.get_image_group_results(self.num_image_groups, monkeypatch)
+
+        assert len(serial_results) == self.num_image_groups
+        assert sorted(parallel_results) == sorted(serial_results)
+
+        for key in serial_results:
+            detector_results, psf_entries = serial_results[key]
+            parallel_detector_results, parallel_psf_entries = parallel_results[key]
+
+            assert len(detector_results) == 2
+            assert_detector_results_equal(parallel_detector_results, detector_results)
+            assert_psf_entries_equal(parallel_psf_entries, psf_entries)
+
+    def get_image_group(self):
+        """ Sets up an image group with a few small detectors.
+        """
+
+        self.survey.set_seed(self.seed)
+        self.survey.set_param_params('num_images', 'fixed', 3)
+        self.survey.set_param_params('image_size_xp', 'fixed', 256)
+        self.survey.set_param_params('image_size_yp', 'fixed', 256)
+
+        self.survey.clear()
+        self.survey.set_seed(self.seed)
+
+        return self.survey.add_image_group()
+
+    def test_parallel_detectors(self):
+        """ Test that detectors generated in worker processes are yielded in their original order, and are identical
+            to those generated in serial, including when some are skipped.
+        """
+
+        self.options['num_parallel_detectors'] = 1
+        detector_results, psf_entries = get_detector_results(self.get_image_group(), self.options)
+
+        assert [image_i for image_i, _, _ in detector_results] == [0, 1, 2]
+        assert len(psf_entries[1]) > 0
+
+        self.options['num_parallel_detectors'] = 3
+        parallel_detector_results, parallel_psf_entries = get_detector_results(self.get_image_group(), self.options)
+
+        assert_detector_results_equal(parallel_detector_results, detector_results)
+        assert_psf_entries_equal(parallel_psf_entries, psf_entries)
+
+        # Skipping a detector, as when resuming, shouldn't change the others
+        self.options['num_parallel_detectors'] = 2
+        skipped_detector_results, _ = get_detector_results(self.get_image_group(), self.options,
+                                                           skip_image_indices={1})
+
+        assert_detector_results_equal(skipped_detector_results, [detector_results[0], detector_results[2]])
@@ -5,7 +5,7 @@
     Tests of functions dealing with noise calculations.
 """
 
-__updated__ = "2018-07-03"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -21,10 +21,12 @@ __updated__ = "2018-07-03"
 # the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
 
 import unittest
-from numpy.testing import assert_almost_equal
+from numpy.testing import assert_almost_equal, assert_allclose, assert_array_equal
 from SHE_GST_GalaxyImageGeneration.noise import (get_sky_level_ADU_per_pixel, get_sky_level_count_per_pixel,
                                                  get_count_lambda_per_pixel, get_read_noise_ADU_per_pixel,
-                                                 get_var_ADU_per_pixel)
+                                                 get_var_ADU_per_pixel, add_shared_group_noise)
+from SHE_GST_GalaxyImageGeneration.utility.random import RNG_STREAM_NOISE, get_rng
+import numpy as np
 
 class NoiseTestCase(unittest.TestCase):
 
@@ -85,3 +87,42 @@ class NoiseTestCase(unittest.TestCase):
 
         assert_almost_equal(var_ADU_per_pixel, self.var_ADU_per_pixel)
 
+
+
+    def test_add_shared_group_noise(self):
+
+        stamp_size = 16
+        ncols = 3
+        nrows = 2
+        group_sizes = (2, 3)
+
+        def get_group_rngs():
+            return [get_rng(1234, (0, 0, gi), RNG_STREAM_NOISE, 0) for gi in range(len(group_sizes))]
+
+        image_array = np.zeros((nrows * stamp_size, ncols * stamp_size), dtype=np.float32)
+        var_array = np.ones_like(image_array)
+        for cell in range(ncols * nrows):
+            irow, icol = divmod(cell, ncols)
+            var_array[irow * stamp_size:(irow + 1) * stamp_size,
+                      icol * stamp_size:(icol + 1) * stamp_size] = (cell + 1) ** 2
+
+        add_shared_group_noise(image_array, var_array, stamp_size, ncols, group_sizes, get_group_rngs())
+
+        def get_unit_noise(cell):
+            irow, icol = divmod(cell, ncols)
+            return (image_array[irow * stamp_size:(irow + 1) * stamp_size,
+                                icol * stamp_size:(icol + 1) * stamp_size] / (cell + 1))
+
+        # Stamps in the same group share their noise, and each group's noise is a unit Gaussian field
+        assert_allclose(get_unit_noise(0), get_unit_noise(1), rtol=1e-6)
+        assert_allclose(get_unit_noise(2), get_unit_noise(3), rtol=1e-6)
+        assert_allclose(get_unit_noise(2), get_unit_noise(4), rtol=1e-6)
+        assert not np.allclose(get_unit_noise(0), get_unit_noise(2))
+        assert_allclose(get_unit_noise(0), get_group_rngs()[0].standard_normal((stamp_size, stamp_size)), rtol=1e-6)
+
+        # The unused stamp is left alone
+        assert_array_equal(get_unit_noise(5), 0)
+
+        # Too many galaxies for the grid should raise an exception
+        with self.assertRaises(Exception):
+            add_shared_group_noise(image_array, var_array, stamp_size, ncols, (4, 3), get_group_rngs())
@@ -0,0 +1,147 @@
+""" @file output_cache_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the image group output cache.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.output_cache import OutputCache, get_product_options
+
+
+class TestOutputCache:
+    """
+
+
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.workdir = os.path.join(tmpdir.strpath, "work")
+        self.cache_dir = os.path.join(tmpdir.strpath, "cache")
+
+        os.makedirs(os.path.join(self.workdir, "data"))
+        for filename, contents in (("image.xml", "<image/>"),
+                                   ("data/image.fits", "image data")):
+            with open(os.path.join(self.workdir, filename), 'w') as fo:
+                fo.write(contents)
+
+        self.product_filenames = {"image": {"prod_filenames": ["image.xml"],
+                                            "data_filenames": ["data/image.fits", "data/missing.fits"]}}
+
+    def test_store_and_retrieve(self):
+        """ Test that stored files are retrieved into a new workdir, only for the same model and seed.
+        """
+
+        output_cache = OutputCache(self.cache_dir, "hash", "hash", 1, "0.1")
+        assert output_cache.retrieve(self.workdir) is None
+        output_cache.store(self.product_filenames, self.workdir)
+
+        new_workdir = os.path.join(self.workdir, "new")
+        assert OutputCache(self.cache_dir, "other_hash", "hash", 1, "0.1").retrieve(new_workdir) is None
+        assert OutputCache(self.cache_dir, "hash", "hash", 2, "0.1").retrieve(new_workdir) is None
+
+        assert OutputCache(self.cache_dir, "hash", "hash", 1, "0.1").retrieve(new_workdir) == self.product_filenames
+        with open(os.path.join(new_workdir, "data/image.fits"), 'r') as fi:
+            assert fi.read() == "image data"
+        assert not os.path.exists(os.path.join(new_workdir, "data/missing.fits"))
+
+    def test_invalid_entry(self):
+        """ Test that an entry with a file which has been changed isn't used.
+        """
+
+        output_cache = OutputCache(self.cache_dir, "hash", "hash", 1, "0.1")
+        output_cache.store(self.product_filenames, self.workdir)
+
+        with open(os.path.join(output_cache.entry_dir, "image.xml"), 'a') as fo:
+            fo.write("more")
+
+        assert output_cache.retrieve(os.path.join(self.workdir, "new")) is None
+
+    def test_same_size_change(self):
+        """ Test that an entry with a file changed in place without changing its size isn't used, and is replaced when
+            the image group is stored again.
+        """
+
+        output_cache = OutputCache(self.cache_dir, "hash", "hash", 1, "0.1")
+        output_cache.store(self.product_filenames, self.workdir)
+
+        with open(os.path.join(output_cache.entry_dir, "data/image.fits"), 'r+') as fo:
+            fo.write("IMAGE")
+
+        assert output_cache.retrieve(os.path.join(self.workdir, "new")) is None
+
+        output_cache.store(self.product_filenames, self.workdir)
+        assert output_cache.retrieve(os.path.join(self.workdir, "new")) == self.product_filenames
+        with open(os.path.join(self.workdir, "new", "data/image.fits"), 'r') as fi:
+            assert fi.read() == "image data"
+
+    def test_in_place_updates(self):
+        """ Test that updating output files in place, as when a run is resumed, doesn't change the cached copies.
+        """
+
+        output_cache = OutputCache(self.cache_dir, "hash", "hash", 1, "0.1")
+        output_cache.store(self.product_filenames, self.workdir)
+
+        new_workdir = os.path.join(self.workdir, "new")
+        assert output_cache.retrieve(new_workdir) == self.product_filenames
+
+        for workdir in (self.workdir, new_workdir):
+            qualified_filename = os.path.join(workdir, "data/image.fits")
+            assert os.stat(qualified_filename).st_nlink == 1
+            with open(qualified_filename, 'r+') as fo:
+                fo.write("IMAGE")
+
+        other_workdir = os.path.join(self.workdir, "other")
+        assert output_cache.retrieve(other_workdir) == self.product_filenames
+        with open(os.path.join(other_workdir, "data/image.fits"), 'r') as fi:
+            assert fi.read() == "image data"
+
+    def test_product_options(self):
+        """ Test that an entry stored by a details-only run isn't used for a full run, or one with a different dither
+            scheme.
+        """
+
+        options = {"details_only": True,
+                   "details_output_format": "fits",
+                   "dithering_scheme": "None",
+                   "render_oversampled_dithers": False,
+                   "workdir": self.workdir, }
+
+        details_product_filenames = {"details": {"prod_filenames": ["image.xml"],
+                                                 "data_filenames": ["data/image.fits"]}}
+        OutputCache(self.cache_dir, "hash", "hash", 1, "0.1",
+                    get_product_options(options)).store(details_product_filenames, self.workdir)
+
+        new_workdir = os.path.join(self.workdir, "new")
+
+        full_options = dict(options, details_only=False)
+        assert OutputCache(self.cache_dir, "hash", "hash", 1, "0.1",
+                           get_product_options(full_options)).retrieve(new_workdir) is None
+
+        dithered_options = dict(options, dithering_scheme="2x2")
+        assert OutputCache(self.cache_dir, "hash", "hash", 1, "0.1",
+                           get_product_options(dithered_options)).retrieve(new_workdir) is None
+
+        # Options which don't change the products shouldn't prevent the entry being used
+        moved_options = dict(options, workdir=new_workdir)
+        assert OutputCache(self.cache_dir, "hash", "hash", 1, "0.1",
+                           get_product_options(moved_options)).retrieve(new_workdir) == details_product_filenames
@@ -0,0 +1,104 @@
+""" @file processes_test.py
+
+    Created 18 Oct 2026
+
+    Tests of functions for splitting work between processes and threads.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from threading import Event, Thread, current_thread
+import time
+
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.utility.processes import consume_in_thread
+
+
+class TestProcesses:
+    """
+
+
+    """
+
+    @pytest.mark.parametrize("queue_depth", [0, 1, 3])
+    def test_consume_in_order(self, queue_depth):
+        """ Test that every item is consumed in the order it's produced, in a separate thread unless the queue depth
+            is 0.
+        """
+
+        consumed = []
+        consumer_threads = set()
+
+        def consumer(item):
+            consumed.append(item)
+            consumer_threads.add(current_thread())
+
+        consume_in_thread(iter(range(100)), consumer, queue_depth)
+
+        assert consumed == list(range(100))
+        assert (current_thread() in consumer_threads) == (queue_depth == 0)
+
+    def test_queue_bounded(self):
+        """ Test that the producer doesn't get more than the queue depth ahead of a blocked consumer.
+        """
+
+        queue_depth = 2
+
+        produced = []
+        consumed = []
+        unblock_consumer = Event()
+
+        def produce():
+            for i in range(20):
+                produced.append(i)
+                yield i
+
+        def consumer(item):
+            unblock_consumer.wait()
+            consumed.append(item)
+
+        producer_thread = Thread(target=consume_in_thread, args=(produce(), consumer, queue_depth))
+        producer_thread.start()
+
+        try:
+            time.sleep(0.2)
+
+            # One item being consumed, queue_depth items in the queue, and one waiting to be put into it
+            assert len(produced) == queue_depth + 2
+            assert consumed == []
+        finally:
+            unblock_consumer.set()
+            producer_thread.join()
+
+        assert consumed == list(range(20))
+
+    def test_consumer_exception(self):
+        """ Test that an exception raised by the consumer is raised again in the calling thread, and that no more
+            items are consumed after it.
+        """
+
+        consumed = []
+
+        def consumer(item):
+            if item == 5:
+                raise ValueError("Can't consume item 5.")
+            consumed.append(item)
+
+        with pytest.raises(ValueError, match="item 5"):
+            consume_in_thread(iter(range(100)), consumer, 2)
+
+        assert consumed == list(range(5))
@@ -0,0 +1,168 @@
+""" @file psf_cache_test.py
+
+    Created 18 Oct 2026
+
+    Tests of the on-disk cache of PSF profiles and stamps.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+import stat
+import time
+
+import galsim
+from numpy.testing import assert_array_equal
+import pytest
+
+from SHE_GST_GalaxyImageGeneration import psf_cache as psf_cache_module
+from SHE_GST_GalaxyImageGeneration.psf_cache import PSFCache, get_file_checksum
+import numpy as np
+
+
+class TestPSFCache:
+    """
+
+
+    """
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.cache_dir = os.path.join(tmpdir.strpath, "psf_cache")
+        self.workdir = tmpdir.strpath
+
+    def test_profile_and_stamp(self):
+        """ Test that profiles and stamps are only made once, and are the same when read back.
+        """
+
+        psf_cache = PSFCache(self.cache_dir, 1024 ** 2)
+
+        calls = []
+
+        def make_profile():
+            calls.append("profile")
+            image = galsim.Gaussian(sigma = 2.).drawImage(nx = 32, ny = 32, scale = 1.)
+            return galsim.InterpolatedImage(image, scale = 0.5)
+
+        def make_stamp():
+            calls.append("stamp")
+            return np.arange(16, dtype = np.float32).reshape((4, 4))
+
+        profile = psf_cache.get_profile(("model", "checksum", 0.5), make_profile)
+        stamp = psf_cache.get_stamp(("stamp", "checksum", 4), make_stamp)
+
+        # A new cache object, as a new process would have, should find both
+        new_psf_cache = PSFCache(self.cache_dir, 1024 ** 2)
+        new_profile = new_psf_cache.get_profile(("model", "checksum", 0.5), make_profile)
+        new_stamp = new_psf_cache.get_stamp(("stamp", "checksum", 4), make_stamp)
+
+        assert calls == ["profile", "stamp"]
+        assert new_profile == profile
+        assert new_profile.stepk == profile.stepk
+        assert new_stamp.dtype == stamp.dtype
+        assert_array_equal(new_stamp, stamp)
+
+        # A different key should make a new entry
+        new_psf_cache.get_profile(("model", "checksum", 0.25), make_profile)
+        assert calls == ["profile", "stamp", "profile"]
+
+    def test_untrusted_profiles(self, monkeypatch):
+        """ Test that profiles aren't unpickled from entries or cache directories which others can write to.
+        """
+
+        key = ("background", 0.1)
+
+        def make_profile():
+            calls.append(key)
+            return galsim.Gaussian(sigma = 2.)
+
+        calls = []
+        PSFCache(self.cache_dir, 1024 ** 2).get_profile(key, make_profile)
+
+        # Entries must be written so that only this user can modify them
+        entry_filenames = os.listdir(self.cache_dir)
+        assert len(entry_filenames) == 1
+        qualified_filename = os.path.join(self.cache_dir, entry_filenames[0])
+        assert not os.stat(qualified_filename).st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+        assert not os.stat(self.cache_dir).st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+        def fail_load(fi):
+            pytest.fail("Untrusted entry was unpickled.")
+
+        # An entry which others can write to should be made again and replaced
+        os.chmod(qualified_filename, 0o666)
+        with monkeypatch.context() as m:
+            m.setattr(psf_cache_module.pickle, "load", fail_load)
+            PSFCache(self.cache_dir, 1024 ** 2).get_profile(key, make_profile)
+        assert calls == [key, key]
+        assert not os.stat(qualified_filename).st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+        PSFCache(self.cache_dir, 1024 ** 2).get_profile(key, make_profile)
+        assert calls == [key, key]
+
+        # No profiles should be read from or written to a directory which others can write to
+        os.chmod(self.cache_dir, 0o777)
+        os.remove(qualified_filename)
+        with monkeypatch.context() as m:
+            m.setattr(psf_cache_module.pickle, "load", fail_load)
+            psf_cache = PSFCache(self.cache_dir, 1024 ** 2)
+            psf_cache.get_profile(key, make_profile)
+            psf_cache.get_profile(key, make_profile)
+        assert calls == [key, key, key, key]
+        assert os.listdir(self.cache_dir) == []
+
+        # Stamps aren't unpickled, so can still be cached there
+        stamp_calls = []
+        for _ in range(2):
+            psf_cache.get_stamp(("stamp", 4), lambda: stamp_calls.append(4) or np.zeros((4, 4)))
+        assert stamp_calls == [4]
+
+    def test_eviction(self):
+        """ Test that the least recently used entries are removed once the cache is over its size limit.
+        """
+
+        stamp_size = 8 * 64 * 64
+        psf_cache = PSFCache(self.cache_dir, int(2.5 * stamp_size))
+
+        for i in range(3):
+            psf_cache.get_stamp(("stamp", i), lambda: np.zeros((64, 64)))
+            time.sleep(0.01)
+            if i == 1:
+                # Use the first entry again, so the second is the least recently used
+                psf_cache.get_stamp(("stamp", 0), lambda: pytest.fail("Entry should be cached."))
+
+        assert len(os.listdir(self.cache_dir)) == 2
+
+        calls = []
+        psf_cache.get_stamp(("stamp", 0), lambda: calls.append(0) or np.zeros((64, 64)))
+        psf_cache.get_stamp(("stamp", 1), lambda: calls.append(1) or np.zeros((64, 64)))
+        assert calls == [1]
+
+    def test_file_checksum(self):
+        """ Test that the checksum of a file changes when it's modified.
+        """
+
+        filename = os.path.join(self.workdir, "model.fits")
+        with open(filename, 'w') as fo:
+            fo.write("model")
+
+        checksum = get_file_checksum(filename)
+        assert get_file_checksum(filename) == checksum
+
+        with open(filename, 'a') as fo:
+            fo.write(" changed")
+
+        assert get_file_checksum(filename) != checksum
@@ -5,7 +5,7 @@
     Tests of functions dealing with creating and managing PSF profiles and images.
 """
 
-__updated__ = "2018-10-25"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -29,7 +29,13 @@ import pytest
 
 from SHE_GST_GalaxyImageGeneration.psf import (get_psf_profile, get_background_psf_profile,
                                                add_psf_to_archive, get_psf_from_archive,
-                                               load_psf_model_from_sed_z)
+                                               load_psf_model_from_sed_z, prune_psf_archive,
+                                               get_psf_archive_entries, add_psf_archive_entries,
+                                               psf_images_group_name, sort_psfs_from_archive,
+                                               psf_cube_layout, read_psf_cube, get_psf_from_cube)
+from SHE_PPT.table_formats.she_psf_model_image import tf as pstf
+import SHE_GST_GalaxyImageGeneration.psf as psf_module
+from astropy import table
 import numpy as np
 
 
@@ -135,3 +141,126 @@ class TestPSF:
         assert_almost_equal(psf10_i.scale, psf11_r.scale)
 
         return
+
+    def test_psf_archive_stores_images_once(self):
+
+        psf0 = get_psf_profile(self.n, self.z, bulge=False)
+        psf1 = get_psf_profile(self.n, self.z, bulge=True)
+
+        archive_filehandle = h5py.File(join(self.workdir, "psf_archive_dedup.hdf5"), 'a')
+
+        # Add the same two PSFs for several galaxies in two images
+        for galaxy_id in range(4):
+            for psf_type, psf in (('bulge', psf1), ('disk', psf0)):
+                add_psf_to_archive(psf, archive_filehandle, galaxy_id=galaxy_id, exposure_index=0,
+                                   psf_type=psf_type, stamp_size=self.stamp_size, scale=self.pixel_scale,
+                                   image_id=galaxy_id // 2)
+
+        assert len(archive_filehandle[psf_images_group_name]) == 2
+
+        psf0_i = galsim.ImageF(self.stamp_size, self.stamp_size, scale=self.pixel_scale)
+        psf0.drawImage(psf0_i, method="no_pixel")
+        for galaxy_id in range(4):
+            psf_r = get_psf_from_archive(archive_filehandle, galaxy_id=galaxy_id, exposure_index=0,
+                                         psf_type='disk')
+            assert_allclose(psf0_i.array, psf_r.array)
+
+        # Copy the entries into another archive which already has some of them
+        other_archive_filehandle = h5py.File(join(self.workdir, "psf_archive_other.hdf5"), 'a')
+        add_psf_to_archive(psf0, other_archive_filehandle, galaxy_id=10, exposure_index=0, psf_type='disk',
+                           stamp_size=self.stamp_size, scale=self.pixel_scale, image_id=5)
+        add_psf_archive_entries(other_archive_filehandle, *get_psf_archive_entries(archive_filehandle))
+
+        assert len(other_archive_filehandle[psf_images_group_name]) == 2
+        psf_r = get_psf_from_archive(other_archive_filehandle, galaxy_id=3, exposure_index=0, psf_type='disk')
+        assert_allclose(psf0_i.array, psf_r.array)
+
+        # Pruning to an image which only uses one of the PSFs should remove the other
+        prune_psf_archive(other_archive_filehandle, {5})
+
+        assert len(other_archive_filehandle[psf_images_group_name]) == 1
+        psf_r = get_psf_from_archive(other_archive_filehandle, galaxy_id=10, exposure_index=0, psf_type='disk')
+        assert_allclose(psf0_i.array, psf_r.array)
+        with pytest.raises(KeyError):
+            get_psf_from_archive(other_archive_filehandle, galaxy_id=3, exposure_index=0, psf_type='disk')
+
+        other_archive_filehandle.close()
+        archive_filehandle.close()
+
+        return
+
+    def test_psf_image_drawn_once(self, monkeypatch):
+        """ Test that each PSF image is only drawn once, however many times it's added to archives.
+        """
+
+        # Use a profile no other test uses, so its image isn't already cached
+        psf = galsim.Gaussian(sigma=2.345)
+
+        draw_calls = []
+        draw_psf_stamp = psf_module._draw_psf_stamp
+
+        def counting_draw_psf_stamp(*args, **kwargs):
+            draw_calls.append(args)
+            return draw_psf_stamp(*args, **kwargs)
+
+        monkeypatch.setattr(psf_module, "_draw_psf_stamp", counting_draw_psf_stamp)
+
+        archive_filehandle = h5py.File(join(self.workdir, "psf_archive_draw.hdf5"), 'a')
+
+        for galaxy_id in range(3):
+            for exposure_index in range(2):
+                for psf_type in ('bulge', 'disk'):
+                    add_psf_to_archive(psf, archive_filehandle, galaxy_id=galaxy_id, exposure_index=exposure_index,
+                                       psf_type=psf_type, stamp_size=self.stamp_size, scale=self.pixel_scale)
+
+        assert len(draw_calls) == 1
+        assert len(archive_filehandle[psf_images_group_name]) == 1
+
+        # A different stamp size needs a new image
+        add_psf_to_archive(psf, archive_filehandle, galaxy_id=3, exposure_index=0, psf_type='bulge',
+                           stamp_size=self.stamp_size // 2, scale=self.pixel_scale)
+        assert len(draw_calls) == 2
+
+        archive_filehandle.close()
+
+        return
+
+    def test_psf_cube(self):
+
+        psf0 = get_psf_profile(self.n, self.z, bulge=False)
+        psf1 = get_psf_profile(self.n, self.z, bulge=True)
+
+        archive_filehandle = h5py.File(join(self.workdir, "psf_archive_cube.hdf5"), 'a')
+
+        num_galaxies = 5
+        for galaxy_id in range(num_galaxies):
+            for exposure_index in range(2):
+                add_psf_to_archive(psf1, archive_filehandle, galaxy_id=galaxy_id, exposure_index=exposure_index,
+                                   psf_type='bulge', stamp_size=self.stamp_size, scale=self.pixel_scale)
+                add_psf_to_archive(psf0, archive_filehandle, galaxy_id=galaxy_id, exposure_index=exposure_index,
+                                   psf_type='disk', stamp_size=self.stamp_size, scale=self.pixel_scale)
+
+        psf_table = table.Table([np.arange(num_galaxies), -np.ones(num_galaxies, dtype=np.int32),
+                                 -np.ones(num_galaxies, dtype=np.int32), -np.ones(num_galaxies, dtype=np.int32)],
+                                names=(pstf.ID, pstf.template, pstf.bulge_index, pstf.disk_index))
+
+        sort_psfs_from_archive(psf_table, "psf_cube.fits", exposure_index=1, archive_filehandle=archive_filehandle,
+                               stamp_size=self.stamp_size, scale=self.pixel_scale, workdir=self.workdir,
+                               layout=psf_cube_layout)
+        archive_filehandle.close()
+
+        psf_table_r, psf_cube, scale = read_psf_cube("psf_cube.fits", workdir=self.workdir)
+
+        # Only the two distinct PSFs should be stored
+        assert psf_cube.shape == (2, self.stamp_size, self.stamp_size)
+        assert_almost_equal(scale, self.pixel_scale)
+        assert (psf_table_r[pstf.bulge_index] != psf_table_r[pstf.disk_index]).all()
+
+        for psf_type, psf in (('bulge', psf1), ('disk', psf0)):
+            psf_i = galsim.ImageF(self.stamp_size, self.stamp_size, scale=self.pixel_scale)
+            psf.drawImage(psf_i, method="no_pixel")
+            for galaxy_id in range(num_galaxies):
+                psf_r = get_psf_from_cube(psf_table_r, psf_cube, galaxy_id, psf_type, scale)
+                assert_allclose(psf_i.array, psf_r.array)
+
+        return
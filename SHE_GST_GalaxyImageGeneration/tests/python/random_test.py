@@ -0,0 +1,62 @@
+""" @file random_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the random streams used for objects in the physical model.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import unittest
+
+from SHE_GST_GalaxyImageGeneration.utility.random import (RNG_STREAM_NOISE, RNG_STREAM_STAMP_PLACEMENT,
+                                                          get_rng, get_stream_seed)
+
+
+class RandomStreamsTestCase(unittest.TestCase):
+
+    def setUp(self):
+
+        self.seed = 8241573
+        self.id_seq = (0, 0, 3, 0, 0, 12)
+
+    def test_get_rng_reproducible(self):
+
+        # The same stream should give the same values, regardless of what's been drawn from other streams
+        r1 = get_rng(self.seed, self.id_seq, RNG_STREAM_STAMP_PLACEMENT).random(10)
+        get_rng(self.seed, (0, 0, 4), RNG_STREAM_STAMP_PLACEMENT).random(100)
+        r2 = get_rng(self.seed, self.id_seq, RNG_STREAM_STAMP_PLACEMENT).random(10)
+
+        assert (r1 == r2).all()
+
+    def test_get_rng_independent(self):
+
+        r = get_rng(self.seed, self.id_seq, RNG_STREAM_STAMP_PLACEMENT).random(10)
+
+        # Changing any of the seed, ID, stream, or counters should give a different stream
+        assert not (r == get_rng(self.seed + 1, self.id_seq, RNG_STREAM_STAMP_PLACEMENT).random(10)).all()
+        assert not (r == get_rng(self.seed, (0, 0, 3, 0, 0, 13), RNG_STREAM_STAMP_PLACEMENT).random(10)).all()
+        assert not (r == get_rng(self.seed, self.id_seq, RNG_STREAM_NOISE).random(10)).all()
+        assert not (r == get_rng(self.seed, self.id_seq, RNG_STREAM_STAMP_PLACEMENT, 1).random(10)).all()
+
+    def test_get_stream_seed(self):
+
+        stream_seeds = [get_stream_seed(self.seed, self.id_seq, RNG_STREAM_NOISE, di) for di in range(4)]
+
+        assert stream_seeds == [get_stream_seed(self.seed, self.id_seq, RNG_STREAM_NOISE, di) for di in range(4)]
+        assert len(set(stream_seeds)) == 4
+        for stream_seed in stream_seeds:
+            assert 0 < stream_seed < 2 ** 32
@@ -0,0 +1,109 @@
+""" @file snapshot_test.py
+
+    Created 18 Oct 2026
+
+    Tests of saving and loading snapshots of the physical model of images.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import os
+
+import pytest
+
+from SHE_GST_GalaxyImageGeneration.config.config_default import load_default_configurations
+from SHE_GST_GalaxyImageGeneration.galaxy import get_galaxy_param_arrays
+from SHE_GST_GalaxyImageGeneration.snapshot import get_snapshot_filename, load_snapshot, save_snapshot
+
+
+class TestSnapshot:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.seed = 1234
+        cls.param_names = ('apparent_mag_vis', 'redshift', 'sersic_index', 'rotation')
+
+        return
+
+    @classmethod
+    def teardown_class(cls):
+
+        return
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmpdir):
+        self.snapshot_dir = tmpdir.strpath
+
+    def get_image(self, seed):
+        survey, options = load_default_configurations()
+        options['snapshot_dir'] = self.snapshot_dir
+        survey.set_seed(seed)
+        image = survey.add_image_group().add_image()
+        # The survey owns the image, so it must be kept alive for as long as the image is used
+        return survey, image, options
+
+    def test_filename(self):
+        """ Test that only images with the same model and seed share a snapshot filename.
+        """
+
+        _survey, image, options = self.get_image(self.seed)
+        snapshot_filename = get_snapshot_filename(image, options)
+
+        assert os.path.split(snapshot_filename)[0] == self.snapshot_dir
+
+        _same_survey, same_image, _ = self.get_image(self.seed)
+        assert get_snapshot_filename(same_image, options) == snapshot_filename
+
+        _other_survey, other_image, _ = self.get_image(self.seed + 1)
+        assert get_snapshot_filename(other_image, options) != snapshot_filename
+
+        # Options which change the galaxy population should also change it
+        options['num_target_galaxies'] += 1
+        assert get_snapshot_filename(image, options) != snapshot_filename
+
+        options['snapshot_dir'] = None
+        assert get_snapshot_filename(image, options) is None
+
+    def test_save_and_load(self):
+        """ Test that a loaded image has the same galaxies as the saved one.
+        """
+
+        _survey, image, options = self.get_image(self.seed)
+        snapshot_filename = get_snapshot_filename(image, options)
+        assert load_snapshot(image, snapshot_filename) is None
+
+        image.autofill_children()
+        image.generate_galaxy_descendant_parameters()
+        population = {'galaxy_IDs': [galaxy.get_full_ID() for galaxy in image.get_galaxy_descendants()]}
+        save_snapshot(image, snapshot_filename, population)
+        assert os.path.exists(snapshot_filename)
+
+        galaxy_rows, params = get_galaxy_param_arrays(image, self.param_names)
+
+        # Load it into an image which would generate different galaxies
+        _other_survey, other_image, _ = self.get_image(self.seed + 1)
+        assert load_snapshot(other_image, snapshot_filename) == population
+
+        other_galaxy_rows, other_params = get_galaxy_param_arrays(other_image, self.param_names)
+
+        assert other_galaxy_rows == galaxy_rows
+        for name in self.param_names:
+            assert (other_params[name] == params[name]).all()
@@ -0,0 +1,71 @@
+""" @file stamp_sizes_test.py
+
+    Created 18 Oct 2026
+
+    Tests of choosing galaxy stamp sizes.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import galsim
+
+from SHE_GST_GalaxyImageGeneration.stamp_sizes import (MAX_GOOD_STAMP_SIZE, StampSizePlanner, get_fft_size,
+                                                       get_good_stamp_size)
+
+
+class TestStampSizes:
+    """
+
+
+    """
+
+    def test_good_stamp_size(self):
+        """ Test that sizes are rounded up to the next even size with no prime factors larger than 5.
+        """
+
+        assert get_good_stamp_size(1) == 2
+        assert get_good_stamp_size(37) == 40
+        assert get_good_stamp_size(48) == 48
+        assert get_good_stamp_size(49) == 50
+        assert get_good_stamp_size(97) == 100
+        assert get_good_stamp_size(MAX_GOOD_STAMP_SIZE + 1) == MAX_GOOD_STAMP_SIZE + 1
+
+        for min_size in range(1, 1000):
+            size = get_good_stamp_size(min_size)
+            assert size >= min_size
+            assert size % 2 == 0
+            for factor in (2, 3, 5):
+                while size % factor == 0:
+                    size //= factor
+            assert size == 1
+
+    def test_planner(self):
+        """ Test that the planner records what it chose for each galaxy.
+        """
+
+        profile = galsim.Convolve([galsim.Gaussian(sigma = 2.), galsim.Airy(lam_over_diam = 2.)])
+
+        planner = StampSizePlanner()
+        assert planner.plan(1, 37, [(profile, 'auto')]) == 40
+        assert planner.plan(2, 37, [(profile, 'auto')], max_size = 39) == 39
+
+        plan_table = planner.get_table()
+        assert len(plan_table) == 2
+        assert list(plan_table["ID"]) == [1, 2]
+        assert list(plan_table["MIN_STAMP_SIZE"]) == [37, 37]
+        assert list(plan_table["STAMP_SIZE"]) == [40, 39]
+        assert plan_table["FFT_SIZE"][0] == get_fft_size(profile, 40)
+        assert plan_table["FFT_SIZE"][0] >= 40
@@ -0,0 +1,76 @@
+""" @file table_builder_test.py
+
+    Created 17 Oct 2026
+
+    Tests of the columnar table builder.
+"""
+
+__updated__ = "2026-10-17"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+from astropy import table
+
+from SHE_GST_GalaxyImageGeneration.utility.table_builder import TableBuilder
+import numpy as np
+
+
+class TestTableBuilder:
+    """
+
+
+    """
+
+    def setup_method(self):
+
+        self.template_table = table.Table(names=("ID", "RA", "NAME", "TARGET"),
+                                          dtype=(np.int64, np.float32, "U8", bool))
+        self.template_table["RA"].unit = "deg"
+        self.template_table.meta["MODEL"] = "test"
+
+        self.rows = [{"ID": i, "RA": 0.5 * i, "NAME": "gal" + str(i), "TARGET": i % 2 == 0} for i in range(10)]
+
+    def test_add_row(self):
+        """ Test that a table built row by row, past the initial capacity, matches one filled with Table.add_row.
+        """
+
+        builder = TableBuilder(self.template_table, initial_capacity=3)
+        expected_table = self.template_table.copy()
+        for row in self.rows:
+            builder.add_row(row)
+            expected_table.add_row(row)
+
+        built_table = builder.to_table()
+
+        assert len(builder) == len(self.rows)
+        assert built_table.colnames == expected_table.colnames
+        assert built_table.dtype == expected_table.dtype
+        assert built_table["RA"].unit == "deg"
+        assert built_table.meta["MODEL"] == "test"
+        for colname in expected_table.colnames:
+            assert (built_table[colname] == expected_table[colname]).all()
+
+    def test_add_rows(self):
+        """ Test that blocks of rows can be added, with scalars broadcast and missing columns filled with zero.
+        """
+
+        builder = TableBuilder(self.template_table, initial_capacity=1)
+        builder.add_rows({"ID": np.arange(5), "RA": -1.})
+        builder.add_rows({"TARGET": True}, num_rows=2)
+
+        built_table = builder.to_table()
+
+        assert list(built_table["ID"]) == [0, 1, 2, 3, 4, 0, 0]
+        assert list(built_table["RA"]) == [-1.] * 5 + [0.] * 2
+        assert list(built_table["TARGET"]) == [False] * 5 + [True] * 2
@@ -0,0 +1,137 @@
+""" @file tiled_rendering_test.py
+
+    Created 17 Oct 2026
+
+    Tests of drawing galaxy stamps onto images in tiles.
+"""
+
+__updated__ = "2026-10-18"
+
+# Copyright (C) 2012-2020 Euclid Science Ground Segment
+#
+# This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+# Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+# any later version.
+#
+# This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+import galsim
+from numpy.testing import assert_allclose, assert_array_equal
+
+from SHE_GST_GalaxyImageGeneration.tiled_rendering import Stamp, draw_stamps, get_dither_oversampling
+import numpy as np
+
+
+class TestTiledRendering:
+    """
+
+
+    """
+
+    @classmethod
+    def setup_class(cls):
+
+        cls.image_size = 200
+        cls.stamp_size = 32
+        cls.tile_size = 64
+        cls.dither_offsets = [(0., 0.), (0.5, 0.5)]
+
+        # Set up stamps scattered across the image, including ones which cross tile boundaries
+        rng = np.random.RandomState(1234)
+        cls.stamps = []
+        for _ in range(40):
+            xl = rng.randint(1, cls.image_size - cls.stamp_size + 1)
+            yl = rng.randint(1, cls.image_size - cls.stamp_size + 1)
+            bounds = galsim.BoundsI(xl, xl + cls.stamp_size - 1, yl, yl + cls.stamp_size - 1)
+            profile = galsim.Gaussian(sigma=rng.uniform(1., 4.), flux=rng.uniform(10., 100.))
+            sp_shift = (rng.uniform(), rng.uniform())
+            cls.stamps.append(Stamp(bounds, [(profile, (0, 0), sp_shift, 'auto')]))
+
+        return
+
+    @classmethod
+    def teardown_class(cls):
+
+        return
+
+    def _get_images(self):
+        return [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in self.dither_offsets]
+
+    def test_tiled_matches_serial(self):
+        """ Test that drawing in tiles gives the same images as drawing serially.
+        """
+
+        serial_images = self._get_images()
+        draw_stamps(self.stamps, serial_images, self.dither_offsets)
+
+        tiled_images = self._get_images()
+        draw_stamps(self.stamps, tiled_images, self.dither_offsets, tile_size=self.tile_size, num_processes=4)
+
+        for serial_image, tiled_image in zip(serial_images, tiled_images):
+            assert serial_image.array.sum() > 0
+            assert_allclose(tiled_image.array, serial_image.array, rtol=1e-5, atol=1e-6)
+
+    def test_oversampled_dithers_match_separate_draws(self):
+        """ Test that drawing all dithers from one oversampled draw matches drawing each separately.
+        """
+
+        dither_offsets = [(0., 0.), (0.5, 0.), (0., 0.5), (0.5, 0.5)]
+        assert get_dither_oversampling(dither_offsets) == 2
+        assert get_dither_oversampling([(0., 0.), (0.3, 0.)]) is None
+
+        separate_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps(self.stamps, separate_images, dither_offsets)
+
+        oversampled_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps(self.stamps, oversampled_images, dither_offsets, oversample_dithers=True)
+
+        for separate_image, oversampled_image in zip(separate_images, oversampled_images):
+            assert separate_image.array.sum() > 0
+            assert_allclose(oversampled_image.array, separate_image.array, rtol=1e-4,
+                            atol=1e-4 * separate_image.array.max())
+
+    def test_oversampled_dithers_keep_draw_methods(self):
+        """ Test that components drawn by photon shooting or in real space are drawn for each dither as they would be
+            without oversampling, while others in the same stamp are drawn from the oversampled draw.
+        """
+
+        dither_offsets = [(0., 0.), (0.5, 0.), (0., 0.5), (0.5, 0.5)]
+
+        stamps = []
+        for i, stamp in enumerate(self.stamps[:6]):
+            profile, centre_offset, sp_shift, _ = stamp.components[0]
+            method = ('phot', 'real_space')[i % 2]
+            stamps.append(Stamp(stamp.bounds, [(profile, centre_offset, sp_shift, method)],
+                                photon_seeds=[1000 * i + di + 1 for di in range(len(dither_offsets))]))
+
+        separate_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps(stamps, separate_images, dither_offsets)
+
+        oversampled_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps(stamps, oversampled_images, dither_offsets, oversample_dithers=True)
+
+        for separate_image, oversampled_image in zip(separate_images, oversampled_images):
+            assert separate_image.array.sum() > 0
+            assert_array_equal(oversampled_image.array, separate_image.array)
+
+        # A stamp mixing methods draws its FFT component from the oversampled draw, and the rest separately
+        profile, centre_offset, sp_shift, _ = self.stamps[0].components[0]
+        mixed_stamp = Stamp(self.stamps[0].bounds,
+                            [(profile, centre_offset, sp_shift, 'auto'),
+                             (profile, centre_offset, sp_shift, 'phot')],
+                            photon_seeds=[10, 11, 12, 13])
+
+        separate_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps([mixed_stamp], separate_images, dither_offsets)
+
+        oversampled_images = [galsim.ImageF(self.image_size, self.image_size, scale=1.0) for _ in dither_offsets]
+        draw_stamps([mixed_stamp], oversampled_images, dither_offsets, oversample_dithers=True)
+
+        for separate_image, oversampled_image in zip(separate_images, oversampled_images):
+            assert_allclose(oversampled_image.array, separate_image.array, rtol=1e-4,
+                            atol=1e-4 * separate_image.array.max())
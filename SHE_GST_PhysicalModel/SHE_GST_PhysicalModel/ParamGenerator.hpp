@@ -25,7 +25,7 @@
 #define SHE_SIM_GAL_PARAMS_PARAMGENERATOR_HPP_
 
 #include <unordered_map>
-#include <unordered_set>
+#include <vector>
 
 #include "SHE_GST_PhysicalModel/common.hpp"
 #include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
@@ -53,7 +53,7 @@ protected:
 
 	flt_t _cached_value;
 	owner_t * _p_owner;
-	std::unordered_set<name_t> _dependant_names;
+	std::vector<param_id_t> _dependant_ids;
 	const ParamParam * _p_params;
 	const level_t * _p_generation_level;
 
@@ -62,7 +62,9 @@ protected:
 	virtual void _generate();
 
 	flt_t _request_param_value(name_t const & name);
+	flt_t _request_param_value(param_id_t const & id);
 	ParamGenerator * _request_param(name_t const & name);
+	ParamGenerator * _request_param(param_id_t const & id);
 
     bool _generated_at_this_level() const;
 	bool _provisionally_generated_at_this_level() const;
@@ -85,7 +87,7 @@ private:
 	virtual void _decache();
 	void _clear_cache();
 
-	void _add_dependant(name_t const & dependant_name);
+	void _add_dependant(param_id_t const & dependant_id);
 
 	virtual void _determine_value();
 
@@ -109,6 +111,8 @@ public:
 
 	virtual name_t name() const = 0;
 
+	virtual param_id_t id() const = 0;
+
 	owner_t * get_p_owner();
 	owner_t const * get_p_owner() const;
 	owner_t & get_owner();
@@ -134,10 +138,14 @@ public:
 	flt_t const & get_new();
 
 	flt_t const & request_value(name_t const & requester_name);
+	flt_t const & request_value(param_id_t const & requester_id);
 	flt_t const & request_new_value(name_t const & requester_name);
+	flt_t const & request_new_value(param_id_t const & requester_id);
 
 	ParamGenerator * request(name_t const & requester_name);
+	ParamGenerator * request(param_id_t const & requester_id);
 	ParamGenerator * request_new(name_t const & requester_name);
+	ParamGenerator * request_new(param_id_t const & requester_id);
 
 	const level_t & level_generated_at() const;
 
@@ -25,7 +25,9 @@
 #define SHE_SIM_GAL_PARAMS_PARAMHIERARCHYLEVEL_HPP_
 
 #include <cassert>
+#include <istream>
 #include <memory>
+#include <ostream>
 #include <random>
 #include <set>
 #include <unordered_map>
@@ -37,6 +39,7 @@
 #include "SHE_GST_PhysicalModel/param_params_map.hpp"
 
 #include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
 #include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
 #include "SHE_GST_PhysicalModel/ParamParam.hpp"
 
@@ -56,6 +59,8 @@ class Field;
 class GalaxyGroup;
 class GalaxyPair;
 class Galaxy;
+class GalaxyBlock;
+class CompactGalaxy;
 
 /**
  * An abstract base class template for a level in the hierarchy of parameter generation (eg. per-image, per-galaxy, etc.)
@@ -78,6 +83,7 @@ private:
 	// Private members
 	parent_ptr_t _p_parent;
 	children_t _children;
+	int_t _num_reserved_child_IDs;
 
 	param_params_t _local_param_params;
 	generation_level_map_t _local_generation_levels;
@@ -87,6 +93,9 @@ private:
 	std::vector<int_t> _seed_vec;
 	gen_t _rng;
 
+	generation_order_ptr_t _p_generation_order;
+	std::vector<param_id_t> * _p_generation_record;
+
 	// Private methods
 	void _update_parent(parent_ptr_t const & new_p_parent);
 
@@ -106,6 +115,18 @@ private:
 	 */
 	flt_t const & _request_param_value(name_t const & name, name_t const & requester_name);
 
+	/**
+	 * Get the value for a parameter with a given ID. Will throw an exception if none
+	 * has that ID. Will record the ID of the requesting parameter so it can
+	 * be updated later if need be.
+	 *
+	 * @param id ID of the desired parameter.
+	 * @param requester_id ID of the requesting parameter.
+	 *
+	 * @return The value of the desired parameter.
+	 */
+	flt_t const & _request_param_value(param_id_t const & id, param_id_t const & requester_id);
+
 	/**
 	 * Get the parameter with a given name. Will throw an exception if none
 	 * by that name exists. Will record the name of the requesting parameter so it can
@@ -118,19 +139,142 @@ private:
 	 */
 	ParamGenerator * _request_param(name_t const & name, name_t const & requester_name);
 
+	/**
+	 * Get the parameter with a given ID. Will throw an exception if none
+	 * has that ID. Will record the ID of the requesting parameter so it can
+	 * be updated later if need be.
+	 *
+	 * @param id ID of the desired parameter.
+	 * @param requester_id ID of the requesting parameter.
+	 *
+	 * @return Pointer to the desired parameter.
+	 */
+	ParamGenerator * _request_param(param_id_t const & id, param_id_t const & requester_id);
+
 	void _drop_local_param_param(name_t const & name);
 
 	void _drop_local_generation_level(name_t const & name);
 
+	/**
+	 * Get a hash of this level's configuration, which is the same for any levels whose parameters can be
+	 * generated in the same order.
+	 *
+	 * @return The hash.
+	 */
+	std::size_t _get_configuration_hash() const;
+
+	/**
+	 * Look up the compiled order for generating parameters at this level, for this level's configuration.
+	 *
+	 * @param configuration_hash The hash of this level's configuration, from _get_configuration_hash.
+	 *
+	 * @return Pointer to the order of parameter IDs, or nullptr if none has been compiled yet.
+	 */
+	generation_order_ptr_t _find_generation_order(std::size_t const & configuration_hash) const;
+
+	/**
+	 * Store the order in which this level's parameters were generated, so that other levels with the same
+	 * configuration can generate their parameters in the same order.
+	 *
+	 * @param configuration_hash The hash of this level's configuration, from _get_configuration_hash.
+	 * @param order IDs of all this level's parameters, in the order they were generated.
+	 *
+	 * @return Pointer to the stored order.
+	 */
+	generation_order_ptr_t _compile_generation_order(std::size_t const & configuration_hash,
+		std::vector<param_id_t> order) const;
+
+	/**
+	 * Check whether the parameter with a given ID was generated at this level, either normally or
+	 * provisionally, and so may differ between this and its siblings.
+	 *
+	 * @param id ID of the parameter.
+	 * @return Whether the parameter was generated at this level.
+	 */
+	bool _param_generated_here(param_id_t const & id) const;
+
+	/**
+	 * Check whether the parameter with a given ID currently has a cached value.
+	 *
+	 * @param id ID of the parameter.
+	 * @return Whether the parameter is cached.
+	 */
+	bool _param_cached(param_id_t const & id) const;
+
+	/**
+	 * Create a child of the level with the given name, for restoring from a snapshot. Will throw an exception
+	 * if this level can't have children of that type.
+	 *
+	 * @param level_name Name of the child's level, as returned by its get_name method.
+	 * @return Pointer to the new child.
+	 */
+	child_t * _spawn_child_by_name(name_t const & level_name);
+
+	/**
+	 * Write the cached values of the parameters generated at this level to a snapshot, as a count followed by
+	 * (ID, value) pairs, and then the state of this level's random number generator.
+	 *
+	 * @param out Stream to write to.
+	 */
+	void _write_snapshot_values(std::ostream & out) const;
+
+	/**
+	 * Read values written by _write_snapshot_values, and cache them as this object's parameter values. The
+	 * random number generator is restored to its state when they were written, so any parameters generated
+	 * afterwards get the same values they would have without the snapshot.
+	 *
+	 * @param in Stream to read from.
+	 * @param ids This process's ID for each parameter ID in the snapshot.
+	 */
+	void _read_snapshot_values(std::istream & in, std::vector<param_id_t> const & ids);
+
+	/**
+	 * Write the generation levels and param params set at this level and in use to a snapshot.
+	 *
+	 * @param out Stream to write to.
+	 */
+	void _write_snapshot_settings(std::ostream & out) const;
+
+	/**
+	 * Read settings written by _write_snapshot_settings, and set them at this level.
+	 *
+	 * @param in Stream to read from.
+	 */
+	void _read_snapshot_settings(std::istream & in);
+
+	/**
+	 * Write this object and all its descendants to a snapshot.
+	 *
+	 * @param out Stream to write to.
+	 */
+	void _write_snapshot(std::ostream & out) const;
+
+	/**
+	 * Replace this object's ID, seed, settings, parameter values and children with those from a snapshot,
+	 * following the name of its level.
+	 *
+	 * @param in Stream to read from.
+	 * @param ids This process's ID for each parameter ID in the snapshot.
+	 */
+	void _read_snapshot(std::istream & in, std::vector<param_id_t> const & ids);
+
 	friend class ParamGenerator; // So ParamGenerators can access _request_param_value and _clear_param_cache
+	friend class GalaxyBlock; // So GalaxyBlocks can reserve local IDs and step through them
 
 protected:
 
 	// Protected members
 	params_t _params;
+	std::vector<param_t *> _params_by_id;
 
 	// Protected methods
 
+	/**
+	 * Rebuilds the table of pointers to this object's parameters, indexed by parameter ID. Must be called
+	 * whenever the parameters map is rebuilt.
+	 */
+	void _index_params();
+
 	/**
 	 * Clears the cache of the parameter with the specified name, for both this and all its
 	 * children.
@@ -139,6 +283,14 @@ protected:
 	 */
 	void _clear_param_cache(name_t const & name);
 
+	/**
+	 * Clears the cache of the parameter with the specified ID, for both this and all its
+	 * children.
+	 *
+	 * @param id The ID of the parameter whose cache is to be cleared.
+	 */
+	virtual void _clear_param_cache(param_id_t const & id);
+
 	/**
 	 * Clears the cache of the parameter with the specified name, for only this.
 	 *
@@ -146,17 +298,40 @@ protected:
 	 */
 	void _clear_own_param_cache(name_t const & name);
 
+	/**
+	 * Clears the cache of the parameter with the specified ID, for only this.
+	 *
+	 * @param id The ID of the parameter whose cache is to be cleared.
+	 */
+	void _clear_own_param_cache(param_id_t const & id);
+
 	/**
 	 * Clears the caches of all parameters, for both this and all its
 	 * children.
 	 */
-	void _clear_param_cache();
+	virtual void _clear_param_cache();
 
 	/**
 	 * Clears the caches of all parameters, for only this.
 	 */
 	void _clear_own_param_cache();
 
+	/**
+	 * Write any data specific to this type of level to a snapshot. Does nothing by default.
+	 *
+	 * @param out Stream to write to.
+	 */
+	virtual void _write_snapshot_data(std::ostream & out) const {}
+
+	/**
+	 * Read data written by _write_snapshot_data. This is called after the object's ID and seed are restored,
+	 * but before its parameter values are. Does nothing by default.
+	 *
+	 * @param in Stream to read from.
+	 * @param ids This process's ID for each parameter ID in the snapshot.
+	 */
+	virtual void _read_snapshot_data(std::istream & in, std::vector<param_id_t> const & ids) {}
+
 public:
 
 	/**
@@ -268,7 +443,21 @@ public:
 	// Child-related methods
 #if(1)
 
-	void clear_children() { _children.clear(); }
+	void clear_children() { _children.clear(); _num_reserved_child_IDs = 0; }
+
+	/**
+	 * Remove this object's children to free their memory, while keeping their IDs in use. Children added
+	 * afterwards get the same IDs and seeds they would have if the removed children were still present.
+	 */
+	void release_children() { _num_reserved_child_IDs += _children.size(); _children.clear(); }
+
+	/**
+	 * Reserve IDs for a number of children without creating them, so that the next child added gets the ID
+	 * and seed it would have if these had been added and then released.
+	 *
+	 * @param N Number of child IDs to skip.
+	 */
+	void skip_children(int_t const & N) { _num_reserved_child_IDs += N; }
 
 	/**
 	 * Get a vector of this object's children.
@@ -550,6 +739,17 @@ public:
     std::vector<GalaxyGroup *> get_galaxy_group_descendants();
     std::vector<GalaxyPair *> get_galaxy_pair_descendants();
 	std::vector<Galaxy *> get_galaxy_descendants();
+	std::vector<GalaxyBlock *> get_galaxy_block_descendants();
+
+	/**
+	 * Get handles to the galaxies stored in GalaxyBlocks descended from this object, in the order of
+	 * get_galaxy_block_descendants(). These are the galaxies which follow get_galaxy_descendants() in
+	 * the bulk methods, such as get_galaxy_descendant_full_IDs().
+	 *
+	 * @return A handle to each galaxy stored in a block.
+	 */
+	std::vector<CompactGalaxy> get_compact_galaxy_descendants();
+
 	std::vector<Galaxy *> get_background_galaxy_descendants();
 	std::vector<Galaxy *> get_foreground_galaxy_descendants();
 	std::vector<Galaxy *> get_central_galaxy_descendants();
@@ -579,6 +779,24 @@ public:
 	 */
 	param_t * get_param(name_t const & name);
 
+	/**
+	 * Get a pointer to the parameter generator with a given ID. Will throw an exception if none
+	 * has that ID.
+	 *
+	 * @param id ID of the desired parameter generator.
+	 * @return Pointer to the the desired parameter generator.
+	 */
+	const param_t * get_param(param_id_t const & id) const;
+
+	/**
+	 * Get a pointer to the parameter generator with a given ID. Will throw an exception if none
+	 * has that ID.
+	 *
+	 * @param id ID of the desired parameter generator.
+	 * @return Pointer to the the desired parameter generator.
+	 */
+	param_t * get_param(param_id_t const & id);
+
 	/**
 	 * Get the value for a parameter with a given name. Will throw an exception if none
 	 * by that name exists.
@@ -588,6 +806,15 @@ public:
 	 */
 	flt_t const & get_param_value(name_t name);
 
+	/**
+	 * Get the value for a parameter with a given ID. Will throw an exception if none
+	 * has that ID.
+	 *
+	 * @param id ID of the desired parameter, as returned by get_param_id.
+	 * @return The value of the desired parameter.
+	 */
+	flt_t const & get_param_value(param_id_t const & id);
+
 	/**
 	 * Get the level at which a parameter should be generated
 	 *
@@ -597,6 +824,15 @@ public:
 	 */
 	level_t const & get_generation_level( name_t name ) const;
 
+	/**
+	 * Get the level at which a parameter should be generated
+	 *
+	 * @param id The ID of the parameter
+	 *
+	 * @return The level it's generated at
+	 */
+	level_t const & get_generation_level( param_id_t const & id ) const;
+
 	/**
 	 * Get a pointer to a value which contains the level at which a parameter should be generated
 	 *
@@ -610,28 +846,86 @@ public:
 
 	void set_p_generation_level( name_t const & name, level_t const * const & p_level );
 
+	void set_p_generation_level( param_id_t const & id, level_t const * const & p_level );
+
 	ParamParam const * const & get_p_param_params(name_t const & name) const;
 
 	template< typename T_pp, typename... Args >
-	void set_param_params(name_t name, Args... args)
+	void set_param_params(name_t const & name, Args... args)
+	{
+		set_param_params<T_pp>( get_param_id(name), args... );
+	}
+
+	template< typename T_pp, typename... Args >
+	void set_param_params(param_id_t const & id, Args... args)
 	{
-		boost::algorithm::to_lower(name);
+		name_t const & name = get_param_name(id);
 		_local_param_params[name] = param_param_ptr_t(new T_pp(args...));
-		set_p_param_params( name, _local_param_params.at(name).get() );
+		set_p_param_params( id, _local_param_params.at(name).get() );
 	}
 
 	template< typename... Args >
-	void set_param_params(name_t name, name_t param_type, Args... args)
+	void set_param_params(name_t const & name, name_t param_type, Args... args)
+	{
+		set_param_params( get_param_id(name), param_type, args... );
+	}
+
+	template< typename... Args >
+	void set_param_params(param_id_t const & id, name_t param_type, Args... args)
 	{
-		boost::algorithm::to_lower(name);
 		boost::algorithm::to_lower(param_type);
+		name_t const & name = get_param_name(id);
 		_local_param_params[name] = param_param_ptr_t(param_params_map.at(param_type)->recreate({args...}));
-		set_p_param_params( name, _local_param_params.at(name).get() );
+		set_p_param_params( id, _local_param_params.at(name).get() );
 	}
 
 	void set_p_param_params( name_t const & name, ParamParam const * const & params );
 
-	void generate_parameters();
+	void set_p_param_params( param_id_t const & id, ParamParam const * const & params );
+
+	/**
+	 * Generate all parameters for this object and its descendants. The first time a level with a given
+	 * configuration (hierarchy level, parameter params, and generation levels) is generated, the order in
+	 * which its parameters are determined is recorded. Later levels with the same configuration generate
+	 * their parameters in this order, so each parameter's dependencies are already cached when it's reached.
+	 * This gives the same values as generating them on demand.
+	 */
+	virtual void generate_parameters();
+
+	/**
+	 * Get the total number of galaxies descended from this object, including those stored in GalaxyBlocks.
+	 *
+	 * @return The number of galaxy descendants.
+	 */
+	int_t get_num_galaxy_descendants();
+
+	/**
+	 * Generate all parameters for every galaxy descended from this object, in the order of
+	 * get_galaxy_descendants(), followed by those stored in GalaxyBlocks in the order of
+	 * get_galaxy_block_descendants(). This gives the same values as calling generate_parameters on each
+	 * galaxy in turn, but needs only a single call.
+	 */
+	void generate_galaxy_descendant_parameters();
+
+	/**
+	 * Get the values of a set of parameters for every galaxy descended from this object, generating them if
+	 * necessary. This gives the same values as calling get_param_value on each galaxy in turn, but the names
+	 * only need to be lowered once and the whole set is retrieved in a single call.
+	 *
+	 * @param names Names of the desired parameters.
+	 * @param p_values Pointer to an array of get_num_galaxy_descendants() * (number of names) values, which
+	 *        is filled in row-major order, with one row per galaxy in the order of get_galaxy_descendants(),
+	 *        followed by one row per galaxy stored in each of get_galaxy_block_descendants().
+	 */
+	void get_galaxy_descendant_param_values( std::vector<name_t> names, flt_t * const & p_values );
+
+	/**
+	 * Get the full IDs of every galaxy descended from this object, in the same order as
+	 * get_galaxy_descendant_param_values().
+	 *
+	 * @return A vector of the galaxies' full IDs.
+	 */
+	std::vector<long_int_t> get_galaxy_descendant_full_IDs();
 
 	int_t get_local_ID() const { return _local_ID; }
 	long_int_t get_full_ID() const;
@@ -640,13 +934,41 @@ public:
 
 #endif
 
-	void clear() { clear_children(); _clear_own_param_cache(); }
+	virtual void clear() { clear_children(); _clear_own_param_cache(); }
 
 	int_t get_seed() const { return _seed; }
 	long_int_t get_full_seed() const;
 	void set_seed();
 	void set_seed( int_t const & seed );
 
+	// Snapshot methods
+#if(1)
+
+	/**
+	 * Save a snapshot of this object and all its descendants to a binary file. This records the structure of
+	 * the hierarchy below this object, the ID, seed, and state of the random number generator of each level
+	 * in it, the generation levels and param params set at each level, and the values of the parameters
+	 * generated at each level which have been cached. The cached values and generator states of this
+	 * object's ancestors are recorded too. Nothing is generated, so parameters which aren't cached are
+	 * generated after the snapshot is loaded, with the same values they'd have had without it.
+	 *
+	 * @param filename Name of the file to save to.
+	 */
+	void save_snapshot(name_t const & filename) const;
+
+	/**
+	 * Restore this object and its descendants from a snapshot saved by save_snapshot. This object's children
+	 * are replaced by those in the snapshot, the recorded settings of this object and its new descendants are
+	 * set, and the recorded parameter values and generator states of these and of its ancestors are restored,
+	 * so the values are used without being generated again. This object and its ancestors must have the same
+	 * levels and IDs as when the snapshot was saved.
+	 *
+	 * @param filename Name of the file to restore from.
+	 */
+	void load_snapshot(name_t const & filename);
+
+#endif
+
 	virtual ParamHierarchyLevel * clone() const = 0;
 
 }; // ParamHierarchyLevel
@@ -25,6 +25,15 @@
 %include "typemaps.i"
 %include "std_string.i"
 %include "std_vector.i"
+%include "exception.i"
+
+%{
+#define SWIG_FILE_WITH_INIT
+%}
+%include "numpy.i"
+%init %{
+import_array();
+%}
 
 %module SHE_GST_PhysicalModel
 
@@ -33,6 +42,7 @@
 	/* Include the headers in the wrapper code */
 	#include "SHE_GST_PhysicalModel/common.hpp"
 	#include "SHE_GST_PhysicalModel/default_values.hpp"
+	#include "SHE_GST_PhysicalModel/param_ids.hpp"
 	#include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
 	#include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
 	#include "SHE_GST_PhysicalModel/ParamParam.hpp"
@@ -41,6 +51,7 @@
 	#include "SHE_GST_PhysicalModel/levels/Field.hpp"
 	#include "SHE_GST_PhysicalModel/levels/FieldGroup.hpp"
 	#include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+	#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
 	#include "SHE_GST_PhysicalModel/levels/GalaxyGroup.hpp"
 	#include "SHE_GST_PhysicalModel/levels/GalaxyPair.hpp"
 	#include "SHE_GST_PhysicalModel/levels/Image.hpp"
@@ -52,9 +63,40 @@
 	 
 %}
  
+// Vectors used by the bulk parameter methods, declared before the headers are parsed so they're converted from and
+// to Python sequences
+namespace std {
+
+%template(StringVector) vector<std::string>;
+%template(LongVector) vector<long>;
+
+}
+
+// The raw-pointer version of this is wrapped below to take a numpy array
+%ignore SHE_GST_PhysicalModel::ParamHierarchyLevel::get_galaxy_descendant_param_values;
+
+// Typemaps and exception handling for the methods added with %extend below. These must be declared before the
+// headers are parsed, as that's when the extended methods are wrapped
+%apply (double* INPLACE_ARRAY2, int DIM1, int DIM2)
+	{( double * p_values,
+			int num_galaxies,
+			int num_names )}
+
+%exception fill_galaxy_descendant_param_values {
+	try
+	{
+		$action
+	}
+	catch (const std::exception & e)
+	{
+		SWIG_exception(SWIG_ValueError, e.what());
+	}
+}
+
 // Parse the header files to generate wrappers
 %include "SHE_GST_PhysicalModel/common.hpp"
 %include "SHE_GST_PhysicalModel/default_values.hpp"
+%include "SHE_GST_PhysicalModel/param_ids.hpp"
 %include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
 %include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
 %include "SHE_GST_PhysicalModel/ParamParam.hpp"
@@ -63,6 +105,7 @@
 %include "SHE_GST_PhysicalModel/levels/Field.hpp"
 %include "SHE_GST_PhysicalModel/levels/FieldGroup.hpp"
 %include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+%include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
 %include "SHE_GST_PhysicalModel/levels/GalaxyGroup.hpp"
 %include "SHE_GST_PhysicalModel/levels/GalaxyPair.hpp"
 %include "SHE_GST_PhysicalModel/levels/Image.hpp"
@@ -104,6 +147,46 @@ namespace SHE_GST_PhysicalModel {
 	{
 		return $self->set_param_params( name, param_type, arg1, arg2, arg3, arg4, arg5, arg6 );
 	}
+	void set_param_params(param_id_t id, name_t param_type )
+	{
+		return $self->set_param_params( id, param_type );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1 )
+	{
+		return $self->set_param_params( id, param_type, arg1 );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1, flt_t arg2 )
+	{
+		return $self->set_param_params( id, param_type, arg1, arg2 );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1, flt_t arg2, flt_t arg3 )
+	{
+		return $self->set_param_params( id, param_type, arg1, arg2, arg3 );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1, flt_t arg2, flt_t arg3, flt_t arg4 )
+	{
+		return $self->set_param_params( id, param_type, arg1, arg2, arg3, arg4 );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1, flt_t arg2, flt_t arg3, flt_t arg4, flt_t arg5 )
+	{
+		return $self->set_param_params( id, param_type, arg1, arg2, arg3, arg4, arg5 );
+	}
+	void set_param_params(param_id_t id, name_t param_type, flt_t arg1, flt_t arg2, flt_t arg3, flt_t arg4, flt_t arg5, flt_t arg6 )
+	{
+		return $self->set_param_params( id, param_type, arg1, arg2, arg3, arg4, arg5, arg6 );
+	}
+	void fill_galaxy_descendant_param_values( std::vector<std::string> const & names,
+			double * p_values,
+			int num_galaxies,
+			int num_names )
+	{
+		if( ( num_galaxies != $self->get_num_galaxy_descendants() ) or
+			( num_names != static_cast<int>(names.size()) ) )
+		{
+			throw std::length_error("Array to fill must have shape (number of galaxy descendants, number of names).");
+		}
+		return $self->get_galaxy_descendant_param_values( names, p_values );
+	}
 }
 
 }
@@ -111,6 +194,8 @@ namespace SHE_GST_PhysicalModel {
 // Tell SWIG to implement vectors of the PHL types as lists
 namespace std {
 
+%template(IntVector) vector<int>;
+
 %template(PHLVector) vector<SHE_GST_PhysicalModel::ParamHierarchyLevel *>;
 
 %template(ClusterVector) vector<SHE_GST_PhysicalModel::Cluster *>;
@@ -118,6 +203,8 @@ namespace std {
 %template(FieldVector) vector<SHE_GST_PhysicalModel::Field *>;
 %template(FieldGroupVector) vector<SHE_GST_PhysicalModel::FieldGroup *>;
 %template(GalaxyVector) vector<SHE_GST_PhysicalModel::Galaxy *>;
+%template(GalaxyBlockVector) vector<SHE_GST_PhysicalModel::GalaxyBlock *>;
+%template(CompactGalaxyVector) vector<SHE_GST_PhysicalModel::CompactGalaxy>;
 %template(GalaxyGroupVector) vector<SHE_GST_PhysicalModel::GalaxyGroup *>;
 %template(GalaxyPairVector) vector<SHE_GST_PhysicalModel::GalaxyPair *>;
 %template(ImageVector) vector<SHE_GST_PhysicalModel::Image *>;
@@ -28,6 +28,7 @@
 #include <random>
 #include <string>
 #include <unordered_map>
+#include <vector>
 
 // General typedefs
 
@@ -41,6 +42,7 @@ typedef double flt_t;
 
 typedef std::string str_t;
 typedef str_t name_t;
+typedef int_t param_id_t;
 
 typedef short_int_t level_t;
 typedef std::unique_ptr<level_t> level_ptr_t;
@@ -64,6 +66,8 @@ typedef ParamParam param_param_t;
 typedef std::unique_ptr<param_param_t> param_param_ptr_t;
 typedef std::unordered_map<name_t,param_param_ptr_t> param_params_t;
 
+typedef std::shared_ptr<std::vector<param_id_t> const> generation_order_ptr_t;
+
 // Other info
 
 constexpr const char * const logger_name = "SHE_GST_PM";
@@ -36,6 +36,7 @@ DEF_NAME(field)
 DEF_NAME(galaxy_group)
 DEF_NAME(galaxy_pair)
 DEF_NAME(galaxy)
+DEF_NAME(galaxy_block)
 
 #undef DEF_NAME
 
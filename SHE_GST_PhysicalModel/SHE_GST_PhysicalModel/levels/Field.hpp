@@ -25,6 +25,7 @@
 #define SHE_SIM_GAL_PARAMS_LEVELS_FIELD_HPP_
 
 #include <utility>
+#include <vector>
 
 #include "SHE_GST_PhysicalModel/common.hpp"
 #include "SHE_GST_PhysicalModel/default_values.hpp"
@@ -37,6 +38,7 @@ namespace SHE_GST_PhysicalModel
 // Forward-declare children
 class GalaxyGroup;
 class Galaxy;
+class GalaxyBlock;
 
 /**
  * TODO Auto-generated comment stub
@@ -71,6 +73,29 @@ public:
 
 	void add_galaxies(int_t const & N);
 
+	/**
+	 * Add a block of field galaxies, which stores their parameters compactly rather than as separate Galaxy
+	 * objects. The galaxies are generated the same as if they'd been added with add_galaxies.
+	 *
+	 * @param N Number of galaxies in the block.
+	 * @return The new block.
+	 */
+	GalaxyBlock * add_galaxy_block(int_t const & N);
+
+	/**
+	 * Add galaxies to this field until a given number brighter and a given number fainter than a magnitude
+	 * limit have been added. Each new galaxy's parameters are regenerated until it's of a type which is still
+	 * needed.
+	 *
+	 * @param num_bright Number of galaxies to add with apparent VIS magnitude at or below the limit.
+	 * @param num_faint Number of galaxies to add with apparent VIS magnitude above the limit.
+	 * @param mag_limit The limiting apparent VIS magnitude.
+	 * @return The new galaxies, with the bright galaxies first and then the faint galaxies, each in the
+	 *         order they were added.
+	 */
+	std::vector<Galaxy *> add_galaxies_by_magnitude(int_t const & num_bright, int_t const & num_faint,
+			flt_t const & mag_limit);
+
 #endif
 
 	// Methods to automatically add children
@@ -80,6 +105,11 @@ public:
 
 	void fill_galaxies();
 
+	/**
+	 * Add the galaxies fill_galaxies would add as a single GalaxyBlock.
+	 */
+	void fill_galaxy_block();
+
 #endif
 
 	virtual ParamHierarchyLevel * clone() const override { return new Field(*this); }
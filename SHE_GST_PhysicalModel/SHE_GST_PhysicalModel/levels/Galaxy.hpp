@@ -41,6 +41,23 @@ private:
 
 	bool _is_background;
 
+protected:
+
+	/**
+	 * Write whether this is a background galaxy to a snapshot.
+	 *
+	 * @param out Stream to write to.
+	 */
+	virtual void _write_snapshot_data(std::ostream & out) const override;
+
+	/**
+	 * Read whether this is a background galaxy from a snapshot, and set it up accordingly.
+	 *
+	 * @param in Stream to read from.
+	 * @param ids This process's ID for each parameter ID in the snapshot.
+	 */
+	virtual void _read_snapshot_data(std::istream & in, std::vector<param_id_t> const & ids) override;
+
 public:
 	Galaxy(ParamHierarchyLevel * const & parent = nullptr);
 	virtual ~Galaxy() {}
@@ -0,0 +1,183 @@
+/**********************************************************************\
+ @file GalaxyBlock.hpp
+ ------------------
+
+ A level which stores the parameters of many galaxies compactly.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+ any later version.
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+ details.
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+ \**********************************************************************/
+
+#ifndef SHE_SIM_GAL_PARAMS_LEVELS_GALAXYBLOCK_HPP_
+#define SHE_SIM_GAL_PARAMS_LEVELS_GALAXYBLOCK_HPP_
+
+#include <vector>
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/default_values.hpp"
+#include "SHE_GST_PhysicalModel/level_names.hpp"
+#include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+class GalaxyBlock;
+
+/**
+ * A lightweight handle to one of the galaxies stored in a GalaxyBlock.
+ */
+class CompactGalaxy
+{
+private:
+
+	GalaxyBlock * _p_block;
+	int_t _index;
+
+public:
+
+	CompactGalaxy(GalaxyBlock * const & p_block = nullptr, int_t const & index = 0)
+	: _p_block(p_block),
+	  _index(index)
+	{
+	}
+
+	GalaxyBlock * get_p_block() const { return _p_block; }
+	int_t get_index() const { return _index; }
+
+	flt_t get_param_value(name_t const & name) const;
+	flt_t get_param_value(param_id_t const & id) const;
+
+	/**
+	 * Get the local ID a Galaxy in place of this one would have.
+	 */
+	int_t get_local_ID() const;
+
+	long_int_t get_full_ID() const;
+
+	/**
+	 * Get the sequence of IDs from the survey down to this galaxy, as for a Galaxy in its place.
+	 */
+	std::vector<int_t> get_ID_seq() const;
+
+};
+
+/**
+ * A galaxy-level object which stands in for a number of galaxies, storing their parameters in contiguous
+ * per-parameter arrays rather than as separate Galaxy objects. Galaxy i of the block has local ID
+ * get_local_ID()+i, and its parameters are generated exactly as they would be for a Galaxy with that
+ * local ID, so a block gives the same values as the same number of galaxies added one by one.
+ *
+ * Only parameters which are generated at the galaxy level are stored for each galaxy. Others are shared
+ * by all galaxies in the block and taken from its parent. After generation, the block's own parameters
+ * hold the values for its last galaxy.
+ */
+class GalaxyBlock: public ParamHierarchyLevel
+{
+private:
+
+	int_t _num_galaxies;
+
+	// Index of each parameter's column, or -1 if it's shared by all galaxies in the block
+	std::vector<int_t> _column_indices;
+	std::vector<std::vector<flt_t>> _columns;
+
+	bool _generated;
+	bool _generating;
+
+	void _generate_if_necessary() { if(!_generated) generate_parameters(); }
+
+protected:
+
+	using ParamHierarchyLevel::_clear_param_cache;
+
+	/**
+	 * Clears the cache of the parameter with the specified ID, and marks the stored values as out of date.
+	 *
+	 * @param id The ID of the parameter whose cache is to be cleared.
+	 */
+	virtual void _clear_param_cache(param_id_t const & id) override;
+
+	/**
+	 * Clears the caches of all parameters, and marks the stored values as out of date.
+	 */
+	virtual void _clear_param_cache() override;
+
+	/**
+	 * Write the number of galaxies in the block and their stored parameter values to a snapshot.
+	 *
+	 * @param out Stream to write to.
+	 */
+	virtual void _write_snapshot_data(std::ostream & out) const override;
+
+	/**
+	 * Read the number of galaxies in the block and their stored parameter values from a snapshot.
+	 *
+	 * @param in Stream to read from.
+	 * @param ids This process's ID for each parameter ID in the snapshot.
+	 */
+	virtual void _read_snapshot_data(std::istream & in, std::vector<param_id_t> const & ids) override;
+
+public:
+	GalaxyBlock(ParamHierarchyLevel * const & parent = nullptr, int_t const & num_galaxies = 0);
+	virtual ~GalaxyBlock() {}
+
+	/**
+	 * Get the hierarchy level for this class.
+	 * @return The hierachy level. 0 = highest, 1 = just below 0, etc.
+	 */
+	virtual int_t get_hierarchy_level() const override {return dv::galaxy_level;}
+
+	virtual name_t get_name() const override {return galaxy_block_name;}
+
+	int_t get_num_galaxies() const { return _num_galaxies; }
+
+	/**
+	 * Generate the parameters for every galaxy in the block, storing those which vary from galaxy to galaxy.
+	 */
+	virtual void generate_parameters() override;
+
+	virtual void clear() override;
+
+	/**
+	 * Get the value of a parameter for one galaxy in the block, generating the block if necessary.
+	 *
+	 * @param i Index of the galaxy within the block.
+	 * @param id ID of the desired parameter.
+	 * @return The value of the parameter for this galaxy.
+	 */
+	flt_t get_galaxy_param_value(int_t const & i, param_id_t const & id);
+
+	/**
+	 * Get the values of a set of parameters for every galaxy in the block, generating the block if necessary.
+	 *
+	 * @param ids IDs of the desired parameters.
+	 * @param p_values Pointer to an array of (number of galaxies) * (number of IDs) values, which is filled
+	 *        in row-major order.
+	 */
+	void get_galaxy_param_values(std::vector<param_id_t> const & ids, flt_t * const & p_values);
+
+	long_int_t get_galaxy_full_ID(int_t const & i) const;
+
+	CompactGalaxy get_galaxy(int_t const & i);
+	std::vector<CompactGalaxy> get_galaxies();
+
+	virtual ParamHierarchyLevel * clone() const override { return new GalaxyBlock(*this); }
+
+};
+
+} // namespace SHE_GST_PhysicalModel
+
+#endif // SHE_SIM_GAL_PARAMS_LEVELS_GALAXYBLOCK_HPP_
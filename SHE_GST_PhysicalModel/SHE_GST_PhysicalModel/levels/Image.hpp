@@ -112,6 +112,13 @@ public:
 	void fill_field();
 	void autofill_field();
 
+	/**
+	 * Automatically fill this image as autofill_children does, except that each field's galaxies are
+	 * stored in a GalaxyBlock rather than as separate Galaxy objects. The galaxies get the same IDs and
+	 * parameters either way.
+	 */
+	void autofill_children_with_galaxy_blocks();
+
 #endif
 
 	virtual ParamHierarchyLevel * clone() const override { return new Image(*this); }
@@ -69,6 +69,13 @@ public:
 
     virtual void fill_children() override { fill_images(); }
 
+    /**
+     * Get the number of images which fill_images would add.
+     *
+     * @return The number of images in this group.
+     */
+    int_t get_num_images();
+
     void fill_images();
 
     void autofill_images() { autofill_children(); }
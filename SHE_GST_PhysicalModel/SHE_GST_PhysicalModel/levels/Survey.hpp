@@ -75,6 +75,13 @@ public:
 
 	virtual void fill_children() override { fill_image_groups(); }
 
+    /**
+     * Get the number of image groups which fill_image_groups would add.
+     *
+     * @return The number of image groups in this survey.
+     */
+    int_t get_num_image_groups();
+
     void fill_image_groups();
 
     void autofill_image_groups() { autofill_children(); }
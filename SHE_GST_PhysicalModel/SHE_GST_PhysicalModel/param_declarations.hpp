@@ -33,6 +33,7 @@ namespace SHE_GST_PhysicalModel {
 
 #define DECLARE_PARAM(param) \
 extern const name_t param##_name; \
+extern const param_id_t param##_id; \
  \
 class param##_obj : public ParamGenerator \
 { \
@@ -53,6 +54,11 @@ public: \
 		return param##_name; \
 	} \
 	 \
+	virtual param_id_t id() const override \
+	{ \
+		return param##_id; \
+	} \
+	 \
 	virtual ParamGenerator * clone() const override \
 	{ \
 		return new param##_obj(*this); \
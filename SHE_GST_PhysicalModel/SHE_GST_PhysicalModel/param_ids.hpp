@@ -0,0 +1,67 @@
+/**********************************************************************\
+ @file param_ids.hpp
+ ------------------
+
+ Interned integer IDs for parameter names.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment      
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General    
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)    
+ any later version.    
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied    
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more    
+ details.    
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to    
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+\**********************************************************************/
+
+#ifndef SHE_SIM_GAL_PARAMS_PARAM_IDS_HPP_
+#define SHE_SIM_GAL_PARAMS_PARAM_IDS_HPP_
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+/**
+ * Add a parameter name to the table of parameter IDs. This is called once for each parameter when its
+ * implementation is initialised, so IDs run from 0 to get_num_params()-1 in the order parameters are
+ * implemented.
+ *
+ * @param name Name of the parameter, in lowercase.
+ * @return The ID assigned to the parameter.
+ */
+param_id_t register_param_id( name_t const & name );
+
+/**
+ * Get the ID of the parameter with a given name. Will throw an exception if none by that name exists.
+ *
+ * @param name Name of the desired parameter (case-insensitive).
+ * @return The ID of the desired parameter.
+ */
+param_id_t get_param_id( name_t name );
+
+/**
+ * Get the name of the parameter with a given ID. Will throw an exception if none has that ID.
+ *
+ * @param id ID of the desired parameter.
+ * @return The name of the desired parameter.
+ */
+name_t const & get_param_name( param_id_t const & id );
+
+/**
+ * Get the number of parameters which have been assigned IDs.
+ *
+ * @return The number of parameters.
+ */
+int_t get_num_params();
+
+} // namespace SHE_GST_PhysicalModel
+
+#endif // SHE_SIM_GAL_PARAMS_PARAM_IDS_HPP_
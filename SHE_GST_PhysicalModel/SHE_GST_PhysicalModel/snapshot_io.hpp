@@ -0,0 +1,93 @@
+/**********************************************************************\
+ @file snapshot_io.hpp
+ ------------------
+
+ Helper functions for reading and writing snapshots of the physical model.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+ any later version.
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+ details.
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+ \**********************************************************************/
+
+#ifndef SHE_SIM_GAL_PARAMS_SNAPSHOT_IO_HPP_
+#define SHE_SIM_GAL_PARAMS_SNAPSHOT_IO_HPP_
+
+#include <istream>
+#include <ostream>
+#include <stdexcept>
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+/**
+ * Write a value to a snapshot in its binary representation.
+ *
+ * @param out Stream to write to.
+ * @param value Value to write.
+ */
+template< typename T >
+void write_snapshot_value( std::ostream & out, T const & value )
+{
+	out.write( reinterpret_cast<char const *>(&value), sizeof(T) );
+}
+
+/**
+ * Read a value written by write_snapshot_value. Will throw an exception if the snapshot ends first.
+ *
+ * @param in Stream to read from.
+ * @return The value read.
+ */
+template< typename T >
+T read_snapshot_value( std::istream & in )
+{
+	T value;
+	in.read( reinterpret_cast<char *>(&value), sizeof(T) );
+	if(!in) throw std::runtime_error("Snapshot ended unexpectedly.");
+	return value;
+}
+
+/**
+ * Write a name to a snapshot, preceded by its length.
+ *
+ * @param out Stream to write to.
+ * @param name Name to write.
+ */
+inline void write_snapshot_name( std::ostream & out, name_t const & name )
+{
+	write_snapshot_value<int_t>( out, name.size() );
+	out.write( name.data(), name.size() );
+}
+
+/**
+ * Read a name written by write_snapshot_name. Will throw an exception if the snapshot ends first.
+ *
+ * @param in Stream to read from.
+ * @return The name read.
+ */
+inline name_t read_snapshot_name( std::istream & in )
+{
+	const int_t size = read_snapshot_value<int_t>(in);
+	if(size<0) throw std::runtime_error("Snapshot is corrupt.");
+	name_t name(size,'\0');
+	in.read( &name[0], size );
+	if(!in) throw std::runtime_error("Snapshot ended unexpectedly.");
+	return name;
+}
+
+} // namespace SHE_GST_PhysicalModel
+
+#endif // SHE_SIM_GAL_PARAMS_SNAPSHOT_IO_HPP_
@@ -23,10 +23,12 @@
 
 #include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
 
+#include <algorithm>
 #include <limits>
 #include <stdexcept>
 
 #include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
 #include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
 #include "SHE_GST_PhysicalModel/ParamParam.hpp"
 #include "SHE_GST_PhysicalModel/default_param_params.hpp"
@@ -53,6 +55,13 @@ flt_t ParamGenerator::_request_param_value(name_t const & param_name)
 	return _p_owner->_request_param_value(param_name, name());
 }
 
+flt_t ParamGenerator::_request_param_value(param_id_t const & param_id)
+{
+    DEBUG_LOG() << "Entering/exiting " << name() << "<ParamGenerator>::_request_param_value(" << param_id << ") method.";
+	if(!_p_owner) throw std::logic_error("Cannot request another param value from a default ParamGenerator.");
+	return _p_owner->_request_param_value(param_id, id());
+}
+
 ParamGenerator * ParamGenerator::_request_param(name_t const & param_name)
 {
     DEBUG_LOG() << "Entering/exiting " << name() << "<ParamGenerator>::_request_param(\"" << param_name << "\") method.";
@@ -60,6 +69,13 @@ ParamGenerator * ParamGenerator::_request_param(name_t const & param_name)
 	return _p_owner->_request_param(param_name, name());
 }
 
+ParamGenerator * ParamGenerator::_request_param(param_id_t const & param_id)
+{
+    DEBUG_LOG() << "Entering/exiting " << name() << "<ParamGenerator>::_request_param(" << param_id << ") method.";
+	if(!_p_owner) return nullptr;
+	return _p_owner->_request_param(param_id, id());
+}
+
 void ParamGenerator::_generate()
 {
     DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::_generate method.";
@@ -104,7 +120,7 @@ void ParamGenerator::_cache_provisional_value(flt_t const & new_value)
         // Uncache for any children
         for( auto const & child : _p_owner->_children )
         {
-            child->_clear_param_cache(name());
+            child->_clear_param_cache(id());
         }
     }
 
@@ -126,23 +142,27 @@ void ParamGenerator::_clear_cache()
 		// Uncache for any children
 		for( auto const & child : _p_owner->_children )
 		{
-			child->_clear_param_cache(name());
+			child->_clear_param_cache(id());
 		}
 
 		// Uncache any dependants as well
-		for( auto const & dependant_name : _dependant_names )
+		for( auto const & dependant_id : _dependant_ids )
 		{
-			_p_owner->_clear_param_cache(dependant_name);
+			_p_owner->_clear_param_cache(dependant_id);
 		}
 	}
 
-	_dependant_names.clear();
+	_dependant_ids.clear();
     DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::_clear_cache method.";
 }
 
-void ParamGenerator::_add_dependant(name_t const & dependant_name)
+void ParamGenerator::_add_dependant(param_id_t const & dependant_id)
 {
-	_dependant_names.insert(dependant_name);
+	// Parameters have only a handful of dependants, so a linear search is quicker than hashing
+	if( std::find(_dependant_ids.begin(), _dependant_ids.end(), dependant_id) == _dependant_ids.end() )
+	{
+		_dependant_ids.push_back(dependant_id);
+	}
 }
 
 bool ParamGenerator::_generated_at_this_level() const
@@ -190,6 +210,12 @@ void ParamGenerator::_determine_value()
         // Generated at parent's level or higher
         _cache_value(_parent_version().get());
     }
+
+    // Note when this was determined if the owner is compiling its generation order
+    if(_p_owner and _p_owner->_p_generation_record)
+    {
+        _p_owner->_p_generation_record->push_back(id());
+    }
     DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::_determine_value method.";
 }
 
@@ -207,7 +233,7 @@ ParamGenerator * ParamGenerator::_p_parent_version()
 	if(!_p_owner) return nullptr;
 	auto p_parent = _p_owner->get_parent();
 	if(!p_parent) return nullptr;
-	return p_parent->get_param(name());
+	return p_parent->get_param(id());
 }
 
 ParamGenerator const * ParamGenerator::_p_parent_version() const
@@ -216,7 +242,7 @@ ParamGenerator const * ParamGenerator::_p_parent_version() const
 	if(!_p_owner) return nullptr;
 	auto p_parent = _p_owner->get_parent();
 	if(!p_parent) return nullptr;
-	return p_parent->get_param(name());
+	return p_parent->get_param(id());
 }
 
 ParamGenerator & ParamGenerator::_parent_version()
@@ -344,50 +370,70 @@ flt_t const & ParamGenerator::get_new()
 
 ParamGenerator * ParamGenerator::request(name_t const & requester_name)
 {
-    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request(\"" << requester_name << "\") method.";
-	_add_dependant(requester_name);
+	return request(get_param_id(requester_name));
+}
+
+ParamGenerator * ParamGenerator::request(param_id_t const & requester_id)
+{
+    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request(" << requester_id << ") method.";
+	_add_dependant(requester_id);
 	if(!_is_cached())
 	{
 		_determine_value();
 	}
-    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request(\"" << requester_name << "\") method.";
+    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request(" << requester_id << ") method.";
 	return this;
 }
 
 ParamGenerator * ParamGenerator::request_new(name_t const & requester_name)
 {
-    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_new(\"" << requester_name << "\") method.";
-	_add_dependant(requester_name);
+	return request_new(get_param_id(requester_name));
+}
+
+ParamGenerator * ParamGenerator::request_new(param_id_t const & requester_id)
+{
+    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_new(" << requester_id << ") method.";
+	_add_dependant(requester_id);
 	_determine_new_value();
-    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_new(\"" << requester_name << "\") method.";
+    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_new(" << requester_id << ") method.";
 	return this;
 }
 
 flt_t const & ParamGenerator::request_value(name_t const & requester_name)
 {
-    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_value(\"" << requester_name << "\") method.";
+	return request_value(get_param_id(requester_name));
+}
+
+flt_t const & ParamGenerator::request_value(param_id_t const & requester_id)
+{
+    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_value(" << requester_id << ") method.";
 
-	_add_dependant(requester_name);
+	_add_dependant(requester_id);
 	flt_t const & res = get();
 
-    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_value(\"" << requester_name << "\") method.";
+    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_value(" << requester_id << ") method.";
 	return res;
 }
 
 flt_t const & ParamGenerator::request_new_value(name_t const & requester_name)
 {
-    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_new_value(\"" << requester_name << "\") method.";
+	return request_new_value(get_param_id(requester_name));
+}
+
+flt_t const & ParamGenerator::request_new_value(param_id_t const & requester_id)
+{
+    DEBUG_LOG() << "Entering " << name() << "<ParamGenerator>::request_new_value(" << requester_id << ") method.";
 
-	_add_dependant(requester_name);
+	_add_dependant(requester_id);
 	flt_t const & res =get_new();
 
-    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_new_value(\"" << requester_name << "\") method.";
+    DEBUG_LOG() << "Exiting " << name() << "<ParamGenerator>::request_new_value(" << requester_id << ") method.";
 	return res;
 }
 
 const level_t & ParamGenerator::level_generated_at() const
 {
-	return _p_owner->get_generation_level(name());
+	return _p_owner->get_generation_level(id());
 }
 
 } // namespace SHE_GST_PhysicalModel
@@ -24,11 +24,18 @@
 
 #include "SHE_GST_PhysicalModel/ParamHierarchyLevel.hpp"
 
+#include <algorithm>
 #include <ctime>
+#include <fstream>
+#include <functional>
 #include <memory>
 #include <random>
+#include <sstream>
+#include <unordered_map>
 #include <utility>
 
+#include <boost/functional/hash.hpp>
+
 #include "SHE_GST_PhysicalModel/common.hpp"
 #include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
 #include "SHE_GST_PhysicalModel/ParamParam.hpp"
@@ -37,12 +44,14 @@
 #include "SHE_GST_PhysicalModel/levels/Field.hpp"
 #include "SHE_GST_PhysicalModel/levels/FieldGroup.hpp"
 #include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
 #include "SHE_GST_PhysicalModel/levels/GalaxyGroup.hpp"
 #include "SHE_GST_PhysicalModel/levels/GalaxyPair.hpp"
 #include "SHE_GST_PhysicalModel/levels/Image.hpp"
 #include "SHE_GST_PhysicalModel/levels/ImageGroup.hpp"
 #include "SHE_GST_PhysicalModel/levels/Survey.hpp"
 #include "SHE_GST_PhysicalModel/params_list.hpp"
+#include "SHE_GST_PhysicalModel/snapshot_io.hpp"
 #include "SHE_GST_IceBRG_main/logging.hpp"
 
 
@@ -55,10 +64,36 @@ namespace SHE_GST_PhysicalModel
 
 static auto logger = ICEBRG_GET_LOGGER(logger_name);
 
+/**
+ * The order in which the parameters of a level were generated, along with the configuration of that level.
+ */
+struct GenerationPlan
+{
+    int_t hierarchy_level;
+    int_t parent_hierarchy_level;
+    std::vector<param_param_ptr_t> param_params;
+    std::vector<level_t> generation_levels;
+    generation_order_ptr_t p_order;
+};
+
+// The plans are keyed by a hash of their configuration. Levels share ownership of the orders they use, so the plans
+// can be cleared whenever there are too many of them, e.g. when every galaxy is given a different fixed value.
+
+static constexpr std::size_t max_num_generation_plans = 256;
+
+static std::unordered_multimap<std::size_t, GenerationPlan> & generation_plans()
+{
+    static std::unordered_multimap<std::size_t, GenerationPlan> plans;
+    return plans;
+}
+
 // Private methods
 void ParamHierarchyLevel::_update_parent(parent_ptr_t const & new_p_parent)
 {
     _p_parent = new_p_parent;
+
+    // Whether parameters are generated provisionally depends on the parent, so the generation order might change
+    _p_generation_order = nullptr;
 }
 void ParamHierarchyLevel::_update_child(child_t * const & old_p_child, child_t * const & new_p_child,
     bool release )
@@ -99,12 +134,22 @@ void ParamHierarchyLevel::_update_child(child_t * const & old_p_child, child_t *
 
 flt_t const & ParamHierarchyLevel::_request_param_value(name_t const & name, name_t const & requester_name)
 {
-    return _params.at(name)->request_value(requester_name);
+    return _request_param_value(get_param_id(name), get_param_id(requester_name));
+}
+
+flt_t const & ParamHierarchyLevel::_request_param_value(param_id_t const & id, param_id_t const & requester_id)
+{
+    return _params_by_id.at(id)->request_value(requester_id);
 }
 
 ParamGenerator * ParamHierarchyLevel::_request_param(name_t const & name, name_t const & requester_name)
 {
-    return _params.at(name)->request(requester_name);
+    return _request_param(get_param_id(name), get_param_id(requester_name));
+}
+
+ParamGenerator * ParamHierarchyLevel::_request_param(param_id_t const & id, param_id_t const & requester_id)
+{
+    return _params_by_id.at(id)->request(requester_id);
 }
 
 void ParamHierarchyLevel::_drop_local_param_param(name_t const & name)
@@ -155,30 +200,144 @@ void ParamHierarchyLevel::_drop_local_generation_level(name_t const & name)
     DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::_drop_local_generation_level(\"" << name << "\") method successfully.";
 }
 
+std::size_t ParamHierarchyLevel::_get_configuration_hash() const
+{
+    std::size_t hash = 0;
+
+    boost::hash_combine(hash, get_hierarchy_level());
+    boost::hash_combine(hash, _p_parent ? _p_parent->get_hierarchy_level() : -1);
+
+    for( auto const & p_param : _params_by_id )
+    {
+        // Equal param params have the same name and parameters, so these are consistent with is_equal
+        ParamParam const * p_param_params = p_param->get_p_params();
+        boost::hash_combine(hash, p_param->get_generation_level());
+        boost::hash_combine(hash, std::hash<name_t>()(p_param_params->name()));
+        for( auto const & value : p_param_params->get_parameters() )
+        {
+            boost::hash_combine(hash, std::hash<flt_t>()(value));
+        }
+    }
+
+    return hash;
+}
+
+generation_order_ptr_t ParamHierarchyLevel::_find_generation_order(std::size_t const & configuration_hash) const
+{
+    const int_t parent_hierarchy_level = _p_parent ? _p_parent->get_hierarchy_level() : -1;
+    const std::size_t num_params = _params_by_id.size();
+
+    auto matching_plans = generation_plans().equal_range(configuration_hash);
+    for( auto it = matching_plans.first; it != matching_plans.second; ++it )
+    {
+        GenerationPlan const & plan = it->second;
+
+        if( ( plan.hierarchy_level != get_hierarchy_level() ) or
+            ( plan.parent_hierarchy_level != parent_hierarchy_level ) or
+            ( plan.p_order->size() != num_params ) )
+        {
+            continue;
+        }
+
+        bool matches = true;
+        for( std::size_t id=0; id<num_params; ++id )
+        {
+            ParamGenerator const * p_param = _params_by_id[id];
+            ParamParam const * p_param_params = p_param->get_p_params();
+            if( ( plan.generation_levels[id] != p_param->get_generation_level() ) or
+                ( ( plan.param_params[id].get() != p_param_params ) and
+                  ( !plan.param_params[id]->is_equal(p_param_params) ) ) )
+            {
+                matches = false;
+                break;
+            }
+        }
+
+        if(matches) return plan.p_order;
+    }
+
+    return nullptr;
+}
+
+generation_order_ptr_t ParamHierarchyLevel::_compile_generation_order(std::size_t const & configuration_hash,
+    std::vector<param_id_t> order) const
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::_compile_generation_order method.";
+
+    GenerationPlan plan;
+
+    plan.hierarchy_level = get_hierarchy_level();
+    plan.parent_hierarchy_level = _p_parent ? _p_parent->get_hierarchy_level() : -1;
+    for( auto const & p_param : _params_by_id )
+    {
+        // Copy the configuration, since the original param params might be deleted before the plan is used
+        plan.param_params.push_back( param_param_ptr_t( p_param->get_p_params()->clone() ) );
+        plan.generation_levels.push_back( p_param->get_generation_level() );
+    }
+    plan.p_order = std::make_shared<std::vector<param_id_t> const>(std::move(order));
+
+    // Levels keep the orders they're using, so it's safe to forget every plan
+    if( generation_plans().size() >= max_num_generation_plans )
+    {
+        generation_plans().clear();
+    }
+
+    generation_order_ptr_t p_order = plan.p_order;
+    generation_plans().emplace(configuration_hash, std::move(plan));
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::_compile_generation_order method successfully.";
+    return p_order;
+}
+
+void ParamHierarchyLevel::_index_params()
+{
+    _params_by_id.assign(get_num_params(), nullptr);
+
+    for( auto & param_name_and_ptr : _params )
+    {
+        _params_by_id[param_name_and_ptr.second->id()] = param_name_and_ptr.second.get();
+    }
+}
+
 void ParamHierarchyLevel::_clear_param_cache(name_t const & name)
 {
-    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::_clear_param_cache(\"" << name << "\") method.";
+    _clear_param_cache(get_param_id(name));
+}
+
+void ParamHierarchyLevel::_clear_param_cache(param_id_t const & id)
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::_clear_param_cache(" << id << ") method.";
     // Clear for this
-    _clear_own_param_cache(name);
+    _clear_own_param_cache(id);
 
     // Clear for all children
     for( auto & child : _children )
     {
-        child->_clear_param_cache(name);
+        child->_clear_param_cache(id);
     }
-    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::_clear_param_cache(\"" << name << "\") method successfully.";
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::_clear_param_cache(" << id << ") method successfully.";
 }
 
 void ParamHierarchyLevel::_clear_own_param_cache(name_t const & name)
 {
-    _params.at(name)->_clear_cache();
+    _clear_own_param_cache(get_param_id(name));
+}
+
+void ParamHierarchyLevel::_clear_own_param_cache(param_id_t const & id)
+{
+    _params_by_id.at(id)->_clear_cache();
 }
 
 void ParamHierarchyLevel::_clear_param_cache()
 {
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::_clear_param_cache method.";
-    // Clear for this
-    _clear_own_param_cache();
+
+    // Every parameter here is cleared, so there's no need to follow each one's dependants
+    for( auto & p_param : _params_by_id )
+    {
+        p_param->_decache();
+        p_param->_dependant_ids.clear();
+    }
 
     // Clear for all children
     for( auto & child : _children )
@@ -190,23 +349,37 @@ void ParamHierarchyLevel::_clear_param_cache()
 
 void ParamHierarchyLevel::_clear_own_param_cache()
 {
-    for( auto & param : _params )
+    for( auto & p_param : _params_by_id )
     {
-        param.second->_clear_cache();
+        p_param->_clear_cache();
     }
 }
 
+bool ParamHierarchyLevel::_param_generated_here(param_id_t const & id) const
+{
+    param_t const * const & p_param = _params_by_id.at(id);
+    return p_param->_generated_at_this_level() or p_param->_provisionally_generated_at_this_level();
+}
+
+bool ParamHierarchyLevel::_param_cached(param_id_t const & id) const
+{
+    return _params_by_id.at(id)->_is_cached();
+}
+
 // Public methods
 
 ParamHierarchyLevel::ParamHierarchyLevel(parent_ptr_t const & p_parent)
-: _p_parent(p_parent)
+: _p_parent(p_parent),
+  _num_reserved_child_IDs(0),
+  _p_generation_order(nullptr),
+  _p_generation_record(nullptr)
 {
     DEBUG_LOG() << "Entering ParamHierarchyLevel::ParamHierarchyLevel method.";
     // Inherit parameters and generation_levels from parent if it exists
     if(p_parent)
     {
-        // Get ID from the parent's number of children
-        _local_ID = p_parent->num_children();
+        // Get ID from the parent's number of children, skipping any IDs reserved by GalaxyBlocks
+        _local_ID = p_parent->num_children() + p_parent->_num_reserved_child_IDs;
         set_seed(p_parent->get_seed());
 
         // Deep copy parameters map from parent
@@ -231,15 +404,20 @@ ParamHierarchyLevel::ParamHierarchyLevel(parent_ptr_t const & p_parent)
         _params = get_full_params_map(*this);
     }
 
+    _index_params();
+
     DEBUG_LOG() << "Exiting ParamHierarchyLevel::ParamHierarchyLevel method successfully.";
 }
 
 ParamHierarchyLevel::ParamHierarchyLevel(const ParamHierarchyLevel & other)
 : _p_parent(other._p_parent),
+  _num_reserved_child_IDs(other._num_reserved_child_IDs),
   _local_ID(other._local_ID),
   _seed(other._seed),
   _seed_vec(other._seed_vec),
-  _rng(other._rng)
+  _rng(other._rng),
+  _p_generation_order(nullptr),
+  _p_generation_record(nullptr)
 {
     DEBUG_LOG() << "Entering ParamHierarchyLevel::ParamHierarchyLevel method.";
 
@@ -255,6 +433,7 @@ ParamHierarchyLevel::ParamHierarchyLevel(const ParamHierarchyLevel & other)
     {
         _params.insert( std::make_pair( param_name_and_ptr.first , param_ptr_t( param_name_and_ptr.second->clone() ) ) );
     }
+    _index_params();
 
     for( auto const & param_param_name_and_ptr : other._local_param_params )
     {
@@ -280,13 +459,17 @@ ParamHierarchyLevel::ParamHierarchyLevel(const ParamHierarchyLevel & other)
 ParamHierarchyLevel::ParamHierarchyLevel(ParamHierarchyLevel && other)
 : _p_parent(std::move(other._p_parent)),
   _children(std::move(other._children)),
+  _num_reserved_child_IDs(other._num_reserved_child_IDs),
   _local_param_params(std::move(other._local_param_params)),
   _local_generation_levels(std::move(other._local_generation_levels)),
   _local_ID(std::move(other._local_ID)),
   _seed(std::move(other._seed)),
   _seed_vec(std::move(other._seed_vec)),
   _rng(std::move(other._rng)),
-  _params(std::move(other._params))
+  _p_generation_order(other._p_generation_order),
+  _p_generation_record(nullptr),
+  _params(std::move(other._params)),
+  _params_by_id(std::move(other._params_by_id))
 {
     DEBUG_LOG() << "Entering ParamHierarchyLevel::ParamHierarchyLevel method.";
 
@@ -309,10 +492,12 @@ ParamHierarchyLevel & ParamHierarchyLevel::operator=(const ParamHierarchyLevel &
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::operator= method.";
 
     _p_parent = other._p_parent;
+    _num_reserved_child_IDs = other._num_reserved_child_IDs;
     _local_ID = other._local_ID;
     _seed = other._seed;
     _seed_vec = other._seed_vec;
     _rng = other._rng;
+    _p_generation_order = nullptr;
 
     // Deep-copy maps
 
@@ -332,6 +517,7 @@ ParamHierarchyLevel & ParamHierarchyLevel::operator=(const ParamHierarchyLevel &
                 std::move(new_param_ptr) );
         _params.insert( std::move(new_param_name_and_ptr) );
     }
+    _index_params();
 
     _local_param_params.clear();
     for( auto const & param_param_name_and_ptr : other._local_param_params )
@@ -357,13 +543,16 @@ ParamHierarchyLevel & ParamHierarchyLevel::operator=(ParamHierarchyLevel && othe
 
     _p_parent = std::move(other._p_parent);
     _params = std::move(other._params);
+    _params_by_id = std::move(other._params_by_id);
     _children = std::move(other._children);
+    _num_reserved_child_IDs = other._num_reserved_child_IDs;
     _local_param_params = std::move(other._local_param_params);
     _local_generation_levels = std::move(other._local_generation_levels);
     _local_ID = std::move(other._local_ID);
     _seed = std::move(other._seed);
     _seed_vec = std::move(other._seed_vec);
     _rng = std::move(other._rng);
+    _p_generation_order = other._p_generation_order;
 
     // Update parent's pointer to this
     if(_p_parent)
@@ -801,6 +990,20 @@ std::vector<Galaxy *> ParamHierarchyLevel::get_galaxy_descendants()
 {
     return get_descendants<Galaxy>();
 }
+std::vector<GalaxyBlock *> ParamHierarchyLevel::get_galaxy_block_descendants()
+{
+    return get_descendants<GalaxyBlock>();
+}
+std::vector<CompactGalaxy> ParamHierarchyLevel::get_compact_galaxy_descendants()
+{
+    std::vector<CompactGalaxy> res;
+    for( auto & block : get_galaxy_block_descendants() )
+    {
+        std::vector<CompactGalaxy> block_galaxies = block->get_galaxies();
+        res.insert(res.end(), block_galaxies.begin(), block_galaxies.end());
+    }
+    return res;
+}
 std::vector<Galaxy *> ParamHierarchyLevel::get_background_galaxy_descendants()
 {
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::get_background_galaxy_descendants method.";
@@ -946,24 +1149,42 @@ std::vector<Galaxy *> ParamHierarchyLevel::get_satellite_galaxy_descendants()
 
 param_t * ParamHierarchyLevel::get_param( name_t const & name )
 {
-    return _params.at(name).get();
+    return get_param(get_param_id(name));
 }
 
 const param_t * ParamHierarchyLevel::get_param( name_t const & name) const
 {
-    return _params.at(name).get();
+    return get_param(get_param_id(name));
+}
+
+param_t * ParamHierarchyLevel::get_param( param_id_t const & id )
+{
+    return _params_by_id.at(id);
+}
+
+const param_t * ParamHierarchyLevel::get_param( param_id_t const & id ) const
+{
+    return _params_by_id.at(id);
 }
 
 flt_t const & ParamHierarchyLevel::get_param_value( name_t name )
 {
-    boost::algorithm::to_lower(name);
-    return _params.at(name).get()->get();
+    return get_param_value(get_param_id(name));
+}
+
+flt_t const & ParamHierarchyLevel::get_param_value( param_id_t const & id )
+{
+    return _params_by_id.at(id)->get();
 }
 
 level_t const & ParamHierarchyLevel::get_generation_level( name_t name ) const
 {
-    boost::algorithm::to_lower(name);
-    return get_param(name)->get_generation_level();
+    return get_generation_level(get_param_id(name));
+}
+
+level_t const & ParamHierarchyLevel::get_generation_level( param_id_t const & id ) const
+{
+    return get_param(id)->get_generation_level();
 }
 
 level_t const * const & ParamHierarchyLevel::get_p_generation_level( name_t const & name ) const
@@ -973,14 +1194,22 @@ level_t const * const & ParamHierarchyLevel::get_p_generation_level( name_t cons
 
 void ParamHierarchyLevel::set_p_generation_level( name_t const & name, level_t const * const & p_level )
 {
+    set_p_generation_level( get_param_id(name), p_level );
+}
+
+void ParamHierarchyLevel::set_p_generation_level( param_id_t const & id, level_t const * const & p_level )
+{
+    name_t const & name = get_param_name(id);
+
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::set_p_generation_level(\"" << name << "\") method.";
 
-    get_param(name)->set_p_generation_level( p_level );
+    get_param(id)->set_p_generation_level( p_level );
+    _p_generation_order = nullptr;
 
     // Pass this along to all children
     for( auto & child : _children )
     {
-        child->set_p_generation_level( name, p_level );
+        child->set_p_generation_level( id, p_level );
     }
 
     _drop_local_generation_level(name);
@@ -1006,14 +1235,22 @@ ParamParam const * const & ParamHierarchyLevel::get_p_param_params( name_t const
 
 void ParamHierarchyLevel::set_p_param_params( name_t const & name, ParamParam const * const & params )
 {
+    set_p_param_params( get_param_id(name), params );
+}
+
+void ParamHierarchyLevel::set_p_param_params( param_id_t const & id, ParamParam const * const & params )
+{
+    name_t const & name = get_param_name(id);
+
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::get_p_param_params(\"" << name << "\") method.";
 
-    get_param(name)->set_p_params(params);
+    get_param(id)->set_p_params(params);
+    _p_generation_order = nullptr;
 
     // Pass this along to all children
     for( auto & child : _children )
     {
-        child->set_p_param_params(name,params);
+        child->set_p_param_params(id,params);
     }
 
     _drop_local_param_param(name);
@@ -1025,10 +1262,57 @@ void ParamHierarchyLevel::generate_parameters()
 {
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::generate_parameters method.";
 
-    // Get all parameters at this level
-    for( auto & param_name_and_ptr : _params )
+    // Only look up the order if this level doesn't already have one
+    std::size_t configuration_hash = 0;
+    if(!_p_generation_order)
+    {
+        configuration_hash = _get_configuration_hash();
+        _p_generation_order = _find_generation_order(configuration_hash);
+    }
+
+    if(_p_generation_order)
     {
-        param_name_and_ptr.second->get();
+        // Dependencies come before their dependants in this order, so nothing needs to be generated recursively
+        for( auto const & id : *_p_generation_order )
+        {
+            _params_by_id[id]->get();
+        }
+    }
+    else
+    {
+        // We can only record a complete order if nothing has been generated here yet
+        bool any_cached = false;
+        for( auto const & p_param : _params_by_id )
+        {
+            if(p_param->_is_cached())
+            {
+                any_cached = true;
+                break;
+            }
+        }
+
+        std::vector<param_id_t> generation_record;
+        if(!any_cached) _p_generation_record = &generation_record;
+
+        // Get all parameters at this level
+        try
+        {
+            for( auto & param_name_and_ptr : _params )
+            {
+                param_name_and_ptr.second->get();
+            }
+        }
+        catch(...)
+        {
+            _p_generation_record = nullptr;
+            throw;
+        }
+
+        _p_generation_record = nullptr;
+        if( generation_record.size() == _params_by_id.size() )
+        {
+            _p_generation_order = _compile_generation_order(configuration_hash, std::move(generation_record));
+        }
     }
 
     // Generate for all children as well
@@ -1040,6 +1324,91 @@ void ParamHierarchyLevel::generate_parameters()
     DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::generate_parameters method successfully.";
 }
 
+int_t ParamHierarchyLevel::get_num_galaxy_descendants()
+{
+    int_t num_galaxies = get_galaxy_descendants().size();
+
+    for( auto & block : get_galaxy_block_descendants() )
+    {
+        num_galaxies += block->get_num_galaxies();
+    }
+
+    return num_galaxies;
+}
+
+void ParamHierarchyLevel::generate_galaxy_descendant_parameters()
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::generate_galaxy_descendant_parameters method.";
+
+    for( auto & galaxy : get_galaxy_descendants() )
+    {
+        galaxy->generate_parameters();
+    }
+
+    for( auto & block : get_galaxy_block_descendants() )
+    {
+        block->generate_parameters();
+    }
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::generate_galaxy_descendant_parameters method successfully.";
+}
+
+void ParamHierarchyLevel::get_galaxy_descendant_param_values( std::vector<name_t> names,
+    flt_t * const & p_values )
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::get_galaxy_descendant_param_values method.";
+
+    std::vector<param_id_t> ids;
+    for( auto const & name : names )
+    {
+        ids.push_back(get_param_id(name));
+    }
+
+    std::vector<Galaxy *> galaxies = get_galaxy_descendants();
+    const std::size_t num_names = ids.size();
+
+    for( std::size_t i=0; i<galaxies.size(); ++i )
+    {
+        for( std::size_t j=0; j<num_names; ++j )
+        {
+            p_values[i*num_names+j] = galaxies[i]->get_param(ids[j])->get();
+        }
+    }
+
+    // Galaxies stored in blocks follow on from the Galaxy objects
+    flt_t * p_block_values = p_values + galaxies.size()*num_names;
+    for( auto & block : get_galaxy_block_descendants() )
+    {
+        block->get_galaxy_param_values(ids, p_block_values);
+        p_block_values += block->get_num_galaxies()*num_names;
+    }
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::get_galaxy_descendant_param_values method successfully.";
+}
+
+std::vector<long_int_t> ParamHierarchyLevel::get_galaxy_descendant_full_IDs()
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::get_galaxy_descendant_full_IDs method.";
+
+    std::vector<long_int_t> res;
+
+    for( auto & galaxy : get_galaxy_descendants() )
+    {
+        res.push_back(galaxy->get_full_ID());
+    }
+
+    for( auto & block : get_galaxy_block_descendants() )
+    {
+        for( int_t i=0; i<block->get_num_galaxies(); ++i )
+        {
+            res.push_back(block->get_galaxy_full_ID(i));
+        }
+    }
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::get_galaxy_descendant_full_IDs method successfully.";
+    return res;
+}
+
 long_int_t ParamHierarchyLevel::get_full_ID() const
 {
     DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::get_full_ID method.";
@@ -1138,4 +1507,290 @@ void ParamHierarchyLevel::set_seed( int_t const & seed )
     DEBUG_LOG() << "Exiting ParamHierarchyLevel::set_seed method successfully.";
 }
 
+// Snapshot methods
+#if(1)
+
+// Marks the start of a snapshot file, followed by the version of its format
+constexpr const char snapshot_magic[] = "SHEGSTPM";
+constexpr const int_t snapshot_format_version = 2;
+
+ParamHierarchyLevel::child_t * ParamHierarchyLevel::_spawn_child_by_name(name_t const & level_name)
+{
+    if(level_name==image_group_name) return spawn_child<ImageGroup>();
+    if(level_name==image_name) return spawn_child<Image>();
+    if(level_name==cluster_group_name) return spawn_child<ClusterGroup>();
+    if(level_name==cluster_name) return spawn_child<Cluster>();
+    if(level_name==field_group_name) return spawn_child<FieldGroup>();
+    if(level_name==field_name) return spawn_child<Field>();
+    if(level_name==galaxy_group_name) return spawn_child<GalaxyGroup>();
+    if(level_name==galaxy_pair_name) return spawn_child<GalaxyPair>();
+    if(level_name==galaxy_name) return spawn_child<Galaxy>();
+    if(level_name==galaxy_block_name) return spawn_child<GalaxyBlock>();
+
+    throw std::runtime_error("Snapshot contains a child of unknown level " + level_name + ".");
+}
+
+void ParamHierarchyLevel::_write_snapshot_values(std::ostream & out) const
+{
+    std::vector<param_id_t> ids;
+    for( param_id_t id=0; id<static_cast<param_id_t>(_params_by_id.size()); ++id )
+    {
+        if( _param_generated_here(id) and _param_cached(id) ) ids.push_back(id);
+    }
+
+    write_snapshot_value<int_t>(out, ids.size());
+    for( auto const & id : ids )
+    {
+        write_snapshot_value<param_id_t>(out, id);
+        write_snapshot_value<flt_t>(out, _params_by_id[id]->_cached_value);
+    }
+
+    std::ostringstream rng_state;
+    rng_state << _rng;
+    write_snapshot_name(out, rng_state.str());
+}
+
+void ParamHierarchyLevel::_read_snapshot_values(std::istream & in, std::vector<param_id_t> const & ids)
+{
+    const int_t num_values = read_snapshot_value<int_t>(in);
+    for( int_t i=0; i<num_values; ++i )
+    {
+        const param_id_t id = ids.at(read_snapshot_value<param_id_t>(in));
+        _params_by_id[id]->_cache_value(read_snapshot_value<flt_t>(in));
+    }
+
+    std::istringstream rng_state(read_snapshot_name(in));
+    rng_state >> _rng;
+    if(!rng_state) throw std::runtime_error("Snapshot is corrupt.");
+}
+
+void ParamHierarchyLevel::_write_snapshot_settings(std::ostream & out) const
+{
+    // Only settings which are in use here are recorded, in order of name so snapshots are reproducible
+    std::vector<name_t> generation_level_names;
+    for( auto const & name_and_level : _local_generation_levels )
+    {
+        if( name_and_level.second.get() == get_p_generation_level(name_and_level.first) )
+        {
+            generation_level_names.push_back(name_and_level.first);
+        }
+    }
+    std::sort(generation_level_names.begin(), generation_level_names.end());
+
+    write_snapshot_value<int_t>(out, generation_level_names.size());
+    for( auto const & name : generation_level_names )
+    {
+        write_snapshot_name(out, name);
+        write_snapshot_value<level_t>(out, *_local_generation_levels.at(name));
+    }
+
+    std::vector<name_t> param_params_names;
+    for( auto const & name_and_param_params : _local_param_params )
+    {
+        if( name_and_param_params.second.get() == get_p_param_params(name_and_param_params.first) )
+        {
+            param_params_names.push_back(name_and_param_params.first);
+        }
+    }
+    std::sort(param_params_names.begin(), param_params_names.end());
+
+    write_snapshot_value<int_t>(out, param_params_names.size());
+    for( auto const & name : param_params_names )
+    {
+        ParamParam const * p_param_params = _local_param_params.at(name).get();
+        std::vector<flt_t> parameters = p_param_params->get_parameters();
+
+        write_snapshot_name(out, name);
+        write_snapshot_name(out, p_param_params->name());
+        write_snapshot_value<int_t>(out, parameters.size());
+        for( auto const & parameter : parameters )
+        {
+            write_snapshot_value<flt_t>(out, parameter);
+        }
+    }
+}
+
+void ParamHierarchyLevel::_read_snapshot_settings(std::istream & in)
+{
+    const int_t num_generation_levels = read_snapshot_value<int_t>(in);
+    for( int_t i=0; i<num_generation_levels; ++i )
+    {
+        const name_t name = read_snapshot_name(in);
+        set_generation_level(name, read_snapshot_value<level_t>(in));
+    }
+
+    const int_t num_param_params = read_snapshot_value<int_t>(in);
+    for( int_t i=0; i<num_param_params; ++i )
+    {
+        const name_t name = read_snapshot_name(in);
+        const name_t param_type = read_snapshot_name(in);
+
+        const int_t num_parameters = read_snapshot_value<int_t>(in);
+        std::vector<flt_t> parameters;
+        for( int_t j=0; j<num_parameters; ++j )
+        {
+            parameters.push_back(read_snapshot_value<flt_t>(in));
+        }
+
+        const param_id_t id = get_param_id(name);
+        _local_param_params[name] = param_param_ptr_t(param_params_map.at(param_type)->recreate(parameters));
+        set_p_param_params( id, _local_param_params.at(name).get() );
+    }
+}
+
+void ParamHierarchyLevel::_write_snapshot(std::ostream & out) const
+{
+    write_snapshot_name(out, get_name());
+    write_snapshot_value<int_t>(out, _local_ID);
+    write_snapshot_value<int_t>(out, _seed);
+    write_snapshot_value<int_t>(out, _num_reserved_child_IDs);
+
+    _write_snapshot_data(out);
+    _write_snapshot_settings(out);
+    _write_snapshot_values(out);
+
+    // Skip the empty slots left by children which have been abducted by another level
+    std::vector<const child_t *> children = get_children("");
+    write_snapshot_value<int_t>(out, children.size());
+    for( auto const & p_child : children )
+    {
+        p_child->_write_snapshot(out);
+    }
+}
+
+void ParamHierarchyLevel::_read_snapshot(std::istream & in, std::vector<param_id_t> const & ids)
+{
+    clear_children();
+
+    _local_ID = read_snapshot_value<int_t>(in);
+    set_seed(read_snapshot_value<int_t>(in));
+    const int_t num_reserved_child_IDs = read_snapshot_value<int_t>(in);
+
+    _read_snapshot_data(in, ids);
+    _read_snapshot_settings(in);
+    _read_snapshot_values(in, ids);
+
+    // Children are restored with their recorded IDs, so any reserved IDs are only restored afterwards
+    const int_t num_children = read_snapshot_value<int_t>(in);
+    for( int_t i=0; i<num_children; ++i )
+    {
+        _spawn_child_by_name(read_snapshot_name(in))->_read_snapshot(in, ids);
+    }
+
+    _num_reserved_child_IDs = num_reserved_child_IDs;
+}
+
+void ParamHierarchyLevel::save_snapshot(name_t const & filename) const
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::save_snapshot method.";
+
+    std::ofstream out(filename, std::ios::binary);
+    if(!out) throw std::runtime_error("Cannot open snapshot file " + filename + " for writing.");
+
+    out.write(snapshot_magic, sizeof(snapshot_magic));
+    write_snapshot_value<int_t>(out, snapshot_format_version);
+
+    // Record the names of the parameters, so their IDs can be matched up when this is loaded
+    write_snapshot_value<int_t>(out, get_num_params());
+    for( param_id_t id=0; id<get_num_params(); ++id )
+    {
+        write_snapshot_name(out, get_param_name(id));
+    }
+
+    // Record values from the ancestors, from the top down
+    std::vector<ParamHierarchyLevel const *> ancestors;
+    for( ParamHierarchyLevel const * p_ancestor = _p_parent; p_ancestor; p_ancestor = p_ancestor->_p_parent )
+    {
+        ancestors.insert(ancestors.begin(), p_ancestor);
+    }
+
+    write_snapshot_value<int_t>(out, ancestors.size());
+    for( auto const & p_ancestor : ancestors )
+    {
+        write_snapshot_name(out, p_ancestor->get_name());
+        write_snapshot_value<int_t>(out, p_ancestor->_local_ID);
+        p_ancestor->_write_snapshot_values(out);
+    }
+
+    _write_snapshot(out);
+
+    out.close();
+    if(!out) throw std::runtime_error("Error writing snapshot file " + filename + ".");
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::save_snapshot method successfully.";
+}
+
+void ParamHierarchyLevel::load_snapshot(name_t const & filename)
+{
+    DEBUG_LOG() << "Entering " << get_name() << "<ParamHierarchyLevel>::load_snapshot method.";
+
+    std::ifstream in(filename, std::ios::binary);
+    if(!in) throw std::runtime_error("Cannot open snapshot file " + filename + " for reading.");
+
+    char magic[sizeof(snapshot_magic)];
+    in.read(magic, sizeof(snapshot_magic));
+    if( !in or name_t(magic, sizeof(magic)) != name_t(snapshot_magic, sizeof(snapshot_magic)) )
+    {
+        throw std::runtime_error("File " + filename + " isn't a physical model snapshot.");
+    }
+    if( read_snapshot_value<int_t>(in) != snapshot_format_version )
+    {
+        throw std::runtime_error("Snapshot file " + filename + " is in an unsupported format version.");
+    }
+
+    // Map the snapshot's parameter IDs to the IDs used here
+    const int_t num_params = read_snapshot_value<int_t>(in);
+    std::vector<param_id_t> ids;
+    ids.reserve(num_params);
+    for( int_t i=0; i<num_params; ++i )
+    {
+        ids.push_back(get_param_id(read_snapshot_name(in)));
+    }
+
+    // Check the ancestors match before restoring anything
+    std::vector<ParamHierarchyLevel *> ancestors;
+    for( ParamHierarchyLevel * p_ancestor = _p_parent; p_ancestor; p_ancestor = p_ancestor->_p_parent )
+    {
+        ancestors.insert(ancestors.begin(), p_ancestor);
+    }
+
+    if( read_snapshot_value<int_t>(in) != static_cast<int_t>(ancestors.size()) )
+    {
+        throw std::runtime_error("Snapshot file " + filename + " was saved from a different level of the hierarchy.");
+    }
+
+    for( auto & p_ancestor : ancestors )
+    {
+        if( ( read_snapshot_name(in) != p_ancestor->get_name() ) or
+            ( read_snapshot_value<int_t>(in) != p_ancestor->_local_ID ) )
+        {
+            throw std::runtime_error("Snapshot file " + filename +
+                    " was saved from a different position in the hierarchy.");
+        }
+        p_ancestor->_read_snapshot_values(in, ids);
+    }
+
+    const name_t level_name = read_snapshot_name(in);
+    if( level_name != get_name() )
+    {
+        throw std::runtime_error("Snapshot file " + filename + " is of level " + level_name + ", not " +
+                get_name() + ".");
+    }
+
+    // Check this level's own ID matches too, then go back so it's read along with everything else
+    const auto level_pos = in.tellg();
+    if( read_snapshot_value<int_t>(in) != _local_ID )
+    {
+        throw std::runtime_error("Snapshot file " + filename +
+                " was saved from a different position in the hierarchy.");
+    }
+    in.seekg(level_pos);
+
+    _read_snapshot(in, ids);
+
+    DEBUG_LOG() << "Exiting " << get_name() << "<ParamHierarchyLevel>::load_snapshot method successfully.";
+}
+
+#endif
+
 } // namespace SHE_GST_PhysicalModel
@@ -35,6 +35,7 @@
 #include "SHE_GST_PhysicalModel/dependency_functions/galaxy_type.hpp"
 #include "SHE_GST_PhysicalModel/levels/Field.hpp"
 #include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
 #include "SHE_GST_PhysicalModel/levels/GalaxyGroup.hpp"
 #include "SHE_GST_PhysicalModel/levels/GalaxyPair.hpp"
 
@@ -84,6 +85,52 @@ void Field::add_galaxies(int_t const & N)
 	for(int i=0; i<N; ++i) add_galaxy();
 }
 
+GalaxyBlock * Field::add_galaxy_block(int_t const & N)
+{
+	GalaxyBlock * block = static_cast<GalaxyBlock *>(ParamHierarchyLevel::spawn_child<GalaxyBlock>(N));
+	block->set_param_params(galaxy_type_name,"fixed",field_galaxy_type);
+
+	return block;
+}
+
+std::vector<Galaxy *> Field::add_galaxies_by_magnitude(int_t const & num_bright, int_t const & num_faint,
+		flt_t const & mag_limit)
+{
+	std::vector<Galaxy *> bright_galaxies;
+	std::vector<Galaxy *> faint_galaxies;
+
+	while( ( static_cast<int_t>(bright_galaxies.size()) < num_bright ) or
+		   ( static_cast<int_t>(faint_galaxies.size()) < num_faint ) )
+	{
+		Galaxy * gal = add_galaxy();
+
+		// Regenerate the galaxy until it's of a type we still need
+		while(true)
+		{
+			gal->clear();
+			gal->generate_parameters();
+
+			if( gal->get_param_value(apparent_mag_vis_name) <= mag_limit )
+			{
+				if( static_cast<int_t>(bright_galaxies.size()) < num_bright )
+				{
+					bright_galaxies.push_back(gal);
+					break;
+				}
+			}
+			else if( static_cast<int_t>(faint_galaxies.size()) < num_faint )
+			{
+				faint_galaxies.push_back(gal);
+				break;
+			}
+		}
+	}
+
+	bright_galaxies.insert(bright_galaxies.end(), faint_galaxies.begin(), faint_galaxies.end());
+
+	return bright_galaxies;
+}
+
 #endif
 
 // Methods to automatically add children
@@ -99,6 +146,11 @@ void Field::fill_galaxies()
 	add_galaxies( round_int( get_param_value( num_field_galaxies_name ) ) );
 }
 
+void Field::fill_galaxy_block()
+{
+	add_galaxy_block( round_int( get_param_value( num_field_galaxies_name ) ) );
+}
+
 #endif
 
 } // namespace SHE_GST_PhysicalModel
@@ -30,6 +30,7 @@
 #include "SHE_GST_PhysicalModel/param_declarations.hpp"
 #include "SHE_GST_PhysicalModel/dependency_functions/galaxy_type.hpp"
 #include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+#include "SHE_GST_PhysicalModel/snapshot_io.hpp"
 
 namespace SHE_GST_PhysicalModel
 {
@@ -40,6 +41,16 @@ Galaxy::Galaxy(ParamHierarchyLevel * const & p_parent)
 {
 }
 
+void Galaxy::_write_snapshot_data(std::ostream & out) const
+{
+	write_snapshot_value<char>(out, _is_background);
+}
+
+void Galaxy::_read_snapshot_data(std::istream & in, std::vector<param_id_t> const & ids)
+{
+	if(read_snapshot_value<char>(in)) set_as_background_galaxy();
+}
+
 void Galaxy::set_as_background_galaxy()
 {
 	set_param_params(galaxy_type_name,"fixed",field_galaxy_type);
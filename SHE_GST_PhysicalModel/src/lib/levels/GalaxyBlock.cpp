@@ -0,0 +1,282 @@
+/**********************************************************************\
+ @file GalaxyBlock.cpp
+ ------------------
+
+ A level which stores the parameters of many galaxies compactly.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+ any later version.
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+ details.
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+ \**********************************************************************/
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <vector>
+
+#include "SHE_GST_IceBRG_main/logging.hpp"
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
+#include "SHE_GST_PhysicalModel/ParamGenerator.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
+#include "SHE_GST_PhysicalModel/snapshot_io.hpp"
+
+// Toggle debug-level logging with a define, so we can completely disable it for efficiency later
+#define DEBUGGING false
+#define DEBUG_LOG() if(DEBUGGING) logger.info()
+
+namespace SHE_GST_PhysicalModel
+{
+
+static auto logger = ICEBRG_GET_LOGGER(logger_name);
+
+// CompactGalaxy methods
+#if(1)
+
+flt_t CompactGalaxy::get_param_value(name_t const & name) const
+{
+	return _p_block->get_galaxy_param_value(_index, get_param_id(name));
+}
+
+flt_t CompactGalaxy::get_param_value(param_id_t const & id) const
+{
+	return _p_block->get_galaxy_param_value(_index, id);
+}
+
+int_t CompactGalaxy::get_local_ID() const
+{
+	return _p_block->get_local_ID() + _index;
+}
+
+long_int_t CompactGalaxy::get_full_ID() const
+{
+	return _p_block->get_galaxy_full_ID(_index);
+}
+
+std::vector<int_t> CompactGalaxy::get_ID_seq() const
+{
+	std::vector<int_t> res = _p_block->get_ID_seq();
+	res.back() += _index;
+	return res;
+}
+
+#endif
+
+// GalaxyBlock methods
+#if(1)
+
+GalaxyBlock::GalaxyBlock(ParamHierarchyLevel * const & p_parent, int_t const & num_galaxies)
+: ParamHierarchyLevel(p_parent),
+  _num_galaxies(num_galaxies),
+  _generated(false),
+  _generating(false)
+{
+	// The first galaxy uses the block's own local ID, so reserve IDs for the rest
+	if( p_parent and ( num_galaxies > 1 ) )
+	{
+		p_parent->_num_reserved_child_IDs += num_galaxies - 1;
+	}
+}
+
+void GalaxyBlock::_clear_param_cache(param_id_t const & id)
+{
+	ParamHierarchyLevel::_clear_param_cache(id);
+	if(!_generating) _generated = false;
+}
+
+void GalaxyBlock::_clear_param_cache()
+{
+	ParamHierarchyLevel::_clear_param_cache();
+	if(!_generating) _generated = false;
+}
+
+void GalaxyBlock::_write_snapshot_data(std::ostream & out) const
+{
+	write_snapshot_value<int_t>(out, _num_galaxies);
+	write_snapshot_value<char>(out, _generated);
+	if(!_generated) return;
+
+	write_snapshot_value<int_t>(out, _columns.size());
+	for( param_id_t id=0; id<static_cast<param_id_t>(_column_indices.size()); ++id )
+	{
+		if( _column_indices[id] < 0 ) continue;
+		write_snapshot_value<param_id_t>(out, id);
+		for( auto const & value : _columns[_column_indices[id]] )
+		{
+			write_snapshot_value<flt_t>(out, value);
+		}
+	}
+}
+
+void GalaxyBlock::_read_snapshot_data(std::istream & in, std::vector<param_id_t> const & ids)
+{
+	_num_galaxies = read_snapshot_value<int_t>(in);
+	_column_indices.clear();
+	_columns.clear();
+
+	// If the block wasn't generated, it'll be generated the same way as before when it's needed
+	_generated = read_snapshot_value<char>(in);
+	if(!_generated) return;
+
+	const int_t num_columns = read_snapshot_value<int_t>(in);
+	_column_indices.resize(_params_by_id.size(),-1);
+	for( int_t c=0; c<num_columns; ++c )
+	{
+		_column_indices[ids.at(read_snapshot_value<param_id_t>(in))] = _columns.size();
+		_columns.push_back(std::vector<flt_t>(_num_galaxies));
+		for( auto & value : _columns.back() )
+		{
+			value = read_snapshot_value<flt_t>(in);
+		}
+	}
+}
+
+void GalaxyBlock::generate_parameters()
+{
+	DEBUG_LOG() << "Entering " << get_name() << "<GalaxyBlock>::generate_parameters method.";
+
+	const int_t first_local_ID = _local_ID;
+	const int_t num_params = _params_by_id.size();
+
+	_column_indices.clear();
+	_columns.clear();
+
+	_generating = true;
+
+	try
+	{
+		for( int_t i=0; i<_num_galaxies; ++i )
+		{
+			// Step to this galaxy's ID and reseed, so we generate exactly what a Galaxy with this ID would
+			_local_ID = first_local_ID + i;
+			set_seed(get_seed());
+
+			ParamHierarchyLevel::generate_parameters();
+
+			// Which parameters vary between galaxies depends only on the configuration, so check once
+			if(i==0)
+			{
+				_column_indices.resize(num_params,-1);
+				for( param_id_t id=0; id<num_params; ++id )
+				{
+					if(!_param_generated_here(id)) continue;
+					_column_indices[id] = _columns.size();
+					_columns.push_back(std::vector<flt_t>(_num_galaxies));
+				}
+			}
+
+			for( param_id_t id=0; id<num_params; ++id )
+			{
+				const int_t & column_index = _column_indices[id];
+				if( column_index >= 0 )
+				{
+					_columns[column_index][i] = _params_by_id[id]->get();
+				}
+			}
+		}
+	}
+	catch(...)
+	{
+		_local_ID = first_local_ID;
+		_generating = false;
+		_generated = false;
+		throw;
+	}
+
+	_local_ID = first_local_ID;
+	_generating = false;
+	_generated = true;
+
+	DEBUG_LOG() << "Exiting " << get_name() << "<GalaxyBlock>::generate_parameters method successfully.";
+}
+
+void GalaxyBlock::clear()
+{
+	ParamHierarchyLevel::clear();
+	_column_indices.clear();
+	_columns.clear();
+	_generated = false;
+}
+
+flt_t GalaxyBlock::get_galaxy_param_value(int_t const & i, param_id_t const & id)
+{
+	_generate_if_necessary();
+
+	const int_t & column_index = _column_indices.at(id);
+	if( column_index >= 0 ) return _columns[column_index].at(i);
+	else return _params_by_id.at(id)->get();
+}
+
+void GalaxyBlock::get_galaxy_param_values(std::vector<param_id_t> const & ids, flt_t * const & p_values)
+{
+	DEBUG_LOG() << "Entering " << get_name() << "<GalaxyBlock>::get_galaxy_param_values method.";
+
+	_generate_if_necessary();
+
+	const std::size_t num_ids = ids.size();
+
+	for( std::size_t j=0; j<num_ids; ++j )
+	{
+		const int_t & column_index = _column_indices.at(ids[j]);
+		if( column_index >= 0 )
+		{
+			std::vector<flt_t> const & column = _columns[column_index];
+			for( int_t i=0; i<_num_galaxies; ++i )
+			{
+				p_values[i*num_ids+j] = column[i];
+			}
+		}
+		else
+		{
+			const flt_t value = _params_by_id[ids[j]]->get();
+			for( int_t i=0; i<_num_galaxies; ++i )
+			{
+				p_values[i*num_ids+j] = value;
+			}
+		}
+	}
+
+	DEBUG_LOG() << "Exiting " << get_name() << "<GalaxyBlock>::get_galaxy_param_values method successfully.";
+}
+
+long_int_t GalaxyBlock::get_galaxy_full_ID(int_t const & i) const
+{
+	// Galaxies' local IDs are consecutive, and the local ID is the last digit of the full ID
+	return get_full_ID() + i;
+}
+
+CompactGalaxy GalaxyBlock::get_galaxy(int_t const & i)
+{
+	return CompactGalaxy(this,i);
+}
+
+std::vector<CompactGalaxy> GalaxyBlock::get_galaxies()
+{
+	std::vector<CompactGalaxy> res;
+	res.reserve(_num_galaxies);
+
+	for( int_t i=0; i<_num_galaxies; ++i )
+	{
+		res.push_back(CompactGalaxy(this,i));
+	}
+
+	return res;
+}
+
+#endif
+
+} // namespace SHE_GST_PhysicalModel
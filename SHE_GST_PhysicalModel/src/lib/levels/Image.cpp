@@ -191,6 +191,20 @@ void Image::autofill_field()
 	}
 }
 
+void Image::autofill_children_with_galaxy_blocks()
+{
+	clear_children();
+	fill_children();
+	for( auto & p_cluster : get_clusters() )
+	{
+		p_cluster->autofill_children();
+	}
+	for( auto & p_field : get_fields() )
+	{
+		p_field->fill_galaxy_block();
+	}
+}
+
 #endif
 
 } // namespace SHE_GST_PhysicalModel
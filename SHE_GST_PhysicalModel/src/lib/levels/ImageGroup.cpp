@@ -63,9 +63,14 @@ void ImageGroup::add_images(int_t const & N)
 // Methods to automatically add children
 #if(1)
 
+int_t ImageGroup::get_num_images()
+{
+     return round_int(get_param_value(num_images_name));
+}
+
 void ImageGroup::fill_images()
 {
-     add_images( round_int(get_param_value(num_images_name)) );
+     add_images( get_num_images() );
 }
 
 #endif
@@ -74,9 +74,14 @@ void Survey::add_images(int_t const & N)
 // Methods to automatically add children
 #if(1)
 
+int_t Survey::get_num_image_groups()
+{
+	 return round_int(get_param_value(num_image_groups_name));
+}
+
 void Survey::fill_image_groups()
 {
-	 add_image_groups( round_int(get_param_value(num_image_groups_name)) );
+	 add_image_groups( get_num_image_groups() );
 }
 
 #endif
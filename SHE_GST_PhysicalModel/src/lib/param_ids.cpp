@@ -0,0 +1,84 @@
+/**********************************************************************\
+ @file param_ids.cpp
+ ------------------
+
+ Interned integer IDs for parameter names.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment      
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General    
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)    
+ any later version.    
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied    
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more    
+ details.    
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to    
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+\**********************************************************************/
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <unordered_map>
+#include <vector>
+
+#include <boost/algorithm/string.hpp>
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+// The tables are function-local statics so that they're constructed before the first parameter registers
+// itself, whatever the order of static initialisation
+
+static std::vector<name_t> & param_names_table()
+{
+	static std::vector<name_t> table;
+	return table;
+}
+
+static std::unordered_map<name_t,param_id_t> & param_ids_table()
+{
+	static std::unordered_map<name_t,param_id_t> table;
+	return table;
+}
+
+param_id_t register_param_id( name_t const & name )
+{
+	auto & ids = param_ids_table();
+
+	auto it = ids.find(name);
+	if( it != ids.end() ) return it->second;
+
+	param_id_t id = static_cast<param_id_t>(param_names_table().size());
+	param_names_table().push_back(name);
+	ids.insert(std::make_pair(name,id));
+
+	return id;
+}
+
+param_id_t get_param_id( name_t name )
+{
+	boost::algorithm::to_lower(name);
+	return param_ids_table().at(name);
+}
+
+name_t const & get_param_name( param_id_t const & id )
+{
+	return param_names_table().at(id);
+}
+
+int_t get_num_params()
+{
+	return static_cast<int_t>(param_names_table().size());
+}
+
+} // namespace SHE_GST_PhysicalModel
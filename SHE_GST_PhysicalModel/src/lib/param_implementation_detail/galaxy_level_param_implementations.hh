@@ -131,7 +131,7 @@ IMPLEMENT_PARAM(redshift, dv::galaxy_pair_level, DepFieldRedshift(dv::galaxy_red
 			else
 			{
 				_cached_value = p_redshift_pp->get_dependently(
-						_request_param(cluster_redshift_name)->get_p_params(),
+						_request_param(cluster_redshift_id)->get_p_params(),
 						REQUEST(galaxy_density), REQUEST(cluster_density),
 						get_rng());
 			}
@@ -151,7 +151,7 @@ IMPLEMENT_PARAM(redshift, dv::galaxy_pair_level, DepFieldRedshift(dv::galaxy_red
 			else
 			{
 				_cached_value = p_redshift_pp->get_dependently(
-						_request_param(cluster_redshift_name)->get_p_params(),
+						_request_param(cluster_redshift_id)->get_p_params(),
 						REQUEST(galaxy_density), REQUEST(cluster_density),
 						get_rng());
 			}
@@ -242,7 +242,7 @@ IMPLEMENT_PARAM(tilt, dv::galaxy_pair_level, IndArcCos(dv::tilt_cos_min, dv::til
 IMPLEMENT_PARAM(xp, dv::galaxy_level, Calculated
 	,
 		if(is_field_galaxy(REQUEST(galaxy_type)))
-			_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp));
+			_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp),get_rng());
 		else if(is_central_galaxy(REQUEST(galaxy_type)))
 			_cached_value = REQUEST(cluster_xp);
 		else
@@ -250,7 +250,7 @@ IMPLEMENT_PARAM(xp, dv::galaxy_level, Calculated
 					REQUEST(cluster_xp));
 	,
 		if(is_field_galaxy(REQUEST(galaxy_type)))
-			_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp));
+			_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp),get_rng());
 		else if(is_central_galaxy(REQUEST(galaxy_type)))
 			_cached_value = REQUEST(cluster_xp);
 		else
@@ -260,7 +260,7 @@ IMPLEMENT_PARAM(xp, dv::galaxy_level, Calculated
 IMPLEMENT_PARAM(yp, dv::galaxy_level, Calculated
 	,
 		if(is_field_galaxy(REQUEST(galaxy_type)))
-			_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp));
+			_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp),get_rng());
 		else if(is_central_galaxy(REQUEST(galaxy_type)))
 			_cached_value = REQUEST(cluster_yp);
 		else
@@ -268,7 +268,7 @@ IMPLEMENT_PARAM(yp, dv::galaxy_level, Calculated
 				REQUEST(cluster_yp));
 	,
 		if(is_field_galaxy(REQUEST(galaxy_type)))
-			_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp));
+			_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp),get_rng());
 		else if(is_central_galaxy(REQUEST(galaxy_type)))
 			_cached_value = REQUEST(cluster_yp);
 		else
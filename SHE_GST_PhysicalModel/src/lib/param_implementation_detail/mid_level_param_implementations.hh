@@ -46,15 +46,15 @@ IMPLEMENT_PARAM(cluster_redshift, dv::cluster_level, IndClusterRedshift(
 	)
 IMPLEMENT_PARAM(cluster_xp, dv::cluster_level, Calculated
 	,
-		_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp));
+		_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp),get_rng());
 	,
-		_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp));
+		_cached_value = IceBRG::drand(0.,REQUEST(image_size_xp),get_rng());
 	)
 IMPLEMENT_PARAM(cluster_yp, dv::cluster_level, Calculated
 	,
-		_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp));
+		_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp),get_rng());
 	,
-		_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp));
+		_cached_value = IceBRG::drand(0.,REQUEST(image_size_yp),get_rng());
 	)
 
 IMPLEMENT_PARAM(cluster_num_satellites, dv::cluster_level, Calculated
@@ -71,7 +71,7 @@ IMPLEMENT_PARAM(cluster_num_satellites, dv::cluster_level, Calculated
 IMPLEMENT_PARAM(num_field_galaxies, dv::field_level, Calculated
 	,
 		const IndClusterRedshift * p_redshift_pp = dynamic_cast<const IndClusterRedshift *>(
-				_request_param(cluster_redshift_name)->get_p_params());
+				_request_param(cluster_redshift_id)->get_p_params());
 		flt_t z_min;
 		flt_t z_max;
 		if(p_redshift_pp==nullptr)
@@ -90,7 +90,7 @@ IMPLEMENT_PARAM(num_field_galaxies, dv::field_level, Calculated
 		 _cached_value = generate_count( ex_num_gals - ex_num_cluster_gals, get_rng());
 	,
 		const IndClusterRedshift * p_redshift_pp = dynamic_cast<const IndClusterRedshift *>(
-				_request_param(cluster_redshift_name)->get_p_params());
+				_request_param(cluster_redshift_id)->get_p_params());
 		flt_t z_min;
 		flt_t z_max;
 		if(p_redshift_pp==nullptr)
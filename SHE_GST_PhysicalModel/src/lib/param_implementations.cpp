@@ -44,6 +44,7 @@
 #include "SHE_GST_PhysicalModel/dependency_functions/misc_dependencies.hpp"
 #include "SHE_GST_PhysicalModel/dependency_functions/morphology.hpp"
 #include "SHE_GST_PhysicalModel/param_declarations.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
 #include "SHE_GST_IceBRG_main/math/misc_math.hpp"
 #include "SHE_GST_IceBRG_main/units/unit_conversions.hpp"
 #include "SHE_GST_IceBRG_physics/cluster_visibility.hpp"
@@ -81,6 +82,7 @@ void insert_default_param_param(const name_t & param_name,
 						            alt_dependent_generation) \
  \
 const name_t param##_name = #param; \
+const param_id_t param##_id = register_param_id(param##_name); \
  \
 void param##_obj::_generate() \
 { \
@@ -137,7 +139,7 @@ struct param##_initializer \
 \
 param##_initializer param##_initializer_instance;
 
-#define REQUEST(param) _request_param_value(param##_name)
+#define REQUEST(param) _request_param_value(param##_id)
 
 using namespace IceBRG;
 
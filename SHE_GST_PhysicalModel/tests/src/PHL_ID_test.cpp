@@ -108,6 +108,33 @@ BOOST_FIXTURE_TEST_CASE(test_PHL_ID, PHL_ID_fixture) {
 
 }
 
+BOOST_FIXTURE_TEST_CASE(test_release_and_skip_children, PHL_ID_fixture) {
+
+	survey.set_seed(1);
+	survey.add_image_groups(3);
+	long_int_t ig3_full_seed = static_cast<ImageGroup *>(survey.get_child(2))->get_full_seed();
+
+	// Releasing children frees them but keeps their IDs in use
+	survey.release_children();
+	BOOST_CHECK_EQUAL(survey.num_children(), 0);
+	ImageGroup * p_image_group4 = survey.add_image_group();
+	BOOST_CHECK_EQUAL(p_image_group4->get_local_ID(), 3);
+
+	// Skipping children lets us go straight to a later child, with the same ID and seed as if it had been added
+	// after the ones before it
+	survey.clear_children();
+	survey.skip_children(2);
+	ImageGroup * p_image_group3 = survey.add_image_group();
+	BOOST_CHECK_EQUAL(survey.num_children(), 1);
+	BOOST_CHECK_EQUAL(p_image_group3->get_local_ID(), expected_ig3_local_ID);
+	BOOST_CHECK_EQUAL(p_image_group3->get_full_seed(), ig3_full_seed);
+
+	// Clearing children starts the IDs again
+	survey.clear_children();
+	BOOST_CHECK_EQUAL(survey.add_image_group()->get_local_ID(), expected_ig1_local_ID);
+
+}
+
 BOOST_AUTO_TEST_SUITE_END ()
 
 } // namespace SHE_GST_PhysicalModel
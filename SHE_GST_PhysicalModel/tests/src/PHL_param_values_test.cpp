@@ -0,0 +1,349 @@
+/**********************************************************************\
+ @file PHL_param_values_test.cpp
+ ------------------
+
+ Tests of getting parameter values for many galaxies at once.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment      
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General    
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)    
+ any later version.    
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied    
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more    
+ details.    
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to    
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+ \**********************************************************************/
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <vector>
+
+#define BOOST_TEST_DYN_LINK
+#include <boost/test/unit_test.hpp>
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/param_declarations.hpp"
+#include "SHE_GST_PhysicalModel/param_ids.hpp"
+#include "SHE_GST_PhysicalModel/levels/Field.hpp"
+#include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
+#include "SHE_GST_PhysicalModel/levels/Image.hpp"
+#include "SHE_GST_PhysicalModel/levels/ImageGroup.hpp"
+#include "SHE_GST_PhysicalModel/levels/Survey.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+struct PHL_param_values_fixture {
+
+	Survey survey;
+
+	int_t test_seed = 15;
+	int_t num_galaxies = 20;
+
+};
+
+
+BOOST_AUTO_TEST_SUITE (PHL_param_values_Test)
+
+BOOST_FIXTURE_TEST_CASE(test_galaxy_descendant_param_values, PHL_param_values_fixture) {
+
+	// Setup
+	survey.set_seed(test_seed);
+	Image * p_image = survey.add_image_group()->add_image();
+	Field * p_field = p_image->add_field();
+	for( int_t i=0; i<num_galaxies; ++i ) p_field->add_galaxy();
+
+	std::vector<name_t> names = {apparent_mag_vis_name, "XP", rotation_name};
+	std::vector<flt_t> values(num_galaxies*names.size());
+
+	p_image->get_galaxy_descendant_param_values(names, values.data());
+	std::vector<long_int_t> IDs = p_image->get_galaxy_descendant_full_IDs();
+
+	// Check it's as expected
+	std::vector<Galaxy *> galaxies = p_image->get_galaxy_descendants();
+	BOOST_REQUIRE_EQUAL(galaxies.size(),num_galaxies);
+	BOOST_REQUIRE_EQUAL(IDs.size(),num_galaxies);
+	for( int_t i=0; i<num_galaxies; ++i )
+	{
+		BOOST_CHECK_EQUAL(IDs[i],galaxies[i]->get_full_ID());
+		BOOST_CHECK_EQUAL(values[3*i],galaxies[i]->get_param_value(apparent_mag_vis_name));
+		BOOST_CHECK_EQUAL(values[3*i+1],galaxies[i]->get_param_value("xp"));
+		BOOST_CHECK_EQUAL(values[3*i+2],galaxies[i]->get_param_value(rotation_name));
+	}
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_generate_galaxy_descendant_parameters, PHL_param_values_fixture) {
+
+	// Set up two identical hierarchies
+	survey.set_seed(test_seed);
+	Survey other_survey;
+	other_survey.set_seed(test_seed);
+
+	Image * p_image = survey.add_image_group()->add_image();
+	p_image->add_field()->add_galaxies(num_galaxies);
+	Image * p_other_image = other_survey.add_image_group()->add_image();
+	p_other_image->add_field()->add_galaxies(num_galaxies);
+
+	// Generate parameters in bulk for one and galaxy-by-galaxy for the other
+	p_image->generate_galaxy_descendant_parameters();
+	for( auto & galaxy : p_other_image->get_galaxy_descendants() ) galaxy->generate_parameters();
+
+	std::vector<Galaxy *> galaxies = p_image->get_galaxy_descendants();
+	std::vector<Galaxy *> other_galaxies = p_other_image->get_galaxy_descendants();
+	BOOST_REQUIRE_EQUAL(galaxies.size(),other_galaxies.size());
+	for( std::size_t i=0; i<galaxies.size(); ++i )
+	{
+		BOOST_CHECK_EQUAL(galaxies[i]->get_param_value(apparent_mag_vis_name),
+				other_galaxies[i]->get_param_value(apparent_mag_vis_name));
+		BOOST_CHECK_EQUAL(galaxies[i]->get_param_value(rotation_name),
+				other_galaxies[i]->get_param_value(rotation_name));
+	}
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_add_galaxies_by_magnitude, PHL_param_values_fixture) {
+
+	// Setup
+	survey.set_seed(test_seed);
+	Field * p_field = survey.add_image_group()->add_image()->add_field();
+
+	int_t num_bright = 5;
+	int_t num_faint = 10;
+	flt_t mag_limit = 23.;
+
+	std::vector<Galaxy *> new_galaxies = p_field->add_galaxies_by_magnitude(num_bright, num_faint, mag_limit);
+
+	// Check we got the right number of each type, in the right order
+	BOOST_REQUIRE_EQUAL(new_galaxies.size(),num_bright+num_faint);
+	for( int_t i=0; i<num_bright+num_faint; ++i )
+	{
+		if(i<num_bright)
+		{
+			BOOST_CHECK_LE(new_galaxies[i]->get_param_value(apparent_mag_vis_name),mag_limit);
+		}
+		else
+		{
+			BOOST_CHECK_GT(new_galaxies[i]->get_param_value(apparent_mag_vis_name),mag_limit);
+		}
+	}
+
+	// Check that these are all the galaxies in the field
+	BOOST_CHECK_EQUAL(p_field->get_galaxy_descendants().size(),num_bright+num_faint);
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_param_ids, PHL_param_values_fixture) {
+
+	// Check the interned IDs map to and from the names
+	BOOST_CHECK_EQUAL(get_param_id(apparent_mag_vis_name),apparent_mag_vis_id);
+	BOOST_CHECK_EQUAL(get_param_id("XP"),xp_id);
+	BOOST_CHECK_EQUAL(get_param_name(rotation_id),rotation_name);
+	BOOST_CHECK_THROW(get_param_id("not_a_param"),std::out_of_range);
+
+	// Check lookups by ID agree with lookups by name
+	survey.set_seed(test_seed);
+	Galaxy * p_galaxy = survey.add_image_group()->add_image()->add_field()->add_galaxy();
+
+	BOOST_CHECK_EQUAL(p_galaxy->get_param(xp_id),p_galaxy->get_param(xp_name));
+	BOOST_CHECK_EQUAL(p_galaxy->get_param_value(apparent_mag_vis_id),
+			p_galaxy->get_param_value(apparent_mag_vis_name));
+	BOOST_CHECK_EQUAL(p_galaxy->get_generation_level(rotation_id),
+			p_galaxy->get_generation_level(rotation_name));
+
+	// Check setting param params by ID reaches the galaxy
+	survey.set_param_params(rotation_id, "fixed", 30.);
+	BOOST_CHECK_EQUAL(p_galaxy->get_param_value(rotation_name),30.);
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_compiled_generation_order, PHL_param_values_fixture) {
+
+	// Give both surveys a configuration no other test uses, so the first has to record its generation order
+	survey.set_seed(test_seed);
+	survey.set_param_params(spin_name, "fixed", 12.345);
+	Survey other_survey;
+	other_survey.set_seed(test_seed);
+	other_survey.set_param_params(spin_name, "fixed", 12.345);
+
+	// The first survey generates its galaxy on demand, and the second in the order recorded from the first
+	Galaxy * p_galaxy = survey.add_image_group()->add_image()->add_field()->add_galaxy();
+	p_galaxy->generate_parameters();
+	Galaxy * p_other_galaxy = other_survey.add_image_group()->add_image()->add_field()->add_galaxy();
+	p_other_galaxy->generate_parameters();
+
+	std::vector<param_id_t> ids = {apparent_mag_vis_id, redshift_id, stellar_mass_id, sersic_index_id,
+			bulge_fraction_id, tilt_id};
+
+	for( auto const & id : ids )
+	{
+		BOOST_CHECK_EQUAL(p_galaxy->get_param_value(id),p_other_galaxy->get_param_value(id));
+	}
+
+	// Check that regenerating the galaxies gives new values in the same way
+	p_galaxy->clear();
+	p_galaxy->generate_parameters();
+	p_other_galaxy->clear();
+	p_other_galaxy->generate_parameters();
+
+	for( auto const & id : ids )
+	{
+		BOOST_CHECK_EQUAL(p_galaxy->get_param_value(id),p_other_galaxy->get_param_value(id));
+	}
+
+	// Generate galaxies with many different configurations, so the stored orders are forgotten, and check that
+	// the galaxies using them still regenerate in the same way
+	Field * p_field = other_survey.add_image_group()->add_image()->add_field();
+	for( int_t i=0; i<1000; ++i )
+	{
+		Galaxy * p_new_galaxy = p_field->add_galaxy();
+		p_new_galaxy->set_param_params(spin_name, "fixed", flt_t(i));
+		p_new_galaxy->generate_parameters();
+	}
+
+	p_galaxy->clear();
+	p_galaxy->generate_parameters();
+	p_other_galaxy->clear();
+	p_other_galaxy->generate_parameters();
+
+	for( auto const & id : ids )
+	{
+		BOOST_CHECK_EQUAL(p_galaxy->get_param_value(id),p_other_galaxy->get_param_value(id));
+	}
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_galaxy_block, PHL_param_values_fixture) {
+
+	const int_t num_galaxies = 5;
+	const int_t num_in_block = 3;
+
+	survey.set_seed(test_seed);
+	Field * p_field = survey.add_image_group()->add_image()->add_field();
+
+	std::vector<name_t> names = {apparent_mag_vis_name, redshift_name, stellar_mass_name, sersic_index_name,
+			bulge_fraction_name, tilt_name, rotation_name};
+	const std::size_t num_names = names.size();
+
+	// Generate all the galaxies as Galaxy objects
+	p_field->add_galaxies(num_galaxies);
+	p_field->generate_galaxy_descendant_parameters();
+	std::vector<flt_t> values(num_galaxies*num_names);
+	p_field->get_galaxy_descendant_param_values(names, values.data());
+	std::vector<long_int_t> full_IDs = p_field->get_galaxy_descendant_full_IDs();
+
+	// Now generate them again in an identical survey, storing some of them in a block instead
+	Survey block_survey;
+	block_survey.set_seed(test_seed);
+	p_field = block_survey.add_image_group()->add_image()->add_field();
+	p_field->add_galaxies(num_galaxies-num_in_block);
+	GalaxyBlock * p_block = p_field->add_galaxy_block(num_in_block);
+	p_field->generate_galaxy_descendant_parameters();
+
+	BOOST_CHECK_EQUAL(p_field->num_children(), num_galaxies-num_in_block+1);
+	BOOST_CHECK_EQUAL(p_field->get_num_galaxy_descendants(), num_galaxies);
+
+	std::vector<flt_t> block_values(num_galaxies*num_names);
+	p_field->get_galaxy_descendant_param_values(names, block_values.data());
+	std::vector<long_int_t> block_full_IDs = p_field->get_galaxy_descendant_full_IDs();
+
+	BOOST_CHECK(full_IDs == block_full_IDs);
+	for( std::size_t k=0; k<values.size(); ++k )
+	{
+		BOOST_CHECK_EQUAL(values[k], block_values[k]);
+	}
+
+	// Check the handles give the same values
+	std::vector<CompactGalaxy> galaxies = p_block->get_galaxies();
+	for( int_t i=0; i<num_in_block; ++i )
+	{
+		const int_t row = num_galaxies-num_in_block+i;
+		BOOST_CHECK_EQUAL(galaxies[i].get_full_ID(), full_IDs[row]);
+		for( std::size_t j=0; j<num_names; ++j )
+		{
+			BOOST_CHECK_EQUAL(galaxies[i].get_param_value(names[j]), values[row*num_names+j]);
+		}
+	}
+
+	// Check that a galaxy added after the block gets the next free ID
+	Galaxy * p_galaxy = p_field->add_galaxy();
+	BOOST_CHECK_EQUAL(p_galaxy->get_local_ID(), num_galaxies);
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_autofill_with_galaxy_blocks, PHL_param_values_fixture) {
+
+	// Set up two identical small images, and fill one with Galaxy objects and the other with GalaxyBlocks
+	Survey other_survey;
+	std::vector<Image *> images;
+	for( Survey * p_survey : {&survey, &other_survey} )
+	{
+		p_survey->set_seed(test_seed);
+		p_survey->set_param_params(image_size_xp_name, "fixed", 512.);
+		p_survey->set_param_params(image_size_yp_name, "fixed", 512.);
+		images.push_back(p_survey->add_image_group()->add_image());
+	}
+	images[0]->autofill_children();
+	images[1]->autofill_children_with_galaxy_blocks();
+	for( auto & p_image : images )
+	{
+		p_image->generate_galaxy_descendant_parameters();
+	}
+
+	BOOST_CHECK_EQUAL(images[0]->get_galaxy_block_descendants().size(), 0u);
+	BOOST_CHECK_EQUAL(images[1]->get_galaxy_block_descendants().size(), images[1]->get_field_descendants().size());
+
+	const int_t num_galaxies = images[0]->get_num_galaxy_descendants();
+	BOOST_REQUIRE_EQUAL(images[1]->get_num_galaxy_descendants(), num_galaxies);
+
+	// The galaxies should have the same IDs and parameters either way
+	std::vector<name_t> names = {apparent_mag_vis_name, redshift_name, sersic_index_name, rotation_name};
+	const std::size_t num_names = names.size();
+
+	std::vector<flt_t> values(num_galaxies*num_names);
+	images[0]->get_galaxy_descendant_param_values(names, values.data());
+	std::vector<flt_t> block_values(num_galaxies*num_names);
+	images[1]->get_galaxy_descendant_param_values(names, block_values.data());
+
+	std::vector<long_int_t> full_IDs = images[0]->get_galaxy_descendant_full_IDs();
+	std::vector<long_int_t> block_full_IDs = images[1]->get_galaxy_descendant_full_IDs();
+
+	for( int_t i=0; i<num_galaxies; ++i )
+	{
+		BOOST_CHECK_EQUAL(block_full_IDs[i], full_IDs[i]);
+		for( std::size_t j=0; j<num_names; ++j )
+		{
+			BOOST_CHECK_EQUAL(block_values[i*num_names+j], values[i*num_names+j]);
+		}
+	}
+
+	// The handles to the galaxies in the blocks should follow the Galaxy objects, in the same order
+	std::vector<Galaxy *> galaxies = images[0]->get_galaxy_descendants();
+	const int_t num_block_galaxy_objects = images[1]->get_galaxy_descendants().size();
+	std::vector<CompactGalaxy> compact_galaxies = images[1]->get_compact_galaxy_descendants();
+	BOOST_REQUIRE_GT(compact_galaxies.size(), 0u);
+	BOOST_REQUIRE_EQUAL(num_block_galaxy_objects + compact_galaxies.size(), galaxies.size());
+
+	for( std::size_t i=0; i<compact_galaxies.size(); ++i )
+	{
+		Galaxy * const & p_galaxy = galaxies[num_block_galaxy_objects+i];
+		BOOST_CHECK_EQUAL(compact_galaxies[i].get_local_ID(), p_galaxy->get_local_ID());
+		BOOST_CHECK_EQUAL(compact_galaxies[i].get_full_ID(), p_galaxy->get_full_ID());
+		BOOST_CHECK(compact_galaxies[i].get_ID_seq() == p_galaxy->get_ID_seq());
+	}
+
+}
+
+BOOST_AUTO_TEST_SUITE_END ()
+
+} // namespace SHE_GST_PhysicalModel
@@ -35,6 +35,9 @@
 #include "SHE_GST_PhysicalModel/levels/Survey.hpp"
 #include "SHE_GST_PhysicalModel/levels/ImageGroup.hpp"
 #include "SHE_GST_PhysicalModel/levels/Image.hpp"
+#include "SHE_GST_PhysicalModel/levels/Cluster.hpp"
+#include "SHE_GST_PhysicalModel/levels/Field.hpp"
+#include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
 #include "SHE_GST_PhysicalModel/param_params/IndGaussian.hpp"
 
 namespace SHE_GST_PhysicalModel
@@ -77,6 +80,37 @@ BOOST_FIXTURE_TEST_CASE(test_PHL_ID, PHL_seed_fixture) {
 
 }
 
+BOOST_FIXTURE_TEST_CASE(test_position_seed, PHL_seed_fixture) {
+
+	// Setup
+	Survey survey2 = survey1;
+
+	survey1.set_seed(test_seed1);
+	survey2.set_seed(test_seed1);
+
+	Image * p_image1 = survey1.add_image_group()->add_image();
+	Cluster * p_cluster1 = p_image1->add_cluster();
+	Field * p_field1 = p_image1->add_field();
+	std::vector<Galaxy *> galaxies1;
+	for( int_t i=0; i<5; ++i ) galaxies1.push_back(p_field1->add_galaxy());
+
+	Image * p_image2 = survey2.add_image_group()->add_image();
+	Cluster * p_cluster2 = p_image2->add_cluster();
+	Field * p_field2 = p_image2->add_field();
+	std::vector<Galaxy *> galaxies2;
+	for( int_t i=0; i<5; ++i ) galaxies2.push_back(p_field2->add_galaxy());
+
+	// Check that positions depend only on the seed, not on what else has been generated in this process
+	BOOST_CHECK_EQUAL(p_cluster1->get_param_value(cluster_xp_name),p_cluster2->get_param_value(cluster_xp_name));
+	BOOST_CHECK_EQUAL(p_cluster1->get_param_value(cluster_yp_name),p_cluster2->get_param_value(cluster_yp_name));
+	for( int_t i=0; i<5; ++i )
+	{
+		BOOST_CHECK_EQUAL(galaxies1[i]->get_param_value(xp_name),galaxies2[i]->get_param_value(xp_name));
+		BOOST_CHECK_EQUAL(galaxies1[i]->get_param_value(yp_name),galaxies2[i]->get_param_value(yp_name));
+	}
+
+}
+
 BOOST_AUTO_TEST_SUITE_END ()
 
 } // namespace SHE_GST_PhysicalModel
@@ -0,0 +1,194 @@
+/**********************************************************************\
+ @file PHL_snapshot_test.cpp
+ ------------------
+
+ Tests of saving and loading snapshots of the physical model.
+
+ **********************************************************************
+
+ Copyright (C) 2012-2020 Euclid Science Ground Segment
+
+ This library is free software; you can redistribute it and/or modify it under the terms of the GNU Lesser General
+ Public License as published by the Free Software Foundation; either version 3.0 of the License, or (at your option)
+ any later version.
+
+ This library is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+ warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License for more
+ details.
+
+ You should have received a copy of the GNU Lesser General Public License along with this library; if not, write to
+ the Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
+
+ \**********************************************************************/
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <cstdio>
+#include <stdexcept>
+#include <vector>
+
+#define BOOST_TEST_DYN_LINK
+#include <boost/test/unit_test.hpp>
+
+#include "SHE_GST_PhysicalModel/common.hpp"
+#include "SHE_GST_PhysicalModel/default_values.hpp"
+#include "SHE_GST_PhysicalModel/param_declarations.hpp"
+#include "SHE_GST_PhysicalModel/levels/Field.hpp"
+#include "SHE_GST_PhysicalModel/levels/Galaxy.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyBlock.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyGroup.hpp"
+#include "SHE_GST_PhysicalModel/levels/GalaxyPair.hpp"
+#include "SHE_GST_PhysicalModel/levels/Image.hpp"
+#include "SHE_GST_PhysicalModel/levels/ImageGroup.hpp"
+#include "SHE_GST_PhysicalModel/levels/Survey.hpp"
+
+namespace SHE_GST_PhysicalModel
+{
+
+struct PHL_snapshot_fixture {
+
+	Survey survey;
+	Survey other_survey;
+
+	int_t test_seed = 15;
+	int_t num_galaxies = 4;
+	int_t num_in_block = 3;
+
+	name_t filename = "PHL_snapshot_test.bin";
+
+	std::vector<name_t> names = {apparent_mag_vis_name, redshift_name, sersic_index_name, tilt_name,
+			rotation_name};
+
+	~PHL_snapshot_fixture() { std::remove(filename.c_str()); }
+
+};
+
+
+BOOST_AUTO_TEST_SUITE (PHL_snapshot_Test)
+
+BOOST_FIXTURE_TEST_CASE(test_snapshot_round_trip, PHL_snapshot_fixture) {
+
+	// Set up an image with galaxies, a background galaxy, and a block of galaxies, and save it
+	survey.set_seed(test_seed);
+	Image * p_image = survey.add_image_group()->add_image();
+	Field * p_field = p_image->add_field();
+	p_field->add_galaxies(num_galaxies);
+	p_image->add_background_galaxy();
+	p_field->add_galaxy_block(num_in_block);
+	p_image->generate_parameters();
+	p_image->generate_galaxy_descendant_parameters();
+
+	p_image->save_snapshot(filename);
+
+	std::vector<flt_t> values(p_image->get_num_galaxy_descendants()*names.size());
+	p_image->get_galaxy_descendant_param_values(names, values.data());
+	std::vector<long_int_t> full_IDs = p_image->get_galaxy_descendant_full_IDs();
+
+	// Load it into a fresh survey with a different seed, so nothing would be the same if regenerated
+	other_survey.set_seed(test_seed+1);
+	Image * p_other_image = other_survey.add_image_group()->add_image();
+	p_other_image->load_snapshot(filename);
+
+	BOOST_CHECK_EQUAL(p_other_image->get_seed(), p_image->get_seed());
+	BOOST_CHECK_EQUAL(p_other_image->get_param_value(exp_time_name),
+			p_image->get_param_value(exp_time_name));
+	BOOST_REQUIRE_EQUAL(p_other_image->get_num_galaxy_descendants(), p_image->get_num_galaxy_descendants());
+
+	std::vector<flt_t> other_values(values.size());
+	p_other_image->get_galaxy_descendant_param_values(names, other_values.data());
+
+	BOOST_CHECK(p_other_image->get_galaxy_descendant_full_IDs() == full_IDs);
+	for( std::size_t k=0; k<values.size(); ++k )
+	{
+		BOOST_CHECK_EQUAL(other_values[k], values[k]);
+	}
+
+	// Check the background galaxy is still marked as such
+	std::vector<Galaxy *> galaxies = p_image->get_galaxy_descendants();
+	std::vector<Galaxy *> other_galaxies = p_other_image->get_galaxy_descendants();
+	BOOST_REQUIRE_EQUAL(other_galaxies.size(), galaxies.size());
+	for( std::size_t i=0; i<galaxies.size(); ++i )
+	{
+		BOOST_CHECK_EQUAL(other_galaxies[i]->is_background_galaxy(), galaxies[i]->is_background_galaxy());
+	}
+
+	// Check that new children continue from the same IDs
+	BOOST_CHECK_EQUAL(p_other_image->get_field_descendants()[0]->add_galaxy()->get_local_ID(),
+			p_field->add_galaxy()->get_local_ID());
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_snapshot_partial, PHL_snapshot_fixture) {
+
+	// Set up an image with changed settings, and only generate some parameters before saving it
+	survey.set_seed(test_seed);
+	Image * p_image = survey.add_image_group()->add_image();
+	p_image->set_generation_level(shear_magnitude_name, dv::galaxy_group_level);
+	p_image->add_field()->add_galaxies(num_galaxies);
+	std::vector<Galaxy *> galaxies = p_image->get_galaxy_descendants();
+	galaxies[0]->set_param_params(rotation_name, "fixed", 12.5);
+
+	// Move a galaxy into a pair, leaving an empty slot in the field's children
+	p_image->add_galaxy_group()->add_galaxy_pair()->abduct_child(galaxies[1]);
+
+	for( auto const & p_galaxy : galaxies )
+	{
+		p_galaxy->get_param_value(apparent_mag_vis_name);
+	}
+
+	p_image->save_snapshot(filename);
+
+	// Load it into a fresh survey with a different seed
+	other_survey.set_seed(test_seed+1);
+	Image * p_other_image = other_survey.add_image_group()->add_image();
+	p_other_image->load_snapshot(filename);
+
+	BOOST_CHECK_EQUAL(p_other_image->get_generation_level(shear_magnitude_name), dv::galaxy_group_level);
+
+	// Parameters which weren't generated before the snapshot should get the same values as without it
+	std::vector<name_t> all_names = names;
+	all_names.push_back(shear_magnitude_name);
+
+	std::vector<flt_t> values(p_image->get_num_galaxy_descendants()*all_names.size());
+	p_image->get_galaxy_descendant_param_values(all_names, values.data());
+
+	BOOST_REQUIRE_EQUAL(p_other_image->get_num_galaxy_descendants(), p_image->get_num_galaxy_descendants());
+	std::vector<flt_t> other_values(values.size());
+	p_other_image->get_galaxy_descendant_param_values(all_names, other_values.data());
+
+	for( std::size_t k=0; k<values.size(); ++k )
+	{
+		BOOST_CHECK_EQUAL(other_values[k], values[k]);
+	}
+
+	BOOST_CHECK_EQUAL(p_other_image->get_galaxy_descendants()[0]->get_param_value(rotation_name), 12.5);
+	BOOST_CHECK_EQUAL(p_other_image->get_galaxy_pair_descendants().at(0)->get_galaxies().size(), 1u);
+
+}
+
+BOOST_FIXTURE_TEST_CASE(test_snapshot_mismatch, PHL_snapshot_fixture) {
+
+	survey.set_seed(test_seed);
+	Image * p_image = survey.add_image_group()->add_image();
+	p_image->add_field()->add_galaxies(num_galaxies);
+	p_image->save_snapshot(filename);
+
+	// An image in a different place in the hierarchy can't load it
+	other_survey.set_seed(test_seed);
+	ImageGroup * p_other_image_group = other_survey.add_image_group();
+	p_other_image_group->add_image();
+	BOOST_CHECK_THROW(p_other_image_group->add_image()->load_snapshot(filename), std::runtime_error);
+
+	// Nor can a different level
+	BOOST_CHECK_THROW(other_survey.add_image_group()->load_snapshot(filename), std::runtime_error);
+
+	// Nor can anything load a missing file
+	BOOST_CHECK_THROW(p_image->load_snapshot(filename+".missing"), std::runtime_error);
+
+}
+
+BOOST_AUTO_TEST_SUITE_END ()
+
+} // namespace SHE_GST_PhysicalModel
@@ -5,7 +5,7 @@
     Contains functions to write out configuration files.
 """
 
-__updated__ = "2020-11-12"
+__updated__ = "2026-10-18"
 
 # Copyright (C) 2012-2020 Euclid Science Ground Segment
 #
@@ -25,14 +25,14 @@ from shutil import copyfile
 
 from SHE_PPT import products
 from SHE_PPT.file_io import (get_allowed_filename, replace_multiple_in_file,
-                             write_xml_product, write_listfile, find_file,
-                             find_aux_file, get_data_filename)
+                             write_xml_product, write_listfile, get_data_filename)
 from SHE_PPT.logging import getLogger
 from SHE_PPT.table_formats.she_simulation_plan import tf as sptf
 from SHE_PPT.table_utility import is_in_format
 from astropy.table import Table
 
 import SHE_GST
+from SHE_GST_GalaxyImageGeneration.utility.file_resolver import AUX_PREFIX, resolve_file
 from SHE_GST_PrepareConfigs import magic_values as mv
 import numpy as np
 
@@ -67,7 +67,7 @@ def copy_cache_files(workdir):
 
         # Find it in the auxdir
         aux_filename = os.path.join(cache_auxdir, filename)
-        qualified_aux_filename = find_aux_file(aux_filename)
+        qualified_aux_filename = resolve_file(AUX_PREFIX + aux_filename)
 
         # Get the desired destination filename
         qualified_dest_filename = os.path.join(workdir, filename)
@@ -119,8 +119,8 @@ def write_configs_from_plan(plan_filename,
     # Copy over cache files in this step as well
     copy_cache_files(workdir)
 
-    qualified_plan_filename = find_file(get_data_filename(plan_filename, workdir), workdir)
-    qualified_template_filename = find_file(template_filename, path=workdir)
+    qualified_plan_filename = resolve_file(get_data_filename(plan_filename, workdir), workdir)
+    qualified_template_filename = resolve_file(template_filename, path=workdir)
 
     # Read in the plan table
     simulation_plan_table = None